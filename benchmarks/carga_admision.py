@@ -0,0 +1,75 @@
+"""
+Autor: Sistema de Matrículas Universitarias
+Módulo: Carga de Admisión
+Descripción: Simula la apertura de matrículas contra la cola de admisión por curso
+Paradigma: Imperativo con concurrencia
+
+Mide el rendimiento (solicitudes por segundo), la equidad FIFO (qué parte
+de los primeros en llegar obtuvo cupo) y las métricas de la cola.
+
+Uso (requiere MySQL con el esquema creado):
+    python benchmarks/carga_admision.py --solicitudes 500 --cupos 30
+"""
+
+import argparse
+import sys
+import os
+import threading
+import time
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.estres_cupos import CURSO_CODIGO, preparar_datos, limpiar_datos
+from services.cola_admision import ColaAdmision
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Carga de apertura de matrículas sobre la cola de admisión")
+    parser.add_argument('--solicitudes', type=int, default=500)
+    parser.add_argument('--cupos', type=int, default=30)
+    parser.add_argument('--capacidad-cola', type=int, default=300)
+    parser.add_argument('--tamano-lote', type=int, default=50)
+    parser.add_argument('--timeout', type=float, default=10.0)
+    parser.add_argument('--hilos', type=int, default=4)
+    args = parser.parse_args()
+    
+    limpiar_datos()
+    codigos = preparar_datos(args.solicitudes, args.cupos)
+    
+    cola = ColaAdmision(capacidad_cola=args.capacidad_cola, tamano_lote=args.tamano_lote,
+                        timeout=args.timeout, hilos=args.hilos)
+    llegadas = [0.0] * len(codigos)
+    resultados = [None] * len(codigos)
+    inicio_evento = threading.Event()
+    
+    def solicitar(indice: int):
+        inicio_evento.wait()
+        llegadas[indice] = time.monotonic()
+        resultados[indice] = cola.solicitar(codigos[indice], CURSO_CODIGO)
+    
+    hilos = [threading.Thread(target=solicitar, args=(i,)) for i in range(len(codigos))]
+    for hilo in hilos:
+        hilo.start()
+    
+    inicio = time.monotonic()
+    inicio_evento.set()
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.monotonic() - inicio
+    cola.detener()
+    
+    exitosas = {i for i, (exito, _) in enumerate(resultados) if exito}
+    primeros = sorted(range(len(codigos)), key=lambda i: llegadas[i])[:len(exitosas)]
+    equidad = len(exitosas.intersection(primeros)) / len(exitosas) * 100 if exitosas else 0
+    
+    print(f"Solicitudes: {args.solicitudes} | Cupos: {args.cupos} | Duración: {duracion:.2f}s")
+    print(f"Rendimiento: {args.solicitudes / duracion:.1f} solicitudes/s")
+    print(f"Exitosas: {len(exitosas)} | Equidad FIFO: {equidad:.1f}% de los cupos para los primeros en llegar")
+    for clave, valor in cola.metricas().items():
+        print(f"  {clave}: {valor}")
+    
+    limpiar_datos()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Autor: Sistema de Matrículas Universitarias
+Módulo: Prueba de Estrés de Cupos
+Descripción: Lanza matrículas concurrentes sobre un curso y verifica que no haya sobreventa
+Paradigma: Imperativo con concurrencia
+
+Uso (requiere MySQL con el esquema creado):
+    python benchmarks/estres_cupos.py --solicitudes 200 --cupos 30
+"""
+
+import argparse
+import sys
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.estudiante import Estudiante
+from models.curso import Curso
+from dao.estudiante_dao import EstudianteDAO
+from dao.curso_dao import CursoDAO
+from services.matricula_service import MatriculaService
+
+CURSO_CODIGO = 'EST999'
+PREFIJO_ESTUDIANTE = 'EST9'
+
+def preparar_datos(solicitudes: int, cupos: int):
+    """Crea el curso de prueba y un estudiante por solicitud"""
+    curso_dao = CursoDAO()
+    estudiante_dao = EstudianteDAO()
+    
+    if not curso_dao.exists_codigo(CURSO_CODIGO):
+        curso_dao.create(Curso(CURSO_CODIGO, 'Curso De Estres', 3, cupos_disponibles=cupos))
+    
+    codigos = [f"{PREFIJO_ESTUDIANTE}{i:05d}" for i in range(solicitudes)]
+    for codigo in codigos:
+        if not estudiante_dao.exists_codigo(codigo):
+            estudiante_dao.create(Estudiante(codigo, 'Estres', 'Prueba', 'INGENIERIA DE SISTEMAS'))
+    return codigos
+
+def limpiar_datos():
+    """Elimina las matrículas, lista de espera, estudiantes y curso de prueba"""
+    dao = CursoDAO()
+    dao._execute_update("""
+        DELETE w FROM lista_espera w JOIN cursos c ON w.curso_id = c.id WHERE c.codigo = %s
+    """, (CURSO_CODIGO,))
+    dao._execute_update("""
+        DELETE m FROM matriculas m JOIN cursos c ON m.curso_id = c.id WHERE c.codigo = %s
+    """, (CURSO_CODIGO,))
+    dao._execute_update("DELETE FROM cursos WHERE codigo = %s", (CURSO_CODIGO,))
+    dao._execute_update("DELETE FROM estudiantes WHERE codigo LIKE %s", (f"{PREFIJO_ESTUDIANTE}%",))
+
+def contar_matriculas_activas() -> int:
+    """Cuenta las matrículas activas del curso de prueba"""
+    results = CursoDAO()._execute_query("""
+        SELECT COUNT(*) FROM matriculas m JOIN cursos c ON m.curso_id = c.id
+        WHERE c.codigo = %s AND m.estado = 'ACTIVA'
+    """, (CURSO_CODIGO,))
+    return results[0][0]
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Prueba de estrés de asignación de cupos")
+    parser.add_argument('--solicitudes', type=int, default=200)
+    parser.add_argument('--cupos', type=int, default=30)
+    parser.add_argument('--hilos', type=int, default=100,
+                        help="Hilos simultáneos (limitado por max_connections de MySQL)")
+    args = parser.parse_args()
+    
+    limpiar_datos()
+    codigos = preparar_datos(args.solicitudes, args.cupos)
+    
+    servicio = MatriculaService()
+    barrera = threading.Barrier(min(args.hilos, args.solicitudes))
+    
+    def matricular(codigo: str):
+        # Todas las solicitudes del primer grupo arrancan a la vez
+        try:
+            barrera.wait(timeout=30)
+        except threading.BrokenBarrierError:
+            pass
+        return servicio.matricular_estudiante(codigo, CURSO_CODIGO)
+    
+    with ThreadPoolExecutor(max_workers=args.hilos) as executor:
+        resultados = list(executor.map(matricular, codigos))
+    
+    exitosas = sum(1 for exito, _ in resultados if exito)
+    errores = [mensaje for exito, mensaje in resultados if not exito and mensaje.startswith("Error interno")]
+    activas = contar_matriculas_activas()
+    esperadas = min(args.cupos, args.solicitudes)
+    
+    print(f"Solicitudes: {args.solicitudes} | Cupos: {args.cupos}")
+    print(f"Matrículas exitosas: {exitosas} | Activas en BD: {activas} | Errores internos: {len(errores)}")
+    
+    limpiar_datos()
+    
+    # Un error interno no es un rechazo válido: la prueba no pasaría si todas
+    # las solicitudes fallaran
+    if errores:
+        print(f"❌ Errores internos durante la prueba, por ejemplo: {errores[0]}")
+        return 1
+    
+    if activas > args.cupos or exitosas != activas:
+        print("❌ Sobreventa detectada")
+        return 1
+    
+    if activas != esperadas:
+        print(f"❌ Se esperaban {esperadas} matrículas activas")
+        return 1
+    
+    print("✅ Cupos completos y sin sobreventa")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
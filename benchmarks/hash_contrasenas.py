@@ -0,0 +1,77 @@
+"""
+Autor: Sistema de Matrículas Universitarias
+Módulo: Benchmark de Hash de Contraseñas
+Descripción: Mide verificaciones de contraseña por segundo y por núcleo en cada nivel de costo
+Paradigma: Imperativo con concurrencia
+
+Para cada nivel de costo de utils.contrasenas mide:
+- la latencia de una verificación (lo que espera un login),
+- logins por segundo en un solo núcleo,
+- logins por segundo con el pool acotado de verificación, y por hilo del pool.
+No requiere base de datos.
+
+Uso:
+    python benchmarks/hash_contrasenas.py --verificaciones 40 --hilos 4
+"""
+
+import argparse
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.contrasenas import COSTOS, VerificadorContrasenas, verificar_hash
+
+PASSWORD = 'contrasena-de-prueba'
+
+def medir(hasher, verificaciones: int, verificador: VerificadorContrasenas):
+    """Retorna (latencia_ms, por_segundo_un_nucleo, por_segundo_pool)"""
+    codificado = hasher.hashear(PASSWORD)
+    
+    inicio = time.perf_counter()
+    for _ in range(verificaciones):
+        assert hasher.verificar(PASSWORD, codificado)
+    secuencial = time.perf_counter() - inicio
+    
+    # Varios clientes simultáneos compiten por el pool acotado
+    with ThreadPoolExecutor(max_workers=verificador.hilos * 2) as clientes:
+        inicio = time.perf_counter()
+        resultados = list(clientes.map(lambda _: verificador.verificar(PASSWORD, codificado),
+                                       range(verificaciones)))
+        concurrente = time.perf_counter() - inicio
+    assert all(resultados)
+    
+    return (secuencial / verificaciones * 1000, verificaciones / secuencial,
+            verificaciones / concurrente)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Logins por segundo y por núcleo según el costo del hash")
+    parser.add_argument('--verificaciones', type=int, default=40)
+    parser.add_argument('--hilos', type=int, default=None, help="hilos del pool (por defecto, los del verificador)")
+    parser.add_argument('--costos', nargs='*', default=list(COSTOS), choices=list(COSTOS))
+    args = parser.parse_args()
+    
+    verificador = VerificadorContrasenas(hilos=args.hilos, espera_maxima=600)
+    print(f"Núcleos: {os.cpu_count()} | Hilos del pool: {verificador.hilos} | "
+          f"Verificaciones por costo: {args.verificaciones}")
+    
+    inicio = time.perf_counter()
+    for _ in range(args.verificaciones * 100):
+        verificar_hash(PASSWORD, 'f' * 64)
+    heredado = args.verificaciones * 100 / (time.perf_counter() - inicio)
+    print(f"{'sha256 heredado':<16} {'':>10} {heredado:>12.0f} logins/s por núcleo")
+    
+    print(f"{'Costo':<16} {'Latencia':>10} {'Por núcleo':>12} {'Pool':>10} {'Por hilo':>10}")
+    for nombre in args.costos:
+        latencia, por_nucleo, pool = medir(COSTOS[nombre](), args.verificaciones, verificador)
+        print(f"{nombre:<16} {latencia:>8.1f}ms {por_nucleo:>10.1f}/s {pool:>8.1f}/s "
+              f"{pool / verificador.hilos:>8.1f}/s")
+    
+    verificador.cerrar()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""
+Autor: Sistema de Matrículas Universitarias
+Módulo: Benchmark del Reporte de Matrículas
+Descripción: Compara el reporte calculado en Python con el calculado con GROUP BY
+Paradigma: Imperativo
+
+Uso (requiere MySQL con el esquema creado):
+    python benchmarks/reporte_matriculas.py --matriculas 100000
+"""
+
+import argparse
+import random
+import sys
+import os
+import time
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.matricula import EstadoMatricula
+from dao.matricula_dao import MatriculaDAO
+from services.matricula_service import MatriculaService
+
+PREFIJO = 'REP'
+CURSOS = 50
+MATERIAS_POR_ESTUDIANTE = 5
+CARRERAS = ['INGENIERIA DE SISTEMAS', 'INGENIERIA INDUSTRIAL', 'ADMINISTRACION', 'DERECHO', 'MEDICINA']
+ESTADOS = ['ACTIVA'] * 6 + ['CANCELADA'] * 2 + ['COMPLETADA'] * 2
+
+def preparar_datos(matriculas: int):
+    """Inserta estudiantes, cursos y matrículas de prueba en bloque"""
+    dao = MatriculaDAO()
+    estudiantes = max(1, matriculas // MATERIAS_POR_ESTUDIANTE)
+    aleatorio = random.Random(42)
+    
+    with dao._transaction() as cursor:
+        cursor.executemany(
+            "INSERT INTO cursos (codigo, nombre, creditos, cupos_disponibles) VALUES (%s, %s, 3, 1000000)",
+            [(f"{PREFIJO}{i:03d}", f"Curso Reporte {i}") for i in range(CURSOS)]
+        )
+        cursor.executemany(
+            "INSERT INTO estudiantes (codigo, nombre, apellido, carrera) VALUES (%s, 'Reporte', 'Prueba', %s)",
+            [(f"{PREFIJO}{i:06d}", aleatorio.choice(CARRERAS)) for i in range(estudiantes)]
+        )
+        cursor.execute("SELECT id FROM cursos WHERE codigo LIKE %s", (f"{PREFIJO}%",))
+        curso_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT id FROM estudiantes WHERE codigo LIKE %s", (f"{PREFIJO}%",))
+        estudiante_ids = [row[0] for row in cursor.fetchall()]
+        
+        filas = []
+        for estudiante_id in estudiante_ids:
+            for curso_id in aleatorio.sample(curso_ids, MATERIAS_POR_ESTUDIANTE):
+                filas.append((estudiante_id, curso_id, aleatorio.choice(ESTADOS)))
+        
+        for inicio in range(0, len(filas), 5000):
+            cursor.executemany(
+                "INSERT INTO matriculas (estudiante_id, curso_id, estado) VALUES (%s, %s, %s)",
+                filas[inicio:inicio + 5000]
+            )
+    
+    return len(filas)
+
+def limpiar_datos():
+    """Elimina las matrículas, estudiantes y cursos de prueba"""
+    dao = MatriculaDAO()
+    dao._execute_update("""
+        DELETE m FROM matriculas m JOIN cursos c ON m.curso_id = c.id WHERE c.codigo LIKE %s
+    """, (f"{PREFIJO}%",))
+    dao._execute_update("DELETE FROM cursos WHERE codigo LIKE %s", (f"{PREFIJO}%",))
+    dao._execute_update("DELETE FROM estudiantes WHERE codigo LIKE %s", (f"{PREFIJO}%",))
+
+def reporte_en_python(servicio: MatriculaService) -> dict:
+    """Versión anterior del reporte: carga todo y filtra en Python"""
+    matriculas = servicio.matricula_dao.find_all()
+    
+    total_matriculas = len(matriculas)
+    matriculas_activas = list(filter(lambda m: m.esta_activa(), matriculas))
+    matriculas_canceladas = list(filter(lambda m: m.estado == EstadoMatricula.CANCELADA, matriculas))
+    matriculas_completadas = list(filter(lambda m: m.estado == EstadoMatricula.COMPLETADA, matriculas))
+    
+    estudiantes_matriculados = set()
+    carreras_stats = {}
+    for matricula in matriculas_activas:
+        estudiante = servicio.estudiante_dao.find_by_codigo(matricula.estudiante_codigo)
+        if estudiante:
+            estudiantes_matriculados.add(estudiante.codigo)
+            carreras_stats[estudiante.carrera] = carreras_stats.get(estudiante.carrera, 0) + 1
+    
+    cursos_stats = {}
+    for matricula in matriculas_activas:
+        cursos_stats[matricula.curso_codigo] = cursos_stats.get(matricula.curso_codigo, 0) + 1
+    
+    return {
+        'resumen': {
+            'total_matriculas': total_matriculas,
+            'matriculas_activas': len(matriculas_activas),
+            'matriculas_canceladas': len(matriculas_canceladas),
+            'matriculas_completadas': len(matriculas_completadas),
+            'estudiantes_con_matriculas': len(estudiantes_matriculados)
+        },
+        'por_carrera': carreras_stats,
+        'por_curso': cursos_stats
+    }
+
+def medir(funcion, *args):
+    """Ejecuta una función y retorna (resultado, segundos)"""
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return resultado, time.perf_counter() - inicio
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark del reporte de matrículas")
+    parser.add_argument('--matriculas', type=int, default=100000)
+    parser.add_argument('--solo-agregados', action='store_true',
+                        help="No ejecutar la versión en Python (puede tardar minutos)")
+    args = parser.parse_args()
+    
+    limpiar_datos()
+    insertadas = preparar_datos(args.matriculas)
+    print(f"Matrículas de prueba insertadas: {insertadas}")
+    
+    servicio = MatriculaService()
+    codigo_salida = 0
+    try:
+        agregado, t_agregado = medir(servicio.generar_reporte_matriculas)
+        print(f"Reporte con GROUP BY: {t_agregado:.3f} s")
+        
+        if not args.solo_agregados:
+            en_python, t_python = medir(reporte_en_python, servicio)
+            print(f"Reporte en Python:   {t_python:.3f} s ({t_python / t_agregado:.1f}x)")
+            
+            for clave in ('resumen', 'por_carrera', 'por_curso'):
+                if agregado[clave] != en_python[clave]:
+                    print(f"❌ Diferencia en '{clave}'")
+                    codigo_salida = 1
+            if codigo_salida == 0:
+                print("✅ Ambos reportes coinciden")
+    finally:
+        limpiar_datos()
+    
+    return codigo_salida
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,8 +6,39 @@ Paradigma: Orientado a Objetos
 """
 
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, pooling
+from mysql.connector.errors import PoolError
 import logging
+import threading
+
+# Prerrequisitos iniciales: los cursos avanzados requieren al menos uno de los básicos
+PRERREQUISITOS_INICIALES = [
+    (curso, requisito, 1)
+    for curso in ('MAT301', 'FIS301', 'QUI301')
+    for requisito in ('MAT101', 'FIS101', 'QUI101')
+]
+
+# Reconstruye el resumen de carga de cada estudiante desde sus matrículas
+# Los créditos completados incluyen las matrículas archivadas
+CARGA_ESTUDIANTE_REBUILD = """
+INSERT INTO carga_estudiante (estudiante_id, cursos_activos, creditos_activos, creditos_completados)
+SELECT e.id,
+       COALESCE(SUM(m.estado = 'ACTIVA'), 0),
+       COALESCE(SUM(CASE WHEN m.estado = 'ACTIVA' THEN c.creditos ELSE 0 END), 0),
+       COALESCE(SUM(CASE WHEN m.estado = 'COMPLETADA' THEN c.creditos ELSE 0 END), 0)
+FROM estudiantes e
+LEFT JOIN (
+    SELECT estudiante_id, curso_id, estado FROM matriculas
+    UNION ALL
+    SELECT estudiante_id, curso_id, estado FROM matriculas_archivo
+) m ON m.estudiante_id = e.id
+LEFT JOIN cursos c ON m.curso_id = c.id
+GROUP BY e.id
+ON DUPLICATE KEY UPDATE
+    cursos_activos = VALUES(cursos_activos),
+    creditos_activos = VALUES(creditos_activos),
+    creditos_completados = VALUES(creditos_completados)
+"""
 
 class DatabaseConfig:
     """
@@ -15,6 +46,12 @@ class DatabaseConfig:
     Aplica principios de POO: encapsulación y abstracción
     """
     
+    # Pool de conexiones compartido por todas las instancias
+    POOL_NOMBRE = 'sistema_matriculas'
+    POOL_TAMANO = 10
+    _pool = None
+    _pool_lock = threading.Lock()
+    
     def __init__(self):
         """Constructor de la clase DatabaseConfig"""
         self.host = 'localhost'
@@ -107,24 +144,159 @@ class DatabaseConfig:
             )
             """
             
+            # Crear tabla periodos académicos
+            create_periodos_table = """
+            CREATE TABLE IF NOT EXISTS periodos (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                codigo VARCHAR(10) UNIQUE NOT NULL,
+                nombre VARCHAR(100) NOT NULL,
+                fecha_inicio DATE NOT NULL,
+                fecha_fin DATE NOT NULL,
+                actual BOOLEAN DEFAULT FALSE
+            )
+            """
+            
             # Crear tabla matriculas
+            # periodo_clave trata el periodo NULL como 0: en una clave única
+            # NULL es distinto de NULL y no impediría duplicados sin periodo
             create_matriculas_table = """
             CREATE TABLE IF NOT EXISTS matriculas (
                 id INT AUTO_INCREMENT PRIMARY KEY,
                 estudiante_id INT,
                 curso_id INT,
+                periodo_id INT NULL,
+                periodo_clave INT AS (COALESCE(periodo_id, 0)) STORED,
                 fecha_matricula TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 estado ENUM('ACTIVA', 'CANCELADA', 'COMPLETADA') DEFAULT 'ACTIVA',
                 FOREIGN KEY (estudiante_id) REFERENCES estudiantes(id),
                 FOREIGN KEY (curso_id) REFERENCES cursos(id),
-                UNIQUE KEY unique_matricula (estudiante_id, curso_id)
+                FOREIGN KEY (periodo_id) REFERENCES periodos(id),
+                UNIQUE KEY unique_matricula (estudiante_id, curso_id, periodo_clave),
+                INDEX idx_matriculas_fecha_estado (fecha_matricula, estado),
+                INDEX idx_matriculas_periodo_curso (periodo_id, curso_id, estado),
+                INDEX idx_matriculas_periodo_estudiante (periodo_id, estudiante_id, estado)
+            )
+            """
+            
+            # Crear tabla de archivo para matrículas finalizadas
+            # Conserva el ID original para que el historial sea consultable
+            create_matriculas_archivo_table = """
+            CREATE TABLE IF NOT EXISTS matriculas_archivo (
+                id INT PRIMARY KEY,
+                estudiante_id INT,
+                curso_id INT,
+                periodo_id INT NULL,
+                fecha_matricula TIMESTAMP NULL,
+                estado ENUM('ACTIVA', 'CANCELADA', 'COMPLETADA') NOT NULL,
+                fecha_archivo TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (estudiante_id) REFERENCES estudiantes(id),
+                FOREIGN KEY (curso_id) REFERENCES cursos(id),
+                INDEX idx_archivo_estudiante_estado (estudiante_id, estado),
+                INDEX idx_archivo_curso (curso_id),
+                INDEX idx_archivo_fecha_estado (fecha_matricula, estado),
+                INDEX idx_archivo_periodo (periodo_id)
+            )
+            """
+            
+            # Crear tabla de lista de espera por curso y periodo
+            create_lista_espera_table = """
+            CREATE TABLE IF NOT EXISTS lista_espera (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                estudiante_id INT NOT NULL,
+                curso_id INT NOT NULL,
+                periodo_id INT NULL,
+                periodo_clave INT AS (COALESCE(periodo_id, 0)) STORED,
+                fecha_solicitud TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (estudiante_id) REFERENCES estudiantes(id),
+                FOREIGN KEY (curso_id) REFERENCES cursos(id),
+                FOREIGN KEY (periodo_id) REFERENCES periodos(id),
+                UNIQUE KEY unique_espera (estudiante_id, curso_id, periodo_clave),
+                INDEX idx_espera_curso (curso_id, periodo_id, id)
+            )
+            """
+            
+            # Crear tabla de prerrequisitos entre cursos
+            # Los requisitos de un mismo grupo son alternativos
+            create_prerrequisitos_table = """
+            CREATE TABLE IF NOT EXISTS prerrequisitos (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                curso_id INT NOT NULL,
+                requisito_id INT NOT NULL,
+                grupo INT NOT NULL DEFAULT 1,
+                FOREIGN KEY (curso_id) REFERENCES cursos(id),
+                FOREIGN KEY (requisito_id) REFERENCES cursos(id),
+                UNIQUE KEY unique_prerrequisito (curso_id, requisito_id),
+                INDEX idx_prerrequisitos_requisito (requisito_id)
+            )
+            """
+            
+            # Crear tabla resumen de carga por estudiante
+            # Se mantiene en las mismas transacciones que cambian matrículas
+            create_carga_estudiante_table = """
+            CREATE TABLE IF NOT EXISTS carga_estudiante (
+                estudiante_id INT PRIMARY KEY,
+                cursos_activos INT NOT NULL DEFAULT 0,
+                creditos_activos INT NOT NULL DEFAULT 0,
+                creditos_completados INT NOT NULL DEFAULT 0,
+                FOREIGN KEY (estudiante_id) REFERENCES estudiantes(id) ON DELETE CASCADE
+            )
+            """
+            
+            # Crear tabla de resultados de solicitudes idempotentes
+            # exito NULL indica una solicitud todavía en curso
+            create_solicitudes_idempotentes_table = """
+            CREATE TABLE IF NOT EXISTS solicitudes_idempotentes (
+                clave CHAR(64) PRIMARY KEY,
+                exito BOOLEAN NULL,
+                mensaje VARCHAR(500) NULL,
+                expira DATETIME NOT NULL,
+                INDEX idx_idempotencia_expira (expira)
+            )
+            """
+            
+            # Crear tabla usuarios
+            # El email se guarda en minúsculas; su índice único resuelve el login
+            create_usuarios_table = """
+            CREATE TABLE IF NOT EXISTS usuarios (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                email VARCHAR(100) UNIQUE NOT NULL,
+                password_hash VARCHAR(255) NOT NULL,
+                rol ENUM("ADMINISTRADOR", "ESTUDIANTE") NOT NULL,
+                nombre VARCHAR(100),
+                apellido VARCHAR(100),
+                codigo_estudiante VARCHAR(10),
+                activo BOOLEAN DEFAULT TRUE,
+                fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
             """
             
             # Ejecutar creación de tablas
             cursor.execute(create_estudiantes_table)
             cursor.execute(create_cursos_table)
+            cursor.execute(create_periodos_table)
             cursor.execute(create_matriculas_table)
+            cursor.execute(create_matriculas_archivo_table)
+            cursor.execute(create_lista_espera_table)
+            cursor.execute(create_prerrequisitos_table)
+            cursor.execute(create_carga_estudiante_table)
+            cursor.execute(create_solicitudes_idempotentes_table)
+            cursor.execute(create_usuarios_table)
+            
+            # Migración de bases de datos creadas con versiones anteriores
+            self._migrate_matriculas_periodo(cursor)
+            self._migrate_periodo_clave(cursor)
+            self._create_index_if_missing(cursor, 'matriculas', 'idx_matriculas_fecha_estado',
+                                          '(fecha_matricula, estado)')
+            self._create_index_if_missing(cursor, 'matriculas', 'idx_matriculas_periodo_curso',
+                                          '(periodo_id, curso_id, estado)')
+            self._create_index_if_missing(cursor, 'matriculas', 'idx_matriculas_periodo_estudiante',
+                                          '(periodo_id, estudiante_id, estado)')
+            self._seed_prerrequisitos(cursor)
+            self._backfill_carga_estudiante(cursor)
+            
+            # Emails creados con mayúsculas por versiones anteriores
+            cursor.execute("UPDATE usuarios SET email = LOWER(email) WHERE BINARY email <> LOWER(email)")
+            self._migrate_password_hash(cursor)
             
             temp_connection.commit()
             cursor.close()
@@ -137,6 +309,180 @@ class DatabaseConfig:
             self.logger.error(f"Error al crear base de datos: {e}")
             return False
     
+    def _create_index_if_missing(self, cursor, tabla: str, indice: str, columnas: str):
+        """
+        Crea un índice solo si aún no existe en la tabla
+        MySQL no soporta CREATE INDEX IF NOT EXISTS
+        """
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.statistics
+            WHERE table_schema = %s AND table_name = %s AND index_name = %s
+        """, (self.database, tabla, indice))
+        
+        if cursor.fetchone()[0] == 0:
+            cursor.execute(f"CREATE INDEX {indice} ON {tabla} {columnas}")
+            self.logger.info(f"Índice {indice} creado en {tabla}")
+    
+    def _column_exists(self, cursor, tabla: str, columna: str) -> bool:
+        """Verifica si una columna existe en una tabla"""
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.columns
+            WHERE table_schema = %s AND table_name = %s AND column_name = %s
+        """, (self.database, tabla, columna))
+        return cursor.fetchone()[0] > 0
+    
+    def _migrate_password_hash(self, cursor):
+        """
+        Amplía password_hash en tablas creadas para SHA-256 (64 caracteres)
+        Los hashes scrypt/PBKDF2 codificados incluyen algoritmo, costo y sal
+        """
+        cursor.execute("""
+            SELECT character_maximum_length FROM information_schema.columns
+            WHERE table_schema = %s AND table_name = 'usuarios' AND column_name = 'password_hash'
+        """, (self.database,))
+        fila = cursor.fetchone()
+        if fila and fila[0] < 255:
+            cursor.execute("ALTER TABLE usuarios MODIFY password_hash VARCHAR(255) NOT NULL")
+            self.logger.info("Columna usuarios.password_hash ampliada a 255 caracteres")
+    
+    def _migrate_matriculas_periodo(self, cursor):
+        """
+        Agrega la referencia a periodos en tablas creadas sin ella
+        La clave única pasa a incluir el periodo en _migrate_periodo_clave
+        """
+        if not self._column_exists(cursor, 'matriculas', 'periodo_id'):
+            cursor.execute("""
+                ALTER TABLE matriculas
+                ADD COLUMN periodo_id INT NULL AFTER curso_id,
+                ADD FOREIGN KEY (periodo_id) REFERENCES periodos(id)
+            """)
+            self.logger.info("Columna periodo_id agregada a matriculas")
+        
+        if not self._column_exists(cursor, 'matriculas_archivo', 'periodo_id'):
+            cursor.execute("""
+                ALTER TABLE matriculas_archivo
+                ADD COLUMN periodo_id INT NULL AFTER curso_id,
+                ADD INDEX idx_archivo_periodo (periodo_id)
+            """)
+    
+    def _migrate_periodo_clave(self, cursor):
+        """
+        Agrega periodo_clave (periodo NULL como 0) a matrículas y lista de
+        espera y la usa en sus claves únicas, que con periodo_id NULL no
+        impedían duplicados
+        Antes de crear la clave se resuelven los duplicados existentes: se
+        conserva la matrícula activa (o la más reciente) y las demás pasan al
+        archivo, canceladas si estaban activas; en la lista de espera se
+        conserva la solicitud más antigua
+        """
+        if not self._column_exists(cursor, 'matriculas', 'periodo_clave'):
+            cursor.execute("""
+                ALTER TABLE matriculas
+                ADD COLUMN periodo_clave INT AS (COALESCE(periodo_id, 0)) STORED AFTER periodo_id
+            """)
+            cursor.execute("""
+                SELECT DISTINCT m.id FROM matriculas m
+                JOIN matriculas k ON k.estudiante_id = m.estudiante_id AND k.curso_id = m.curso_id
+                     AND k.periodo_clave = m.periodo_clave
+                     AND ((k.estado = 'ACTIVA') > (m.estado = 'ACTIVA')
+                          OR ((k.estado = 'ACTIVA') = (m.estado = 'ACTIVA') AND k.id > m.id))
+            """)
+            duplicadas = tuple(fila[0] for fila in cursor.fetchall())
+            if duplicadas:
+                placeholders = ', '.join(['%s'] * len(duplicadas))
+                cursor.execute(f"""
+                    INSERT INTO matriculas_archivo (id, estudiante_id, curso_id, periodo_id, fecha_matricula, estado)
+                    SELECT id, estudiante_id, curso_id, periodo_id, fecha_matricula,
+                           IF(estado = 'ACTIVA', 'CANCELADA', estado)
+                    FROM matriculas WHERE id IN ({placeholders})
+                """, duplicadas)
+                cursor.execute(f"DELETE FROM matriculas WHERE id IN ({placeholders})", duplicadas)
+                cursor.execute(CARGA_ESTUDIANTE_REBUILD)
+                self.logger.warning(f"{len(duplicadas)} matrículas duplicadas movidas al archivo")
+            
+            cursor.execute("""
+                ALTER TABLE matriculas
+                DROP INDEX unique_matricula,
+                ADD UNIQUE KEY unique_matricula (estudiante_id, curso_id, periodo_clave)
+            """)
+            self.logger.info("Clave única de matriculas basada en periodo_clave")
+        
+        if not self._column_exists(cursor, 'lista_espera', 'periodo_clave'):
+            cursor.execute("""
+                ALTER TABLE lista_espera
+                ADD COLUMN periodo_clave INT AS (COALESCE(periodo_id, 0)) STORED AFTER periodo_id
+            """)
+            cursor.execute("""
+                DELETE w FROM lista_espera w
+                JOIN lista_espera k ON k.estudiante_id = w.estudiante_id AND k.curso_id = w.curso_id
+                     AND k.periodo_clave = w.periodo_clave AND k.id < w.id
+            """)
+            cursor.execute("""
+                ALTER TABLE lista_espera
+                DROP INDEX unique_espera,
+                ADD UNIQUE KEY unique_espera (estudiante_id, curso_id, periodo_clave)
+            """)
+    
+    def _seed_prerrequisitos(self, cursor):
+        """
+        Carga los prerrequisitos iniciales mientras la tabla esté vacía
+        Solo se insertan las reglas cuyos cursos ya existen
+        """
+        cursor.execute("SELECT COUNT(*) FROM prerrequisitos")
+        if cursor.fetchone()[0] > 0:
+            return
+        
+        cursor.executemany("""
+            INSERT IGNORE INTO prerrequisitos (curso_id, requisito_id, grupo)
+            SELECT c.id, r.id, %s FROM cursos c, cursos r
+            WHERE c.codigo = %s AND r.codigo = %s
+        """, [(grupo, curso, requisito) for curso, requisito, grupo in PRERREQUISITOS_INICIALES])
+    
+    def _backfill_carga_estudiante(self, cursor):
+        """
+        Calcula el resumen de carga la primera vez que se crea la tabla
+        Después se mantiene de forma incremental desde MatriculaDAO
+        """
+        cursor.execute("SELECT COUNT(*) FROM carga_estudiante")
+        if cursor.fetchone()[0] > 0:
+            return
+        
+        cursor.execute(CARGA_ESTUDIANTE_REBUILD)
+        self.logger.info("Resumen de carga por estudiante calculado")
+    
+    def _obtener_pool(self):
+        """Crea el pool compartido la primera vez que se necesita"""
+        if DatabaseConfig._pool is None:
+            with DatabaseConfig._pool_lock:
+                if DatabaseConfig._pool is None:
+                    DatabaseConfig._pool = pooling.MySQLConnectionPool(
+                        pool_name=self.POOL_NOMBRE,
+                        pool_size=self.POOL_TAMANO,
+                        pool_reset_session=True,
+                        host=self.host,
+                        database=self.database,
+                        user=self.user,
+                        password=self.password,
+                        port=self.port
+                    )
+                    self.logger.info(f"Pool de conexiones creado ({self.POOL_TAMANO} conexiones)")
+        return DatabaseConfig._pool
+    
+    def get_pooled_connection(self):
+        """
+        Obtiene una conexión del pool compartido
+        Al cerrarla (close) vuelve al pool en lugar de desconectarse
+        Si el pool está agotado se abre una conexión nueva
+        """
+        try:
+            return self._obtener_pool().get_connection()
+        except PoolError:
+            self.logger.warning("Pool de conexiones agotado: se abre una conexión nueva")
+            return self.get_new_connection()
+        except Error as e:
+            self.logger.error(f"Error al obtener conexión del pool: {e}")
+            return None
+    
     def get_new_connection(self):
         """
         Obtiene una nueva conexión a la base de datos
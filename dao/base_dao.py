@@ -6,8 +6,9 @@ Paradigma: POO con patrón DAO
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 from config.database import DatabaseConfig
+from contextlib import contextmanager
 import logging
 
 class BaseDAO(ABC):
@@ -22,10 +23,14 @@ class BaseDAO(ABC):
         self.logger = logging.getLogger(__name__)
     
     def _get_connection(self):
-        """Obtiene una conexión a la base de datos"""
-        if not self.db_config.connect():
+        """
+        Obtiene una conexión del pool compartido
+        Cerrarla al terminar la devuelve al pool
+        """
+        connection = self.db_config.get_pooled_connection()
+        if connection is None:
             raise Exception("No se pudo establecer conexión con la base de datos")
-        return self.db_config.get_connection()
+        return connection
     
     def _close_connection(self):
         """Cierra la conexión a la base de datos"""
@@ -60,6 +65,79 @@ class BaseDAO(ABC):
             if connection:
                 connection.close()
     
+    def _iter_query(self, query: str, params: tuple = None, batch_size: int = 500) -> Iterator[tuple]:
+        """
+        Ejecuta una consulta SELECT y entrega las filas por lotes
+        Evita cargar todo el resultado en memoria
+        """
+        connection = None
+        cursor = None
+        try:
+            connection = self._get_connection()
+            cursor = connection.cursor()
+            
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            
+            total = 0
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                total += len(rows)
+                yield from rows
+            
+            self.logger.info(f"Consulta en streaming completada: {total} registros")
+            
+        except Exception as e:
+            self.logger.error(f"Error ejecutando consulta en streaming: {e}")
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+            if connection:
+                connection.close()
+    
+    def _query_columns(self, query: str, params: tuple = None, columnas: Tuple[str, ...] = (),
+                       batch_size: int = 1000) -> Dict[str, list]:
+        """
+        Ejecuta una consulta SELECT y retorna una lista por columna
+        Las filas se leen del cursor por lotes y cada lote se reparte en las
+        listas de sus columnas, sin materializar el resultado completo como filas
+        """
+        valores = [[] for _ in columnas]
+        connection = None
+        cursor = None
+        try:
+            connection = self._get_connection()
+            cursor = connection.cursor()
+            
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for lista, columna in zip(valores, zip(*rows)):
+                    lista.extend(columna)
+            
+            self.logger.info(f"Consulta columnar completada: {len(valores[0]) if valores else 0} registros")
+            return dict(zip(columnas, valores))
+            
+        except Exception as e:
+            self.logger.error(f"Error ejecutando consulta columnar: {e}")
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+            if connection:
+                connection.close()
+    
     def _execute_update(self, query: str, params: tuple = None) -> int:
         """
         Ejecuta una consulta INSERT, UPDATE o DELETE
@@ -123,6 +201,42 @@ class BaseDAO(ABC):
             if connection:
                 connection.close()
     
+    @contextmanager
+    def _transaction(self):
+        """
+        Abre una transacción y entrega su cursor
+        Confirma al salir del bloque o revierte si ocurre una excepción
+        """
+        connection = None
+        cursor = None
+        try:
+            connection = self._get_connection()
+            cursor = connection.cursor()
+            
+            yield cursor
+            
+            connection.commit()
+            
+        except Exception as e:
+            if connection:
+                connection.rollback()
+            self.logger.error(f"Error en transacción: {e}")
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+            if connection:
+                connection.close()
+    
+    def _periodo_clause(self, periodo_id: Optional[int], alias: str = 'm') -> Tuple[str, tuple]:
+        """
+        Retorna la condición opcional que acota matrículas a un periodo
+        Sin periodo la consulta conserva su alcance histórico
+        """
+        if periodo_id is None:
+            return "", ()
+        return f" AND {alias}.periodo_id = %s", (periodo_id,)
+    
     # Métodos abstractos que deben implementar las clases hijas
     @abstractmethod
     def create(self, entity) -> int:
@@ -5,9 +5,10 @@ Descripción: Acceso a datos para cursos
 Paradigma: POO con herencia
 """
 
-from typing import List, Optional
+from typing import List, Optional, Dict
 from dao.base_dao import BaseDAO
 from models.curso import Curso
+from models.horario import validar_horario
 
 class CursoDAO(BaseDAO):
     """
@@ -16,7 +17,11 @@ class CursoDAO(BaseDAO):
     """
     
     def create(self, curso: Curso) -> int:
-        """Crea un nuevo curso en la base de datos"""
+        """
+        Crea un nuevo curso en la base de datos
+        Lanza ValueError si el horario no se puede interpretar
+        """
+        horario = validar_horario(curso.horario)
         query = """
         INSERT INTO cursos (codigo, nombre, creditos, profesor, horario, cupos_disponibles)
         VALUES (%s, %s, %s, %s, %s, %s)
@@ -26,7 +31,7 @@ class CursoDAO(BaseDAO):
             curso.nombre,
             curso.creditos,
             curso.profesor,
-            curso.horario,
+            horario,
             curso._cupos_disponibles  # Acceso al atributo privado para obtener cupos totales
         )
         
@@ -41,33 +46,66 @@ class CursoDAO(BaseDAO):
             return self._row_to_curso(results[0])
         return None
     
-    def find_by_codigo(self, codigo: str) -> Optional[Curso]:
+    def find_by_codigo(self, codigo: str, periodo_id: Optional[int] = None) -> Optional[Curso]:
         """Busca un curso por código"""
         query = "SELECT * FROM cursos WHERE codigo = %s"
         results = self._execute_query(query, (codigo,))
         
         if results:
-            return self._row_to_curso(results[0])
+            return self._row_to_curso(results[0], periodo_id)
         return None
     
     def update(self, curso: Curso) -> bool:
-        """Actualiza un curso existente"""
+        """
+        Actualiza un curso existente
+        Si cambian los créditos, ajusta el resumen de carga de los estudiantes
+        matriculados en la misma transacción
+        Lanza ValueError si el horario no se puede interpretar
+        """
+        horario = validar_horario(curso.horario)
         query = """
         UPDATE cursos 
         SET nombre = %s, creditos = %s, profesor = %s, horario = %s, cupos_disponibles = %s
-        WHERE codigo = %s
+        WHERE id = %s
         """
-        params = (
-            curso.nombre,
-            curso.creditos,
-            curso.profesor,
-            curso.horario,
-            curso._cupos_disponibles,
-            curso.codigo
-        )
         
-        affected_rows = self._execute_update(query, params)
-        return affected_rows > 0
+        with self._transaction() as cursor:
+            cursor.execute("SELECT id, creditos FROM cursos WHERE codigo = %s FOR UPDATE", (curso.codigo,))
+            row = cursor.fetchone()
+            if not row:
+                return False
+            curso_id, creditos_anteriores = row
+            
+            params = (
+                curso.nombre,
+                curso.creditos,
+                curso.profesor,
+                horario,
+                curso._cupos_disponibles,
+                curso_id
+            )
+            cursor.execute(query, params)
+            
+            delta = curso.creditos - creditos_anteriores
+            if delta:
+                cursor.execute("""
+                    UPDATE carga_estudiante ce
+                    JOIN (
+                        SELECT estudiante_id,
+                               SUM(estado = 'ACTIVA') as activas,
+                               SUM(estado = 'COMPLETADA') as completadas
+                        FROM (
+                            SELECT estudiante_id, estado FROM matriculas WHERE curso_id = %s
+                            UNION ALL
+                            SELECT estudiante_id, estado FROM matriculas_archivo WHERE curso_id = %s
+                        ) m
+                        GROUP BY estudiante_id
+                    ) x ON x.estudiante_id = ce.estudiante_id
+                    SET ce.creditos_activos = ce.creditos_activos + x.activas * %s,
+                        ce.creditos_completados = ce.creditos_completados + x.completadas * %s
+                """, (curso_id, curso_id, delta, delta))
+        
+        return True
     
     def delete(self, id: int) -> bool:
         """Elimina un curso por ID"""
@@ -81,12 +119,12 @@ class CursoDAO(BaseDAO):
         affected_rows = self._execute_update(query, (codigo,))
         return affected_rows > 0
     
-    def find_all(self) -> List[Curso]:
+    def find_all(self, periodo_id: Optional[int] = None) -> List[Curso]:
         """Obtiene todos los cursos"""
         query = "SELECT * FROM cursos ORDER BY nombre"
         results = self._execute_query(query)
         
-        return list(map(self._row_to_curso, results))
+        return list(map(lambda row: self._row_to_curso(row, periodo_id), results))
     
     def find_by_creditos(self, creditos: int) -> List[Curso]:
         """Busca cursos por número de créditos"""
@@ -95,29 +133,57 @@ class CursoDAO(BaseDAO):
         
         return list(map(self._row_to_curso, results))
     
-    def find_with_available_spots(self) -> List[Curso]:
+    def find_with_available_spots(self, periodo_id: Optional[int] = None) -> List[Curso]:
         """
         Busca cursos con cupos disponibles
         Uso de subconsultas y funciones de agregación
         """
-        query = """
+        clausula, params = self._periodo_clause(periodo_id)
+        query = f"""
         SELECT c.* FROM cursos c
         WHERE c.cupos_disponibles > (
             SELECT COUNT(*) FROM matriculas m 
-            WHERE m.curso_id = c.id AND m.estado = 'ACTIVA'
+            WHERE m.curso_id = c.id AND m.estado = 'ACTIVA'{clausula}
         )
         ORDER BY c.nombre
         """
-        results = self._execute_query(query)
+        results = self._execute_query(query, params)
         
-        return list(map(self._row_to_curso, results))
+        return list(map(lambda row: self._row_to_curso(row, periodo_id), results))
     
-    def get_enrollment_stats(self) -> List[dict]:
+    # Columnas del catálogo en formato columnar, en el orden de la consulta
+    CATALOG_COLUMNS = (
+        'codigo', 'nombre', 'creditos', 'profesor', 'horario', 'cupos_totales', 'cupos_ocupados'
+    )
+    
+    def get_catalog_columns(self, periodo_id: Optional[int] = None) -> Dict[str, tuple]:
+        """
+        Obtiene el catálogo completo con su ocupación en formato columnar
+        Una sola consulta con LEFT JOIN y GROUP BY, sin una consulta por curso
+        """
+        clausula, params = self._periodo_clause(periodo_id)
+        query = f"""
+        SELECT c.codigo, c.nombre, c.creditos, COALESCE(c.profesor, ''), COALESCE(c.horario, ''),
+               c.cupos_disponibles, COUNT(m.id)
+        FROM cursos c
+        LEFT JOIN matriculas m ON c.id = m.curso_id AND m.estado = 'ACTIVA'{clausula}
+        GROUP BY c.id, c.codigo, c.nombre, c.creditos, c.profesor, c.horario, c.cupos_disponibles
+        ORDER BY c.nombre
+        """
+        results = self._execute_query(query, params)
+        
+        if not results:
+            return {columna: () for columna in self.CATALOG_COLUMNS}
+        
+        return dict(zip(self.CATALOG_COLUMNS, zip(*results)))
+    
+    def get_enrollment_stats(self, periodo_id: Optional[int] = None) -> List[dict]:
         """
         Obtiene estadísticas de matrícula por curso
         Uso de JOINs y funciones de agregación
         """
-        query = """
+        clausula, params = self._periodo_clause(periodo_id)
+        query = f"""
         SELECT 
             c.codigo,
             c.nombre,
@@ -126,11 +192,11 @@ class CursoDAO(BaseDAO):
             (c.cupos_disponibles - COUNT(m.id)) as cupos_libres,
             ROUND((COUNT(m.id) * 100.0 / c.cupos_disponibles), 2) as porcentaje_ocupacion
         FROM cursos c
-        LEFT JOIN matriculas m ON c.id = m.curso_id AND m.estado = 'ACTIVA'
+        LEFT JOIN matriculas m ON c.id = m.curso_id AND m.estado = 'ACTIVA'{clausula}
         GROUP BY c.id, c.codigo, c.nombre, c.cupos_disponibles
         ORDER BY porcentaje_ocupacion DESC
         """
-        results = self._execute_query(query)
+        results = self._execute_query(query, params)
         
         # Convertir a lista de diccionarios
         stats = []
@@ -158,7 +224,7 @@ class CursoDAO(BaseDAO):
         
         return list(map(self._row_to_curso, results))
     
-    def _row_to_curso(self, row: tuple) -> Curso:
+    def _row_to_curso(self, row: tuple, periodo_id: Optional[int] = None) -> Curso:
         """
         Convierte una fila de la base de datos a objeto Curso
         Mapeo objeto-relacional
@@ -173,14 +239,14 @@ class CursoDAO(BaseDAO):
             cupos_disponibles=row[6]
         )
         
-        # Calcular cupos ocupados basado en matrículas activas
-        query_ocupados = """
-        SELECT COUNT(*) FROM matriculas 
-        WHERE curso_id = (SELECT id FROM cursos WHERE codigo = %s) 
-        AND estado = 'ACTIVA'
+        # Calcular cupos ocupados basado en matrículas activas del periodo
+        clausula, params = self._periodo_clause(periodo_id)
+        query_ocupados = f"""
+        SELECT COUNT(*) FROM matriculas m
+        WHERE m.curso_id = %s AND m.estado = 'ACTIVA'{clausula}
         """
         try:
-            results = self._execute_query(query_ocupados, (curso.codigo,))
+            results = self._execute_query(query_ocupados, (row[0],) + params)
             if results:
                 curso._cupos_ocupados = results[0][0]
         except:
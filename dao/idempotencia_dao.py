@@ -0,0 +1,97 @@
+"""
+Autor: Sistema de Matrículas Universitarias
+Módulo: DAO Idempotencia
+Descripción: Acceso a datos para resultados de solicitudes idempotentes
+Paradigma: POO con herencia
+"""
+
+from typing import List, Optional, Tuple
+from dao.base_dao import BaseDAO
+
+class IdempotenciaDAO(BaseDAO):
+    """
+    Clase para acceso a datos de solicitudes idempotentes
+    Cada clave guarda el resultado (éxito, mensaje) de la primera ejecución
+    hasta su vencimiento; las claves vencidas se tratan como inexistentes
+    Las claves se crean con reserve y se eliminan con release o purge_expired;
+    las operaciones CRUD genéricas no aplican a esta tabla
+    """
+    
+    def create(self, entity) -> int:
+        """Las claves solo se crean con reserve"""
+        raise NotImplementedError("Use reserve para registrar una clave")
+    
+    def read(self, id: int):
+        """Las claves no tienen ID numérico; use find"""
+        return None
+    
+    def update(self, entity) -> bool:
+        """Los resultados solo se guardan con complete"""
+        return False
+    
+    def delete(self, id: int) -> bool:
+        """Las claves no tienen ID numérico; use release"""
+        return False
+    
+    def find_all(self) -> List:
+        """Las claves no se listan"""
+        return []
+    
+    def find(self, clave: str) -> Optional[Tuple[Optional[bool], str]]:
+        """
+        Busca el resultado vigente de una clave (lectura por clave primaria)
+        Retorna None si la clave no existe o venció
+        """
+        query = """
+        SELECT exito, mensaje FROM solicitudes_idempotentes
+        WHERE clave = %s AND expira > NOW()
+        """
+        results = self._execute_query(query, (clave,))
+        if not results:
+            return None
+        exito, mensaje = results[0]
+        return (None if exito is None else bool(exito)), mensaje or ""
+    
+    def reserve(self, clave: str, ttl_segundos: int) -> Optional[Tuple[Optional[bool], str]]:
+        """
+        Reserva una clave para ejecutar su operación
+        Retorna None si la reserva se obtuvo y la operación debe ejecutarse;
+        si no, el resultado guardado (éxito None = otra ejecución en curso)
+        """
+        guardado = self.find(clave)
+        if guardado is not None:
+            return guardado
+        
+        # Una clave vencida se reutiliza; las asignaciones se evalúan en orden,
+        # por eso expira se actualiza al final
+        query = """
+        INSERT INTO solicitudes_idempotentes (clave, expira)
+        VALUES (%s, NOW() + INTERVAL %s SECOND)
+        ON DUPLICATE KEY UPDATE
+            exito = IF(expira <= NOW(), NULL, exito),
+            mensaje = IF(expira <= NOW(), NULL, mensaje),
+            expira = IF(expira <= NOW(), VALUES(expira), expira)
+        """
+        # 1 = insertada, 2 = clave vencida reutilizada, 0 = otra solicitud la tomó
+        if self._execute_update(query, (clave, ttl_segundos)) > 0:
+            return None
+        return self.find(clave) or (None, "")
+    
+    def complete(self, clave: str, exito: bool, mensaje: str, ttl_segundos: int) -> bool:
+        """Guarda el resultado de la operación y extiende la vigencia de la clave"""
+        query = """
+        UPDATE solicitudes_idempotentes
+        SET exito = %s, mensaje = %s, expira = NOW() + INTERVAL %s SECOND
+        WHERE clave = %s
+        """
+        return self._execute_update(query, (exito, mensaje[:500], ttl_segundos, clave)) > 0
+    
+    def release(self, clave: str) -> bool:
+        """Libera una reserva cuya operación no terminó"""
+        query = "DELETE FROM solicitudes_idempotentes WHERE clave = %s AND exito IS NULL"
+        return self._execute_update(query, (clave,)) > 0
+    
+    def purge_expired(self, batch_size: int = 1000) -> int:
+        """Elimina un lote de claves vencidas"""
+        query = "DELETE FROM solicitudes_idempotentes WHERE expira <= NOW() LIMIT %s"
+        return self._execute_update(query, (batch_size,))
@@ -0,0 +1,158 @@
+"""
+Autor: Sistema de Matrículas Universitarias
+Módulo: DAO Lista de Espera
+Descripción: Acceso a datos para listas de espera de cursos
+Paradigma: POO con herencia
+"""
+
+from typing import List, Optional
+from dao.base_dao import BaseDAO
+from models.lista_espera import EntradaListaEspera
+
+class ListaEsperaDAO(BaseDAO):
+    """
+    Clase para acceso a datos de listas de espera
+    El orden de llegada lo da el ID autoincremental de cada entrada
+    La promoción a matrícula la realiza MatriculaDAO dentro de sus transacciones
+    """
+    
+    def create(self, entrada: EntradaListaEspera) -> int:
+        """Agrega una entrada a la lista de espera (idempotente)"""
+        query = """
+        INSERT INTO lista_espera (estudiante_id, curso_id, periodo_id)
+        SELECT e.id, c.id, %s FROM estudiantes e, cursos c
+        WHERE e.codigo = %s AND c.codigo = %s
+        AND NOT EXISTS (
+            SELECT 1 FROM lista_espera w
+            WHERE w.estudiante_id = e.id AND w.curso_id = c.id AND w.periodo_id <=> %s
+        )
+        """
+        params = (entrada.periodo_id, entrada.estudiante_codigo, entrada.curso_codigo, entrada.periodo_id)
+        
+        entrada_id = self._execute_insert_with_id(query, params)
+        entrada.id = entrada_id
+        return entrada_id
+    
+    def enqueue(self, estudiante_id: int, curso_id: int, periodo_id: Optional[int] = None) -> int:
+        """
+        Agrega un estudiante a la lista de espera de un curso
+        Si ya estaba en espera conserva su lugar
+        Retorna su posición en la cola
+        """
+        # El índice único no distingue periodos NULL, por eso se verifica con <=>
+        query = """
+        INSERT INTO lista_espera (estudiante_id, curso_id, periodo_id)
+        SELECT %s, %s, %s FROM DUAL
+        WHERE NOT EXISTS (
+            SELECT 1 FROM lista_espera w
+            WHERE w.estudiante_id = %s AND w.curso_id = %s AND w.periodo_id <=> %s
+        )
+        """
+        params = (estudiante_id, curso_id, periodo_id)
+        self._execute_update(query, params * 2)
+        
+        query = """
+        SELECT COUNT(*) FROM lista_espera w
+        JOIN lista_espera propia ON propia.curso_id = w.curso_id
+             AND propia.periodo_id <=> w.periodo_id AND w.id <= propia.id
+        WHERE propia.estudiante_id = %s AND propia.curso_id = %s AND propia.periodo_id <=> %s
+        """
+        results = self._execute_query(query, (estudiante_id, curso_id, periodo_id))
+        return results[0][0] if results else 0
+    
+    def get_position(self, estudiante_codigo: str, curso_codigo: str,
+                     periodo_id: Optional[int] = None) -> Optional[int]:
+        """
+        Retorna la posición de un estudiante en la lista de espera de un curso
+        None si el estudiante no está en espera
+        """
+        query = """
+        SELECT COUNT(w.id) FROM lista_espera propia
+        JOIN estudiantes e ON propia.estudiante_id = e.id
+        JOIN cursos c ON propia.curso_id = c.id
+        JOIN lista_espera w ON w.curso_id = propia.curso_id
+             AND w.periodo_id <=> propia.periodo_id AND w.id <= propia.id
+        WHERE e.codigo = %s AND c.codigo = %s AND propia.periodo_id <=> %s
+        """
+        results = self._execute_query(query, (estudiante_codigo.upper(), curso_codigo.upper(), periodo_id))
+        posicion = results[0][0] if results else 0
+        return posicion or None
+    
+    def read(self, id: int) -> Optional[EntradaListaEspera]:
+        """Lee una entrada de lista de espera por ID"""
+        query = """
+        SELECT w.id, e.codigo, c.codigo, w.periodo_id, w.fecha_solicitud
+        FROM lista_espera w
+        JOIN estudiantes e ON w.estudiante_id = e.id
+        JOIN cursos c ON w.curso_id = c.id
+        WHERE w.id = %s
+        """
+        results = self._execute_query(query, (id,))
+        
+        if results:
+            return self._row_to_entrada(results[0])
+        return None
+    
+    def update(self, entrada: EntradaListaEspera) -> bool:
+        """Las entradas no se modifican: solo se agregan, promueven o retiran"""
+        return False
+    
+    def delete(self, id: int) -> bool:
+        """Elimina una entrada de lista de espera por ID"""
+        query = "DELETE FROM lista_espera WHERE id = %s"
+        affected_rows = self._execute_update(query, (id,))
+        return affected_rows > 0
+    
+    def remove(self, estudiante_codigo: str, curso_codigo: str, periodo_id: Optional[int] = None) -> bool:
+        """Retira a un estudiante de la lista de espera de un curso"""
+        query = """
+        DELETE w FROM lista_espera w
+        JOIN estudiantes e ON w.estudiante_id = e.id
+        JOIN cursos c ON w.curso_id = c.id
+        WHERE e.codigo = %s AND c.codigo = %s AND w.periodo_id <=> %s
+        """
+        affected_rows = self._execute_update(query, (estudiante_codigo.upper(), curso_codigo.upper(), periodo_id))
+        return affected_rows > 0
+    
+    def find_all(self) -> List[EntradaListaEspera]:
+        """Obtiene todas las entradas en orden de llegada"""
+        query = """
+        SELECT w.id, e.codigo, c.codigo, w.periodo_id, w.fecha_solicitud
+        FROM lista_espera w
+        JOIN estudiantes e ON w.estudiante_id = e.id
+        JOIN cursos c ON w.curso_id = c.id
+        ORDER BY w.id
+        """
+        results = self._execute_query(query)
+        
+        return list(map(self._row_to_entrada, results))
+    
+    def find_by_curso(self, curso_codigo: str, periodo_id: Optional[int] = None) -> List[EntradaListaEspera]:
+        """Obtiene la lista de espera de un curso con la posición de cada estudiante"""
+        query = """
+        SELECT w.id, e.codigo, c.codigo, w.periodo_id, w.fecha_solicitud
+        FROM lista_espera w
+        JOIN estudiantes e ON w.estudiante_id = e.id
+        JOIN cursos c ON w.curso_id = c.id
+        WHERE c.codigo = %s AND w.periodo_id <=> %s
+        ORDER BY w.id
+        """
+        results = self._execute_query(query, (curso_codigo.upper(), periodo_id))
+        
+        return [self._row_to_entrada(row, posicion) for posicion, row in enumerate(results, start=1)]
+    
+    def _row_to_entrada(self, row: tuple, posicion: Optional[int] = None) -> EntradaListaEspera:
+        """
+        Convierte una fila de la base de datos a objeto EntradaListaEspera
+        """
+        # row = (id, estudiante_codigo, curso_codigo, periodo_id, fecha_solicitud)
+        entrada = EntradaListaEspera(
+            estudiante_codigo=row[1],
+            curso_codigo=row[2],
+            periodo_id=row[3],
+            posicion=posicion
+        )
+        entrada.id = row[0]
+        entrada._fecha_solicitud = row[4]
+        
+        return entrada
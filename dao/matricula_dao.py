@@ -5,9 +5,11 @@ Descripción: Acceso a datos para matrículas
 Paradigma: POO con herencia
 """
 
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Dict, Iterator
+from datetime import datetime
 from dao.base_dao import BaseDAO
-from models.matricula import Matricula, EstadoMatricula
+from models.matricula import Matricula, EstadoMatricula, estados_origen
+from models.horario import mascara_horario, combinar_mascaras
 
 class MatriculaDAO(BaseDAO):
     """
@@ -24,13 +26,7 @@ class MatriculaDAO(BaseDAO):
         if not estudiante_id or not curso_id:
             raise ValueError("Estudiante o curso no encontrado")
         
-        query = """
-        INSERT INTO matriculas (estudiante_id, curso_id, estado)
-        VALUES (%s, %s, %s)
-        """
-        params = (estudiante_id, curso_id, matricula.estado.value)
-        
-        matricula_id = self._execute_insert_with_id(query, params)
+        matricula_id = self.create_for_ids(estudiante_id, curso_id, matricula.periodo_id, matricula.estado)
         matricula.id = matricula_id
         return matricula_id
     
@@ -38,7 +34,7 @@ class MatriculaDAO(BaseDAO):
         """Lee una matrícula por ID"""
         query = """
         SELECT m.id, e.codigo as estudiante_codigo, c.codigo as curso_codigo, 
-               m.fecha_matricula, m.estado
+               m.fecha_matricula, m.estado, m.periodo_id
         FROM matriculas m
         JOIN estudiantes e ON m.estudiante_id = e.id
         JOIN cursos c ON m.curso_id = c.id
@@ -55,24 +51,43 @@ class MatriculaDAO(BaseDAO):
         if not matricula.id:
             return False
         
-        query = "UPDATE matriculas SET estado = %s WHERE id = %s"
-        params = (matricula.estado.value, matricula.id)
+        with self._transaction() as cursor:
+            cursor.execute(
+                "SELECT estudiante_id, curso_id, estado FROM matriculas WHERE id = %s FOR UPDATE",
+                (matricula.id,)
+            )
+            row = cursor.fetchone()
+            if not row:
+                return False
+            
+            cursor.execute("UPDATE matriculas SET estado = %s WHERE id = %s",
+                           (matricula.estado.value, matricula.id))
+            self._apply_load_delta(cursor, row[0], row[1], row[2], matricula.estado.value)
         
-        affected_rows = self._execute_update(query, params)
-        return affected_rows > 0
+        return True
     
     def delete(self, id: int) -> bool:
         """Elimina una matrícula por ID"""
-        query = "DELETE FROM matriculas WHERE id = %s"
-        affected_rows = self._execute_update(query, (id,))
-        return affected_rows > 0
+        with self._transaction() as cursor:
+            cursor.execute(
+                "SELECT estudiante_id, curso_id, estado FROM matriculas WHERE id = %s FOR UPDATE", (id,)
+            )
+            row = cursor.fetchone()
+            if not row:
+                return False
+            
+            cursor.execute("DELETE FROM matriculas WHERE id = %s", (id,))
+            self._apply_load_delta(cursor, row[0], row[1], row[2], None)
+        
+        return True
     
-    def find_all(self) -> List[Matricula]:
+    def find_all(self, incluir_archivo: bool = True) -> List[Matricula]:
         """Obtiene todas las matrículas"""
-        query = """
+        fuente, _ = self._source(incluir_archivo)
+        query = f"""
         SELECT m.id, e.codigo as estudiante_codigo, c.codigo as curso_codigo, 
-               m.fecha_matricula, m.estado
-        FROM matriculas m
+               m.fecha_matricula, m.estado, m.periodo_id
+        FROM {fuente} m
         JOIN estudiantes e ON m.estudiante_id = e.id
         JOIN cursos c ON m.curso_id = c.id
         ORDER BY m.fecha_matricula DESC
@@ -81,92 +96,919 @@ class MatriculaDAO(BaseDAO):
         
         return list(map(self._row_to_matricula, results))
     
-    def find_by_estudiante(self, estudiante_codigo: str) -> List[Matricula]:
+    def find_by_estudiante(self, estudiante_codigo: str, incluir_archivo: bool = True) -> List[Matricula]:
         """Busca matrículas de un estudiante específico"""
-        query = """
+        fuente, params = self._source(incluir_archivo, self.FILTRO_ESTUDIANTE, (estudiante_codigo,))
+        query = f"""
         SELECT m.id, e.codigo as estudiante_codigo, c.codigo as curso_codigo, 
-               m.fecha_matricula, m.estado
-        FROM matriculas m
+               m.fecha_matricula, m.estado, m.periodo_id
+        FROM {fuente} m
         JOIN estudiantes e ON m.estudiante_id = e.id
         JOIN cursos c ON m.curso_id = c.id
-        WHERE e.codigo = %s
         ORDER BY m.fecha_matricula DESC
         """
-        results = self._execute_query(query, (estudiante_codigo,))
+        results = self._execute_query(query, params)
         
         return list(map(self._row_to_matricula, results))
     
-    def find_by_curso(self, curso_codigo: str) -> List[Matricula]:
+    def find_by_curso(self, curso_codigo: str, incluir_archivo: bool = True) -> List[Matricula]:
         """Busca matrículas de un curso específico"""
-        query = """
+        fuente, params = self._source(incluir_archivo, self.FILTRO_CURSO, (curso_codigo,))
+        query = f"""
         SELECT m.id, e.codigo as estudiante_codigo, c.codigo as curso_codigo, 
-               m.fecha_matricula, m.estado
-        FROM matriculas m
+               m.fecha_matricula, m.estado, m.periodo_id
+        FROM {fuente} m
         JOIN estudiantes e ON m.estudiante_id = e.id
         JOIN cursos c ON m.curso_id = c.id
-        WHERE c.codigo = %s
         ORDER BY m.fecha_matricula DESC
         """
-        results = self._execute_query(query, (curso_codigo,))
+        results = self._execute_query(query, params)
         
         return list(map(self._row_to_matricula, results))
     
-    def find_active_matriculas(self) -> List[Matricula]:
-        """Busca todas las matrículas activas"""
-        query = """
-        SELECT m.id, e.codigo as estudiante_codigo, c.codigo as curso_codigo, 
+    # Columnas de la vista de matrículas de un estudiante, en el orden de la consulta
+    STUDENT_VIEW_COLUMNS = (
+        'matricula_id', 'curso_codigo', 'curso_nombre', 'creditos',
+        'profesor', 'horario', 'fecha_matricula', 'estado'
+    )
+    
+    def get_student_enrollments_view(self, estudiante_codigo: str,
+                                     incluir_archivo: bool = True) -> List[dict]:
+        """
+        Obtiene las matrículas de un estudiante junto con los datos del curso
+        Una sola consulta con JOIN, sin cargar cada curso por separado
+        """
+        fuente, params = self._source(incluir_archivo, self.FILTRO_ESTUDIANTE, (estudiante_codigo,))
+        query = f"""
+        SELECT m.id, c.codigo, c.nombre, c.creditos,
+               COALESCE(c.profesor, ''), COALESCE(c.horario, ''),
                m.fecha_matricula, m.estado
+        FROM {fuente} m
+        JOIN cursos c ON m.curso_id = c.id
+        ORDER BY m.fecha_matricula DESC
+        """
+        results = self._execute_query(query, params)
+        
+        return [dict(zip(self.STUDENT_VIEW_COLUMNS, row)) for row in results]
+    
+    # Columnas de la lista de estudiantes de un curso, en el orden de la consulta
+    ROSTER_COLUMNS = (
+        'estudiante_codigo', 'estudiante_nombre', 'carrera', 'email', 'fecha_matricula'
+    )
+    
+    def get_course_roster(self, curso_codigo: str, periodo_id: Optional[int] = None) -> List[dict]:
+        """
+        Obtiene los estudiantes con matrícula activa en un curso
+        El filtro de estado y los datos del estudiante se resuelven en SQL
+        """
+        query, params = self._roster_query(curso_codigo, periodo_id)
+        results = self._execute_query(query, params)
+        
+        return [dict(zip(self.ROSTER_COLUMNS, row)) for row in results]
+    
+    def iter_course_roster(self, curso_codigo: str, periodo_id: Optional[int] = None,
+                           batch_size: int = 500) -> Iterator[dict]:
+        """
+        Variante en streaming de get_course_roster
+        Útil para exportar listas grandes sin materializarlas
+        """
+        query, params = self._roster_query(curso_codigo, periodo_id)
+        
+        return (dict(zip(self.ROSTER_COLUMNS, row)) for row in self._iter_query(query, params, batch_size))
+    
+    def _roster_query(self, curso_codigo: str, periodo_id: Optional[int]) -> Tuple[str, tuple]:
+        """Construye la consulta de la lista de estudiantes de un curso"""
+        clausula, params_periodo = self._periodo_clause(periodo_id)
+        query = f"""
+        SELECT e.codigo, CONCAT(e.nombre, ' ', e.apellido), e.carrera, e.email, m.fecha_matricula
+        FROM matriculas m
+        JOIN cursos c ON m.curso_id = c.id
+        JOIN estudiantes e ON m.estudiante_id = e.id
+        WHERE c.codigo = %s AND m.estado = 'ACTIVA'{clausula}
+        ORDER BY m.fecha_matricula DESC
+        """
+        return query, (curso_codigo,) + params_periodo
+    
+    def find_active_matriculas(self, periodo_id: Optional[int] = None) -> List[Matricula]:
+        """Busca todas las matrículas activas, opcionalmente de un periodo"""
+        clausula, params = self._periodo_clause(periodo_id)
+        query = f"""
+        SELECT m.id, e.codigo as estudiante_codigo, c.codigo as curso_codigo, 
+               m.fecha_matricula, m.estado, m.periodo_id
         FROM matriculas m
         JOIN estudiantes e ON m.estudiante_id = e.id
         JOIN cursos c ON m.curso_id = c.id
-        WHERE m.estado = 'ACTIVA'
+        WHERE m.estado = 'ACTIVA'{clausula}
         ORDER BY m.fecha_matricula DESC
         """
-        results = self._execute_query(query)
+        results = self._execute_query(query, params)
+        
+        return list(map(self._row_to_matricula, results))
+    
+    def find_between(self, desde: datetime, hasta: datetime, estado: EstadoMatricula = None,
+                     curso: str = None, carrera: str = None,
+                     incluir_archivo: bool = True) -> List[Matricula]:
+        """
+        Busca matrículas registradas en el intervalo [desde, hasta)
+        Usa el índice (fecha_matricula, estado) para recorrer solo la ventana
+        """
+        query, params = self._between_query(desde, hasta, estado, curso, carrera, incluir_archivo)
+        results = self._execute_query(query, params)
         
         return list(map(self._row_to_matricula, results))
     
-    def exists_matricula(self, estudiante_codigo: str, curso_codigo: str, estado: EstadoMatricula = None) -> bool:
+    def iter_between(self, desde: datetime, hasta: datetime, estado: EstadoMatricula = None,
+                     curso: str = None, carrera: str = None,
+                     incluir_archivo: bool = True, batch_size: int = 500) -> Iterator[Matricula]:
+        """
+        Variante en streaming de find_between
+        Entrega las matrículas por lotes sin materializar toda la ventana
+        """
+        query, params = self._between_query(desde, hasta, estado, curso, carrera, incluir_archivo)
+        
+        return map(self._row_to_matricula, self._iter_query(query, params, batch_size))
+    
+    def _between_query(self, desde: datetime, hasta: datetime, estado: EstadoMatricula,
+                       curso: str, carrera: str, incluir_archivo: bool) -> Tuple[str, tuple]:
+        """Construye la consulta por rango de fechas con filtros opcionales"""
+        # Todos los filtros se aplican dentro de cada rama de la fuente
+        condiciones = ["m.fecha_matricula >= %s", "m.fecha_matricula < %s"]
+        params = [desde, hasta]
+        
+        if estado:
+            condiciones.append("m.estado = %s")
+            params.append(estado.value)
+        if curso:
+            condiciones.append(self.FILTRO_CURSO)
+            params.append(curso.upper())
+        if carrera:
+            condiciones.append("m.estudiante_id IN (SELECT id FROM estudiantes WHERE carrera = %s)")
+            params.append(carrera.upper())
+        
+        fuente, params = self._source(incluir_archivo, ' AND '.join(condiciones), tuple(params))
+        query = f"""
+        SELECT m.id, e.codigo as estudiante_codigo, c.codigo as curso_codigo, 
+               m.fecha_matricula, m.estado, m.periodo_id
+        FROM {fuente} m
+        JOIN estudiantes e ON m.estudiante_id = e.id
+        JOIN cursos c ON m.curso_id = c.id
+        ORDER BY m.fecha_matricula
+        """
+        return query, params
+    
+    def exists_matricula(self, estudiante_codigo: str, curso_codigo: str, estado: EstadoMatricula = None,
+                         periodo_id: Optional[int] = None) -> bool:
         """
         Verifica si existe una matrícula específica
         Predicado lógico para validación de reglas de negocio
         """
+        clausula, params_periodo = self._periodo_clause(periodo_id)
         if estado:
-            query = """
+            query = f"""
             SELECT COUNT(*) FROM matriculas m
             JOIN estudiantes e ON m.estudiante_id = e.id
             JOIN cursos c ON m.curso_id = c.id
-            WHERE e.codigo = %s AND c.codigo = %s AND m.estado = %s
+            WHERE e.codigo = %s AND c.codigo = %s AND m.estado = %s{clausula}
             """
-            params = (estudiante_codigo, curso_codigo, estado.value)
+            params = (estudiante_codigo, curso_codigo, estado.value) + params_periodo
         else:
-            query = """
+            query = f"""
             SELECT COUNT(*) FROM matriculas m
             JOIN estudiantes e ON m.estudiante_id = e.id
             JOIN cursos c ON m.curso_id = c.id
-            WHERE e.codigo = %s AND c.codigo = %s
+            WHERE e.codigo = %s AND c.codigo = %s{clausula}
             """
-            params = (estudiante_codigo, curso_codigo)
+            params = (estudiante_codigo, curso_codigo) + params_periodo
         
         results = self._execute_query(query, params)
         return results[0][0] > 0 if results else False
     
-    def count_active_matriculas_by_student(self, estudiante_codigo: str) -> int:
-        """Cuenta las matrículas activas de un estudiante"""
-        query = """
+    def get_student_course_state(self, estudiante_codigo: str,
+                                 periodo_id: Optional[int] = None) -> Optional[dict]:
+        """
+        Obtiene en una sola consulta la carrera de un estudiante, sus cursos
+        activos (del periodo) y sus cursos completados (incluye archivo)
+        Retorna None si el estudiante no existe
+        """
+        clausula, params_periodo = self._periodo_clause(periodo_id)
+        fuente, params = self._source(
+            True, f"{self.FILTRO_ESTUDIANTE} AND ((m.estado = 'ACTIVA'{clausula}) OR m.estado = 'COMPLETADA')",
+            (estudiante_codigo,) + params_periodo
+        )
+        query = f"""
+        SELECT e.carrera, c.codigo, m.estado
+        FROM estudiantes e
+        LEFT JOIN {fuente} m ON m.estudiante_id = e.id
+        LEFT JOIN cursos c ON m.curso_id = c.id
+        WHERE e.codigo = %s
+        """
+        results = self._execute_query(query, params + (estudiante_codigo,))
+        if not results:
+            return None
+        
+        estado = {'carrera': results[0][0], 'activos': set(), 'completados': set()}
+        for _, curso_codigo, estado_matricula in results:
+            if curso_codigo is None:
+                continue
+            clave = 'activos' if estado_matricula == EstadoMatricula.ACTIVA.value else 'completados'
+            estado[clave].add(curso_codigo)
+        
+        return estado
+    
+    def get_completed_courses(self, estudiante_codigo: str) -> set:
+        """
+        Obtiene los códigos de los cursos completados por un estudiante
+        Incluye las matrículas archivadas
+        """
+        fuente, params = self._source(True, f"{self.FILTRO_ESTUDIANTE} AND m.estado = 'COMPLETADA'",
+                                      (estudiante_codigo,))
+        query = f"""
+        SELECT DISTINCT c.codigo
+        FROM {fuente} m
+        JOIN cursos c ON m.curso_id = c.id
+        """
+        results = self._execute_query(query, params)
+        return {row[0] for row in results}
+    
+    def count_active_matriculas_by_student(self, estudiante_codigo: str, periodo_id: Optional[int] = None) -> int:
+        """
+        Cuenta las matrículas activas de un estudiante
+        Sin periodo se lee del resumen de carga (lectura por clave primaria)
+        """
+        if periodo_id is None:
+            return self.get_load_summary(estudiante_codigo)['cursos_activos']
+        
+        clausula, params_periodo = self._periodo_clause(periodo_id)
+        query = f"""
         SELECT COUNT(*) FROM matriculas m
         JOIN estudiantes e ON m.estudiante_id = e.id
-        WHERE e.codigo = %s AND m.estado = 'ACTIVA'
+        WHERE e.codigo = %s AND m.estado = 'ACTIVA'{clausula}
         """
-        results = self._execute_query(query, (estudiante_codigo,))
+        results = self._execute_query(query, (estudiante_codigo,) + params_periodo)
         return results[0][0] if results else 0
     
-    def get_enrollment_report(self) -> List[dict]:
+    def get_load_summary(self, estudiante_codigo: str) -> dict:
+        """
+        Obtiene el resumen de carga de un estudiante: cursos activos,
+        créditos activos y créditos completados
+        Un estudiante sin matrículas tiene carga cero
+        """
+        query = """
+        SELECT ce.cursos_activos, ce.creditos_activos, ce.creditos_completados
+        FROM estudiantes e
+        JOIN carga_estudiante ce ON ce.estudiante_id = e.id
+        WHERE e.codigo = %s
+        """
+        results = self._execute_query(query, (estudiante_codigo,))
+        row = results[0] if results else (0, 0, 0)
+        return {
+            'cursos_activos': row[0],
+            'creditos_activos': row[1],
+            'creditos_completados': row[2]
+        }
+    
+    def rebuild_load_summary(self) -> int:
+        """
+        Recalcula el resumen de carga de todos los estudiantes desde sus
+        matrículas (incluye archivo); corrige cualquier desviación
+        Retorna el número de filas afectadas
+        """
+        from config.database import CARGA_ESTUDIANTE_REBUILD
+        return self._execute_update(CARGA_ESTUDIANTE_REBUILD)
+    
+    def get_enrollment_eligibility(self, estudiante_codigo: str, curso_codigo: str,
+                                   periodo_id: Optional[int] = None) -> dict:
+        """
+        Obtiene en una sola consulta los datos escalares que necesitan los
+        predicados de matrícula: existencia del estudiante y del curso,
+        cupos, ocupación, matrícula activa previa y carga actual
+        Con periodo, ocupación y matrícula previa se calculan solo dentro de
+        ese periodo; la carga (cursos y créditos activos) se lee del resumen
+        Las listas (cursos completados y horarios activos) no se agregan aquí
+        con GROUP_CONCAT, que se trunca en group_concat_max_len: se obtienen
+        con get_completed_courses y get_active_schedules solo cuando hacen falta
+        """
+        clausula, params_periodo = self._periodo_clause(periodo_id)
+        query = f"""
+        SELECT 
+            e.id, e.nombre, e.apellido, e.carrera,
+            c.id, c.nombre, c.cupos_disponibles,
+            (SELECT COUNT(*) FROM matriculas m
+             WHERE m.curso_id = c.id AND m.estado = 'ACTIVA'{clausula}) as cupos_ocupados,
+            EXISTS(SELECT 1 FROM matriculas m
+                   WHERE m.estudiante_id = e.id AND m.curso_id = c.id
+                   AND m.estado = 'ACTIVA'{clausula}) as ya_matriculado,
+            COALESCE(ce.cursos_activos, 0) as matriculas_activas,
+            c.horario,
+            c.creditos,
+            COALESCE(ce.creditos_activos, 0) as creditos_activos
+        FROM (SELECT 1) base
+        LEFT JOIN estudiantes e ON e.codigo = %s
+        LEFT JOIN carga_estudiante ce ON ce.estudiante_id = e.id
+        LEFT JOIN cursos c ON c.codigo = %s
+        """
+        params = params_periodo * 2 + (estudiante_codigo, curso_codigo)
+        results = self._execute_query(query, params)
+        row = results[0]
+        
+        return {
+            'estudiante_existe': row[0] is not None,
+            'estudiante_id': row[0],
+            'estudiante_nombre': row[1],
+            'estudiante_apellido': row[2],
+            'carrera': row[3],
+            'curso_existe': row[4] is not None,
+            'curso_id': row[4],
+            'curso_nombre': row[5],
+            'cupos_totales': row[6] or 0,
+            'cupos_ocupados': row[7] or 0,
+            'ya_matriculado': bool(row[8]),
+            'matriculas_activas': row[9] or 0,
+            'horario': row[10] or '',
+            'creditos': row[11] or 0,
+            'creditos_activos': row[12] or 0
+        }
+    
+    def get_active_schedules(self, estudiante_id: int, periodo_id: Optional[int] = None) -> List[str]:
+        """Obtiene los horarios de los cursos activos de un estudiante, opcionalmente de un periodo"""
+        clausula, params_periodo = self._periodo_clause(periodo_id)
+        query = f"""
+        SELECT c.horario FROM matriculas m
+        JOIN cursos c ON m.curso_id = c.id
+        WHERE m.estudiante_id = %s AND m.estado = 'ACTIVA'{clausula}
+        """
+        results = self._execute_query(query, (estudiante_id,) + params_periodo)
+        return [row[0] for row in results if row[0]]
+    
+    def create_for_ids(self, estudiante_id: int, curso_id: int, periodo_id: Optional[int] = None,
+                       estado: EstadoMatricula = EstadoMatricula.ACTIVA) -> int:
+        """
+        Crea una matrícula a partir de IDs ya resueltos
+        Evita las búsquedas de ID que realiza create()
+        """
+        with self._transaction() as cursor:
+            cursor.execute("""
+                INSERT INTO matriculas (estudiante_id, curso_id, periodo_id, estado)
+                VALUES (%s, %s, %s, %s)
+            """, (estudiante_id, curso_id, periodo_id, estado.value))
+            matricula_id = cursor.lastrowid
+            self._apply_load_delta(cursor, estudiante_id, curso_id, None, estado.value)
+        
+        return matricula_id
+    
+    def _apply_load_delta(self, cursor, estudiante_id: int, curso_id: int,
+                          desde: Optional[str], hacia: Optional[str], veces: int = 1):
+        """
+        Ajusta el resumen de carga del estudiante por el cambio de estado de
+        una matrícula (None indica que la matrícula no existe antes o después)
+        Debe ejecutarse en la misma transacción que el cambio de la matrícula
+        """
+        params = self._load_delta_params(estudiante_id, curso_id, desde, hacia, veces)
+        if params:
+            cursor.execute(self.LOAD_DELTA_QUERY, params)
+    
+    def _load_delta_params(self, estudiante_id: int, curso_id: int, desde: Optional[str],
+                           hacia: Optional[str], veces: int = 1) -> Optional[tuple]:
+        """Parámetros de LOAD_DELTA_QUERY, o None si el cambio no altera la carga"""
+        activa = EstadoMatricula.ACTIVA.value
+        completada = EstadoMatricula.COMPLETADA.value
+        delta_activos = ((hacia == activa) - (desde == activa)) * veces
+        delta_completados = ((hacia == completada) - (desde == completada)) * veces
+        if not delta_activos and not delta_completados:
+            return None
+        return (estudiante_id, delta_activos, delta_activos, delta_completados, curso_id)
+    
+    # Suma un delta al resumen de carga; crea la fila si el estudiante no la tiene
+    # Parámetros: (estudiante_id, delta cursos, delta activos, delta completados, curso_id)
+    LOAD_DELTA_QUERY = """
+        INSERT INTO carga_estudiante (estudiante_id, cursos_activos, creditos_activos, creditos_completados)
+        SELECT %s, %s, %s * c.creditos, %s * c.creditos FROM cursos c WHERE c.id = %s
+        ON DUPLICATE KEY UPDATE
+            cursos_activos = cursos_activos + VALUES(cursos_activos),
+            creditos_activos = creditos_activos + VALUES(creditos_activos),
+            creditos_completados = creditos_completados + VALUES(creditos_completados)
+    """
+    
+    def _apply_load_deltas(self, cursor, deltas: List[tuple]):
+        """
+        Aplica varios deltas de LOAD_DELTA_QUERY (tuplas de _load_delta_params)
+        con una sola sentencia: las filas se unen con UNION ALL, se cruzan con
+        los créditos de cada curso y se suman por estudiante
+        Debe ejecutarse en la misma transacción que los cambios de las matrículas
+        """
+        if not deltas:
+            return
+        
+        # Alias en la primera fila: MariaDB no admite lista de columnas en la tabla derivada
+        filas = " UNION ALL ".join(["SELECT %s AS estudiante_id, %s AS curso_id, %s AS activos, %s AS completados"]
+                                   + ["SELECT %s, %s, %s, %s"] * (len(deltas) - 1))
+        params = tuple(valor for estudiante_id, delta_activos, _, delta_completados, curso_id in deltas
+                       for valor in (estudiante_id, curso_id, delta_activos, delta_completados))
+        cursor.execute(f"""
+            INSERT INTO carga_estudiante (estudiante_id, cursos_activos, creditos_activos, creditos_completados)
+            SELECT d.estudiante_id, SUM(d.activos), SUM(d.activos * c.creditos), SUM(d.completados * c.creditos)
+            FROM ({filas}) AS d
+            JOIN cursos c ON c.id = d.curso_id
+            GROUP BY d.estudiante_id
+            ON DUPLICATE KEY UPDATE
+                cursos_activos = cursos_activos + VALUES(cursos_activos),
+                creditos_activos = creditos_activos + VALUES(creditos_activos),
+                creditos_completados = creditos_completados + VALUES(creditos_completados)
+        """, params)
+    
+    def _check_load_limits(self, cursor, estudiante_id: int, creditos: int,
+                           limite_materias: Optional[int], limite_creditos: Optional[int]):
+        """
+        Verifica los límites de carga leyendo el resumen por clave primaria
+        La fila queda bloqueada hasta el fin de la transacción, de modo que dos
+        matrículas simultáneas del mismo estudiante no superen el límite
+        Lanza ValueError si la nueva matrícula excede algún límite
+        """
+        if limite_materias is None and limite_creditos is None:
+            return
+        
+        cursor.execute("INSERT IGNORE INTO carga_estudiante (estudiante_id) VALUES (%s)", (estudiante_id,))
+        cursor.execute("""
+            SELECT cursos_activos, creditos_activos FROM carga_estudiante
+            WHERE estudiante_id = %s FOR UPDATE
+        """, (estudiante_id,))
+        cursos_activos, creditos_activos = cursor.fetchone()
+        
+        if limite_materias is not None and cursos_activos >= limite_materias:
+            raise ValueError(f"El estudiante ha alcanzado el límite máximo de {limite_materias} materias activas")
+        if limite_creditos is not None and creditos_activos + creditos > limite_creditos:
+            raise ValueError(f"El estudiante superaría el límite de {limite_creditos} créditos activos")
+    
+    def _activate_enrollment(self, cursor, estudiante_id: int, curso_id: int,
+                             periodo_id: Optional[int]) -> Tuple[Optional[int], Optional[str]]:
+        """
+        Deja activa la matrícula de un estudiante en un curso y periodo
+        Solo puede haber una fila por (estudiante, curso, periodo) según la
+        clave única: si no existe se inserta y si estaba cancelada se
+        reactiva con fecha nueva; una matrícula activa o completada la impide
+        Debe ejecutarse dentro de una transacción abierta con _transaction()
+        Retorna (ID de la matrícula, None) o (None, estado que la impide)
+        """
+        cursor.execute("""
+            SELECT id, estado FROM matriculas
+            WHERE estudiante_id = %s AND curso_id = %s AND periodo_clave = COALESCE(%s, 0)
+            FOR UPDATE
+        """, (estudiante_id, curso_id, periodo_id))
+        row = cursor.fetchone()
+        
+        if row is None:
+            cursor.execute("""
+                INSERT INTO matriculas (estudiante_id, curso_id, periodo_id, estado)
+                VALUES (%s, %s, %s, 'ACTIVA')
+            """, (estudiante_id, curso_id, periodo_id))
+            matricula_id = cursor.lastrowid
+        elif row[1] == EstadoMatricula.CANCELADA.value:
+            matricula_id = row[0]
+            cursor.execute("""
+                UPDATE matriculas SET estado = 'ACTIVA', fecha_matricula = CURRENT_TIMESTAMP
+                WHERE id = %s
+            """, (matricula_id,))
+        else:
+            return None, row[1]
+        
+        self._apply_load_delta(cursor, estudiante_id, curso_id, row[1] if row else None,
+                               EstadoMatricula.ACTIVA.value)
+        return matricula_id, None
+    
+    def allocate_seat(self, estudiante_id: int, curso_id: int,
+                      periodo_id: Optional[int] = None,
+                      limite_materias: Optional[int] = None,
+                      limite_creditos: Optional[int] = None) -> Optional[int]:
+        """
+        Reserva un cupo y crea la matrícula en una transacción corta
+        La fila del curso se bloquea (SELECT ... FOR UPDATE) para que la
+        verificación de cupos y el INSERT no se intercalen con otra matrícula
+        Los límites de carga se verifican contra el resumen del estudiante,
+        que se actualiza en la misma transacción
+        Una matrícula cancelada del mismo periodo se reactiva en lugar de duplicarse
+        Retorna el ID de la matrícula o None si el curso ya no tiene cupos
+        Lanza ValueError si la matrícula excede un límite de carga o si ya
+        existe una matrícula activa o completada del mismo periodo
+        """
+        matricula_id, _ = self.allocate_seat_or_enqueue(estudiante_id, curso_id, periodo_id,
+                                                        limite_materias, limite_creditos,
+                                                        lista_espera=False)
+        return matricula_id
+    
+    def allocate_seat_or_enqueue(self, estudiante_id: int, curso_id: int,
+                                 periodo_id: Optional[int] = None,
+                                 limite_materias: Optional[int] = None,
+                                 limite_creditos: Optional[int] = None,
+                                 lista_espera: bool = True) -> Tuple[Optional[int], Optional[int]]:
+        """
+        Igual que allocate_seat, pero si el curso está lleno y lista_espera es
+        verdadero agrega al estudiante a la lista de espera en la misma
+        transacción, con la fila del curso aún bloqueada: un cupo liberado
+        antes se asigna aquí y uno liberado después lo ve la promoción
+        Retorna (ID de la matrícula, None) o (None, posición en la lista de
+        espera); (None, None) si el curso no existe o está lleno sin lista
+        """
+        clausula, params_periodo = self._periodo_clause(periodo_id)
+        posicion = None
+        
+        with self._transaction() as cursor:
+            cursor.execute("SELECT cupos_disponibles, creditos FROM cursos WHERE id = %s FOR UPDATE", (curso_id,))
+            row = cursor.fetchone()
+            if not row:
+                return None, None
+            
+            cursor.execute(f"""
+                SELECT COUNT(*) FROM matriculas m
+                WHERE m.curso_id = %s AND m.estado = 'ACTIVA'{clausula}
+            """, (curso_id,) + params_periodo)
+            cupos_ocupados = cursor.fetchone()[0]
+            
+            if cupos_ocupados >= row[0]:
+                # Los límites de carga se verifican al promover desde la lista
+                if lista_espera:
+                    posicion = self._enqueue_waitlist(cursor, estudiante_id, curso_id, periodo_id)
+                return None, posicion
+            
+            self._check_load_limits(cursor, estudiante_id, row[1], limite_materias, limite_creditos)
+            
+            matricula_id, estado_previo = self._activate_enrollment(cursor, estudiante_id, curso_id, periodo_id)
+            if matricula_id is None:
+                if estado_previo == EstadoMatricula.ACTIVA.value:
+                    raise ValueError("El estudiante ya está matriculado en el curso")
+                raise ValueError("El estudiante ya completó el curso en este periodo")
+            
+            # Si el estudiante estaba en lista de espera, deja de estarlo
+            cursor.execute("""
+                DELETE FROM lista_espera
+                WHERE estudiante_id = %s AND curso_id = %s AND periodo_id <=> %s
+            """, (estudiante_id, curso_id, periodo_id))
+        
+        self.logger.info(f"Cupo asignado: matrícula {matricula_id} en curso {curso_id}")
+        return matricula_id, None
+    
+    def _enqueue_waitlist(self, cursor, estudiante_id: int, curso_id: int,
+                          periodo_id: Optional[int]) -> int:
+        """
+        Agrega al estudiante a la lista de espera si aún no está en ella
+        (conserva su lugar) y retorna su posición; mismas consultas que
+        ListaEsperaDAO.enqueue, pero en la transacción del llamador
+        """
+        params = (estudiante_id, curso_id, periodo_id)
+        cursor.execute("""
+            INSERT INTO lista_espera (estudiante_id, curso_id, periodo_id)
+            SELECT %s, %s, %s FROM DUAL
+            WHERE NOT EXISTS (
+                SELECT 1 FROM lista_espera w
+                WHERE w.estudiante_id = %s AND w.curso_id = %s AND w.periodo_id <=> %s
+            )
+        """, params * 2)
+        cursor.execute("""
+            SELECT COUNT(*) FROM lista_espera w
+            JOIN lista_espera propia ON propia.curso_id = w.curso_id
+                 AND propia.periodo_id <=> w.periodo_id AND w.id <= propia.id
+            WHERE propia.estudiante_id = %s AND propia.curso_id = %s AND propia.periodo_id <=> %s
+        """, params)
+        row = cursor.fetchone()
+        return row[0] if row else 0
+    
+    def update_course_capacity(self, curso_id: int, cupos: int, periodo_id: Optional[int] = None,
+                               limite_materias: Optional[int] = None,
+                               limite_creditos: Optional[int] = None) -> List[int]:
+        """
+        Actualiza los cupos de un curso y, si quedan cupos libres, promueve
+        estudiantes de la lista de espera en la misma transacción
+        Retorna los códigos de los estudiantes promovidos
+        """
+        with self._transaction() as cursor:
+            cursor.execute("SELECT id FROM cursos WHERE id = %s FOR UPDATE", (curso_id,))
+            if not cursor.fetchone():
+                return []
+            
+            cursor.execute("UPDATE cursos SET cupos_disponibles = %s WHERE id = %s", (cupos, curso_id))
+            promovidos = self._promote_waitlist(cursor, curso_id, periodo_id,
+                                                limite_materias, limite_creditos)
+        
+        return promovidos
+    
+    def _promote_waitlist(self, cursor, curso_id: int, periodo_id: Optional[int] = None,
+                          limite_materias: Optional[int] = None,
+                          limite_creditos: Optional[int] = None) -> List[str]:
+        """
+        Asigna los cupos libres de un curso a la lista de espera, en orden de llegada
+        Debe ejecutarse dentro de una transacción abierta con _transaction()
+        Se omiten los estudiantes que alcanzaron un límite de carga o cuyo
+        horario activo se cruza con el del curso (conservan su lugar) y se
+        retiran los que ya no pueden matricularse en el curso
+        Retorna los códigos de los estudiantes promovidos
+        """
+        clausula, params_periodo = self._periodo_clause(periodo_id)
+        
+        cursor.execute("SELECT cupos_disponibles, creditos, horario FROM cursos WHERE id = %s FOR UPDATE",
+                       (curso_id,))
+        row = cursor.fetchone()
+        if not row:
+            return []
+        cupos_totales, creditos, horario = row
+        
+        cursor.execute(f"""
+            SELECT COUNT(*) FROM matriculas m
+            WHERE m.curso_id = %s AND m.estado = 'ACTIVA'{clausula}
+        """, (curso_id,) + params_periodo)
+        cupos_libres = cupos_totales - cursor.fetchone()[0]
+        if cupos_libres <= 0:
+            return []
+        
+        # Horarios activos de los estudiantes en espera, en una sola consulta,
+        # con el mismo filtro de periodo que get_active_schedules
+        horarios_activos: Dict[int, List[str]] = {}
+        mascara_curso = mascara_horario(horario or '')
+        if mascara_curso:
+            cursor.execute(f"""
+                SELECT m.estudiante_id, c.horario FROM matriculas m
+                JOIN cursos c ON m.curso_id = c.id
+                WHERE m.estado = 'ACTIVA' AND m.curso_id <> %s{clausula}
+                AND m.estudiante_id IN (
+                    SELECT w.estudiante_id FROM lista_espera w
+                    WHERE w.curso_id = %s AND w.periodo_id <=> %s
+                )
+            """, (curso_id,) + params_periodo + (curso_id, periodo_id))
+            for estudiante_id, horario_activo in cursor.fetchall():
+                if horario_activo:
+                    horarios_activos.setdefault(estudiante_id, []).append(horario_activo)
+        
+        # ya_matriculado: una matrícula activa o una completada del mismo periodo
+        # (una cancelada del mismo periodo se reactiva con _activate_enrollment)
+        # La carga se lee del resumen y sus filas quedan bloqueadas con la lista
+        cursor.execute("""
+            SELECT w.id, w.estudiante_id, e.codigo,
+                COALESCE(ce.cursos_activos, 0) as activas,
+                COALESCE(ce.creditos_activos, 0) as creditos_activos,
+                EXISTS(SELECT 1 FROM matriculas m
+                       WHERE m.estudiante_id = w.estudiante_id AND m.curso_id = w.curso_id
+                       AND (m.estado = 'ACTIVA'
+                            OR (m.estado = 'COMPLETADA' AND m.periodo_clave = w.periodo_clave))) as ya_matriculado
+            FROM lista_espera w
+            JOIN estudiantes e ON w.estudiante_id = e.id
+            LEFT JOIN carga_estudiante ce ON ce.estudiante_id = w.estudiante_id
+            WHERE w.curso_id = %s AND w.periodo_id <=> %s
+            ORDER BY w.id
+            FOR UPDATE
+        """, (curso_id, periodo_id))
+        
+        promovidos = []
+        retirar = []
+        for (entrada_id, estudiante_id, estudiante_codigo, activas,
+             creditos_activos, ya_matriculado) in cursor.fetchall():
+            if cupos_libres <= 0:
+                break
+            if ya_matriculado:
+                retirar.append(entrada_id)
+                continue
+            if limite_materias is not None and activas >= limite_materias:
+                continue
+            if limite_creditos is not None and creditos_activos + creditos > limite_creditos:
+                continue
+            if mascara_curso & combinar_mascaras(horarios_activos.get(estudiante_id, ())):
+                continue
+            
+            retirar.append(entrada_id)
+            if self._activate_enrollment(cursor, estudiante_id, curso_id, periodo_id)[0] is None:
+                continue
+            promovidos.append(estudiante_codigo)
+            cupos_libres -= 1
+        
+        if retirar:
+            cursor.execute(
+                f"DELETE FROM lista_espera WHERE id IN ({self._placeholders(retirar)})", tuple(retirar)
+            )
+        
+        if promovidos:
+            self.logger.info(f"Lista de espera del curso {curso_id}: {len(promovidos)} estudiantes promovidos")
+        return promovidos
+    
+    def get_batch_enrollment_state(self, estudiante_codigos: set, curso_codigos: set,
+                                   periodo_id: Optional[int] = None) -> Dict[str, dict]:
+        """
+        Precarga el estado necesario para validar un lote de matrículas
+        Cuatro consultas en total, sin importar el tamaño del lote:
+        estudiantes, cursos con su ocupación, historial relevante y las
+        matrículas del periodo entre los estudiantes y cursos del lote
+        Incluye los horarios de los cursos del lote y de los cursos activos,
+        y los cursos y créditos activos de cada estudiante según su resumen
+        de carga (la misma fuente que usa la matrícula individual)
+        en_periodo asocia (estudiante, curso) al estado de su matrícula del
+        periodo, que por la clave única es a lo sumo una
+        """
+        estado = {'estudiantes': {}, 'cursos': {}, 'activas': {}, 'completados': {}, 'horarios': {},
+                  'en_periodo': {}}
+        if not estudiante_codigos or not curso_codigos:
+            return estado
+        
+        estudiante_codigos = tuple(estudiante_codigos)
+        curso_codigos = tuple(curso_codigos)
+        clausula, params_periodo = self._periodo_clause(periodo_id)
+        
+        query = f"""
+        SELECT e.id, e.codigo, e.nombre, e.apellido, e.carrera,
+               COALESCE(ce.cursos_activos, 0), COALESCE(ce.creditos_activos, 0)
+        FROM estudiantes e
+        LEFT JOIN carga_estudiante ce ON ce.estudiante_id = e.id
+        WHERE e.codigo IN ({self._placeholders(estudiante_codigos)})
+        """
+        for row in self._execute_query(query, estudiante_codigos):
+            estado['estudiantes'][row[1]] = {
+                'id': row[0], 'nombre': row[2], 'apellido': row[3], 'carrera': row[4],
+                'cursos_activos': row[5], 'creditos_activos': row[6]
+            }
+        
+        query = f"""
+        SELECT c.id, c.codigo, c.nombre, c.cupos_disponibles, COUNT(m.id), c.horario, c.creditos
+        FROM cursos c
+        LEFT JOIN matriculas m ON m.curso_id = c.id AND m.estado = 'ACTIVA'{clausula}
+        WHERE c.codigo IN ({self._placeholders(curso_codigos)})
+        GROUP BY c.id, c.codigo, c.nombre, c.cupos_disponibles, c.horario, c.creditos
+        """
+        for row in self._execute_query(query, params_periodo + curso_codigos):
+            estado['cursos'][row[1]] = {
+                'id': row[0], 'nombre': row[2], 'cupos_totales': row[3], 'cupos_ocupados': row[4],
+                'creditos': row[6]
+            }
+            estado['horarios'][row[1]] = row[5] or ''
+        
+        fuente, params = self._source(True, f"""
+            m.estudiante_id IN (SELECT id FROM estudiantes WHERE codigo IN ({self._placeholders(estudiante_codigos)}))
+            AND ((m.estado = 'ACTIVA'{clausula}) OR m.estado = 'COMPLETADA')""", estudiante_codigos + params_periodo)
+        query = f"""
+        SELECT e.codigo, c.codigo, m.estado, c.horario
+        FROM {fuente} m
+        JOIN estudiantes e ON m.estudiante_id = e.id
+        JOIN cursos c ON m.curso_id = c.id
+        """
+        for estudiante_codigo, curso_codigo, estado_matricula, horario in self._execute_query(query, params):
+            clave = 'activas' if estado_matricula == EstadoMatricula.ACTIVA.value else 'completados'
+            estado[clave].setdefault(estudiante_codigo, set()).add(curso_codigo)
+            if clave == 'activas':
+                estado['horarios'][curso_codigo] = horario or ''
+        
+        query = f"""
+        SELECT e.codigo, c.codigo, m.estado
+        FROM matriculas m
+        JOIN estudiantes e ON m.estudiante_id = e.id
+        JOIN cursos c ON m.curso_id = c.id
+        WHERE e.codigo IN ({self._placeholders(estudiante_codigos)})
+        AND c.codigo IN ({self._placeholders(curso_codigos)})
+        AND m.periodo_clave = COALESCE(%s, 0)
+        """
+        for estudiante_codigo, curso_codigo, estado_matricula in self._execute_query(
+                query, estudiante_codigos + curso_codigos + (periodo_id,)):
+            estado['en_periodo'][(estudiante_codigo, curso_codigo)] = estado_matricula
+        
+        return estado
+    
+    def allocate_seats_batch(self, solicitudes: List[Tuple[int, int]],
+                             periodo_id: Optional[int] = None,
+                             limite_materias: Optional[int] = None,
+                             limite_creditos: Optional[int] = None) -> List[Tuple[bool, Optional[str]]]:
+        """
+        Asigna cupos y crea un lote de matrículas en una sola transacción
+        Bloquea en el mismo orden que allocate_seat: los cursos (por ID), el
+        resumen de carga de los estudiantes (por ID) y sus matrículas del
+        periodo; con esos datos bajo bloqueo vuelve a verificar cupos, límites
+        de carga y matrícula previa, y atiende las solicitudes en orden
+        Una matrícula cancelada del mismo periodo se reactiva, igual que en
+        la matrícula individual, en lugar de chocar con la clave única
+        Retorna, por cada solicitud (estudiante_id, curso_id), (True, None) si
+        fue asignada, (False, None) si el curso no tenía cupos o (False, motivo)
+        """
+        if not solicitudes:
+            return []
+        
+        curso_ids = tuple(sorted({curso_id for _, curso_id in solicitudes}))
+        estudiante_ids = tuple(sorted({estudiante_id for estudiante_id, _ in solicitudes}))
+        clausula, params_periodo = self._periodo_clause(periodo_id)
+        
+        with self._transaction() as cursor:
+            cursor.execute(f"""
+                SELECT id, cupos_disponibles, creditos FROM cursos
+                WHERE id IN ({self._placeholders(curso_ids)})
+                ORDER BY id
+                FOR UPDATE
+            """, curso_ids)
+            cupos_libres = {}
+            creditos = {}
+            for curso_id, cupos, creditos_curso in cursor.fetchall():
+                cupos_libres[curso_id] = cupos
+                creditos[curso_id] = creditos_curso
+            
+            cursor.execute(f"""
+                SELECT m.curso_id, COUNT(*) FROM matriculas m
+                WHERE m.curso_id IN ({self._placeholders(curso_ids)})
+                AND m.estado = 'ACTIVA'{clausula}
+                GROUP BY m.curso_id
+            """, curso_ids + params_periodo)
+            for curso_id, ocupados in cursor.fetchall():
+                cupos_libres[curso_id] -= ocupados
+            
+            # Resumen de carga de cada estudiante, bloqueado como en _check_load_limits
+            cursor.execute(
+                f"INSERT IGNORE INTO carga_estudiante (estudiante_id) VALUES {', '.join(['(%s)'] * len(estudiante_ids))}",
+                estudiante_ids
+            )
+            cursor.execute(f"""
+                SELECT estudiante_id, cursos_activos, creditos_activos FROM carga_estudiante
+                WHERE estudiante_id IN ({self._placeholders(estudiante_ids)})
+                ORDER BY estudiante_id
+                FOR UPDATE
+            """, estudiante_ids)
+            carga = {fila[0]: list(fila[1:]) for fila in cursor.fetchall()}
+            
+            # Matrículas del periodo entre los estudiantes y cursos del lote
+            cursor.execute(f"""
+                SELECT estudiante_id, curso_id, id, estado FROM matriculas
+                WHERE estudiante_id IN ({self._placeholders(estudiante_ids)})
+                AND curso_id IN ({self._placeholders(curso_ids)})
+                AND periodo_clave = COALESCE(%s, 0)
+                FOR UPDATE
+            """, estudiante_ids + curso_ids + (periodo_id,))
+            existentes = {(fila[0], fila[1]): (fila[2], fila[3]) for fila in cursor.fetchall()}
+            
+            resultados = []
+            nuevas = []
+            reactivadas = []
+            activadas = []
+            for estudiante_id, curso_id in solicitudes:
+                previa = existentes.get((estudiante_id, curso_id))
+                cursos_activos, creditos_activos = carga[estudiante_id]
+                creditos_curso = creditos.get(curso_id, 0)
+                
+                if previa and previa[1] == EstadoMatricula.ACTIVA.value:
+                    resultados.append((False, "El estudiante ya está matriculado en el curso"))
+                elif previa and previa[1] == EstadoMatricula.COMPLETADA.value:
+                    resultados.append((False, "El estudiante ya completó el curso en este periodo"))
+                elif cupos_libres.get(curso_id, 0) <= 0:
+                    resultados.append((False, None))
+                elif limite_materias is not None and cursos_activos >= limite_materias:
+                    resultados.append((False, f"El estudiante ha alcanzado el límite máximo de {limite_materias} materias activas"))
+                elif limite_creditos is not None and creditos_activos + creditos_curso > limite_creditos:
+                    resultados.append((False, f"El estudiante superaría el límite de {limite_creditos} créditos activos"))
+                else:
+                    cupos_libres[curso_id] -= 1
+                    carga[estudiante_id] = [cursos_activos + 1, creditos_activos + creditos_curso]
+                    if previa:
+                        reactivadas.append(previa[0])
+                    else:
+                        nuevas.append((estudiante_id, curso_id, periodo_id))
+                    existentes[(estudiante_id, curso_id)] = (previa[0] if previa else None,
+                                                             EstadoMatricula.ACTIVA.value)
+                    activadas.append((estudiante_id, curso_id))
+                    resultados.append((True, None))
+            
+            if nuevas:
+                cursor.executemany("""
+                    INSERT INTO matriculas (estudiante_id, curso_id, periodo_id, estado)
+                    VALUES (%s, %s, %s, 'ACTIVA')
+                """, nuevas)
+            if reactivadas:
+                cursor.execute(f"""
+                    UPDATE matriculas SET estado = 'ACTIVA', fecha_matricula = CURRENT_TIMESTAMP
+                    WHERE id IN ({self._placeholders(reactivadas)})
+                """, tuple(reactivadas))
+            self._apply_load_deltas(cursor, [
+                (estudiante_id, 1, 1, 0, curso_id) for estudiante_id, curso_id in activadas
+            ])
+        
+        self.logger.info(f"Lote de cupos asignado: {len(activadas)} de {len(solicitudes)} solicitudes")
+        return resultados
+    
+    # Columnas del reporte de matrículas, en el orden de la consulta
+    REPORT_COLUMNS = (
+        'estudiante_codigo', 'estudiante_nombre', 'carrera', 'curso_codigo',
+        'curso_nombre', 'creditos', 'fecha_matricula', 'estado'
+    )
+    
+    def get_enrollment_report(self, incluir_archivo: bool = True) -> List[dict]:
         """
         Genera reporte completo de matrículas
         Uso de JOINs complejos y funciones de agregación
         """
-        query = """
+        results = self._execute_query(self._enrollment_report_query(incluir_archivo))
+        
+        # Convertir a lista de diccionarios para fácil manejo
+        return [dict(zip(self.REPORT_COLUMNS, row)) for row in results]
+    
+    def get_enrollment_report_columns(self, incluir_archivo: bool = True,
+                                      batch_size: int = 1000) -> Dict[str, list]:
+        """
+        Genera el reporte de matrículas en formato columnar
+        Las columnas se llenan directamente desde el cursor, por lotes,
+        sin construir una lista de filas ni un diccionario por fila
+        """
+        return self._query_columns(self._enrollment_report_query(incluir_archivo), None,
+                                   self.REPORT_COLUMNS, batch_size)
+    
+    def _enrollment_report_query(self, incluir_archivo: bool) -> str:
+        """Consulta base del reporte de matrículas"""
+        return f"""
         SELECT 
             e.codigo as estudiante_codigo,
             CONCAT(e.nombre, ' ', e.apellido) as estudiante_nombre,
@@ -176,50 +1018,88 @@ class MatriculaDAO(BaseDAO):
             c.creditos,
             m.fecha_matricula,
             m.estado
-        FROM matriculas m
+        FROM {self._source(incluir_archivo)[0]} m
         JOIN estudiantes e ON m.estudiante_id = e.id
         JOIN cursos c ON m.curso_id = c.id
         ORDER BY e.apellido, e.nombre, m.fecha_matricula
         """
-        results = self._execute_query(query)
+    
+    def get_report_aggregates(self, incluir_archivo: bool = True) -> dict:
+        """
+        Calcula los agregados del reporte de matrículas en la base de datos
+        Conteos por estado, por carrera (con ROLLUP para el total de
+        estudiantes distintos) y por curso, en tres consultas GROUP BY
+        """
+        # Un GROUP BY por tabla, sumados aquí, en lugar de unir ambas tablas
+        por_estado = {}
+        for tabla in (('matriculas', 'matriculas_archivo') if incluir_archivo else ('matriculas',)):
+            for estado, cantidad in self._execute_query(f"SELECT estado, COUNT(*) FROM {tabla} GROUP BY estado"):
+                por_estado[estado] = por_estado.get(estado, 0) + cantidad
         
-        # Convertir a lista de diccionarios para fácil manejo
-        report = []
-        for row in results:
-            report.append({
-                'estudiante_codigo': row[0],
-                'estudiante_nombre': row[1],
-                'carrera': row[2],
-                'curso_codigo': row[3],
-                'curso_nombre': row[4],
-                'creditos': row[5],
-                'fecha_matricula': row[6],
-                'estado': row[7]
-            })
-        
-        return report
-    
-    def get_statistics(self) -> dict:
+        # La fila de ROLLUP (carrera NULL) trae el total de estudiantes distintos
+        por_carrera = {}
+        estudiantes_activos = 0
+        for carrera, matriculas, estudiantes in self._execute_query("""
+            SELECT e.carrera, COUNT(*), COUNT(DISTINCT m.estudiante_id)
+            FROM matriculas m
+            JOIN estudiantes e ON m.estudiante_id = e.id
+            WHERE m.estado = 'ACTIVA'
+            GROUP BY e.carrera WITH ROLLUP
+        """):
+            if carrera is None:
+                estudiantes_activos = estudiantes
+            else:
+                por_carrera[carrera] = matriculas
+        
+        por_curso = dict(self._execute_query("""
+            SELECT c.codigo, COUNT(*)
+            FROM matriculas m
+            JOIN cursos c ON m.curso_id = c.id
+            WHERE m.estado = 'ACTIVA'
+            GROUP BY c.codigo
+        """))
+        
+        return {
+            'por_estado': por_estado,
+            'por_carrera': por_carrera,
+            'por_curso': por_curso,
+            'estudiantes_activos': estudiantes_activos
+        }
+    
+    def get_statistics(self, periodo_id: Optional[int] = None) -> dict:
         """
         Obtiene estadísticas generales de matrículas
         Uso de funciones de agregación y subconsultas
+        Con periodo, cada conteo usa los índices por periodo
         """
+        clausula, params_periodo = self._periodo_clause(periodo_id)
+        
+        # Las matrículas archivadas solo pueden estar canceladas o completadas
         queries = {
-            'total_matriculas': "SELECT COUNT(*) FROM matriculas",
-            'matriculas_activas': "SELECT COUNT(*) FROM matriculas WHERE estado = 'ACTIVA'",
-            'matriculas_canceladas': "SELECT COUNT(*) FROM matriculas WHERE estado = 'CANCELADA'",
-            'matriculas_completadas': "SELECT COUNT(*) FROM matriculas WHERE estado = 'COMPLETADA'",
-            'estudiantes_con_matriculas': """
-                SELECT COUNT(DISTINCT estudiante_id) FROM matriculas WHERE estado = 'ACTIVA'
+            'total_matriculas': f"""
+                SELECT (SELECT COUNT(*) FROM matriculas m WHERE 1 = 1{clausula})
+                     + (SELECT COUNT(*) FROM matriculas_archivo m WHERE 1 = 1{clausula})
+            """,
+            'matriculas_activas': f"SELECT COUNT(*) FROM matriculas m WHERE estado = 'ACTIVA'{clausula}",
+            'matriculas_canceladas': f"""
+                SELECT (SELECT COUNT(*) FROM matriculas m WHERE estado = 'CANCELADA'{clausula})
+                     + (SELECT COUNT(*) FROM matriculas_archivo m WHERE estado = 'CANCELADA'{clausula})
             """,
-            'cursos_con_matriculas': """
-                SELECT COUNT(DISTINCT curso_id) FROM matriculas WHERE estado = 'ACTIVA'
+            'matriculas_completadas': f"""
+                SELECT (SELECT COUNT(*) FROM matriculas m WHERE estado = 'COMPLETADA'{clausula})
+                     + (SELECT COUNT(*) FROM matriculas_archivo m WHERE estado = 'COMPLETADA'{clausula})
+            """,
+            'estudiantes_con_matriculas': f"""
+                SELECT COUNT(DISTINCT estudiante_id) FROM matriculas m WHERE estado = 'ACTIVA'{clausula}
+            """,
+            'cursos_con_matriculas': f"""
+                SELECT COUNT(DISTINCT curso_id) FROM matriculas m WHERE estado = 'ACTIVA'{clausula}
             """
         }
         
         stats = {}
         for key, query in queries.items():
-            results = self._execute_query(query)
+            results = self._execute_query(query, params_periodo * query.count('%s'))
             stats[key] = results[0][0] if results else 0
         
         # Calcular porcentajes
@@ -235,6 +1115,149 @@ class MatriculaDAO(BaseDAO):
         
         return stats
     
+    def archive_batch(self, hasta: Optional[datetime] = None, batch_size: int = 1000,
+                      periodo_id: Optional[int] = None) -> int:
+        """
+        Mueve un lote de matrículas finalizadas (canceladas o completadas)
+        a la tabla de archivo, filtradas por fecha límite, por periodo o ambas
+        Copia y borrado ocurren en la misma transacción
+        Retorna el número de matrículas archivadas
+        """
+        if hasta is None and periodo_id is None:
+            raise ValueError("Debe indicar una fecha límite o un periodo para archivar")
+        
+        condiciones = ["estado IN ('CANCELADA', 'COMPLETADA')"]
+        params = []
+        if hasta is not None:
+            condiciones.append("fecha_matricula < %s")
+            params.append(hasta)
+        if periodo_id is not None:
+            condiciones.append("periodo_id = %s")
+            params.append(periodo_id)
+        params.append(batch_size)
+        
+        with self._transaction() as cursor:
+            cursor.execute(f"""
+                SELECT id FROM matriculas
+                WHERE {' AND '.join(condiciones)}
+                ORDER BY id
+                LIMIT %s
+                FOR UPDATE
+            """, tuple(params))
+            ids = [row[0] for row in cursor.fetchall()]
+            
+            if not ids:
+                return 0
+            
+            placeholders = self._placeholders(ids)
+            cursor.execute(f"""
+                INSERT INTO matriculas_archivo (id, estudiante_id, curso_id, periodo_id, fecha_matricula, estado)
+                SELECT id, estudiante_id, curso_id, periodo_id, fecha_matricula, estado
+                FROM matriculas WHERE id IN ({placeholders})
+            """, tuple(ids))
+            cursor.execute(f"DELETE FROM matriculas WHERE id IN ({placeholders})", tuple(ids))
+        
+        self.logger.info(f"Lote archivado: {len(ids)} matrículas")
+        return len(ids)
+    
+    def transition_batch(self, nuevo_estado: EstadoMatricula, curso_codigo: Optional[str] = None,
+                         carrera: Optional[str] = None, periodo_id: Optional[int] = None,
+                         batch_size: int = 1000, despues_de_id: int = 0) -> Tuple[Dict[str, int], int]:
+        """
+        Cambia de estado un lote de matrículas con un UPDATE por conjunto
+        Solo se toman las matrículas cuyo estado admite la transición según
+        TRANSICIONES_VALIDAS, filtradas por curso, carrera y/o periodo, con
+        ID mayor que despues_de_id (recorrido por rangos de clave primaria)
+        Matrículas y resumen de carga se actualizan en la misma transacción
+        Retorna (matrículas cambiadas por estado de origen, último ID del lote)
+        """
+        if curso_codigo is None and carrera is None and periodo_id is None:
+            raise ValueError("Debe indicar un curso, una carrera o un periodo")
+        
+        origenes = tuple(estado.value for estado in estados_origen(nuevo_estado))
+        if not origenes:
+            return {}, despues_de_id
+        
+        # Los filtros por curso y carrera van en subconsultas: sin bloqueo de
+        # lectura, así el lote solo bloquea filas de matrículas
+        condiciones = [f"m.estado IN ({self._placeholders(origenes)})", "m.id > %s"]
+        params = list(origenes) + [despues_de_id]
+        if curso_codigo is not None:
+            condiciones.append("m.curso_id = (SELECT id FROM cursos WHERE codigo = %s)")
+            params.append(curso_codigo)
+        if carrera is not None:
+            condiciones.append("m.estudiante_id IN (SELECT id FROM estudiantes WHERE carrera = %s)")
+            params.append(carrera)
+        if periodo_id is not None:
+            condiciones.append("m.periodo_id = %s")
+            params.append(periodo_id)
+        params.append(batch_size)
+        
+        with self._transaction() as cursor:
+            cursor.execute(f"""
+                SELECT m.id, m.estudiante_id, m.curso_id, m.estado
+                FROM matriculas m
+                WHERE {' AND '.join(condiciones)}
+                ORDER BY m.id
+                LIMIT %s
+                FOR UPDATE
+            """, tuple(params))
+            filas = cursor.fetchall()
+            
+            if not filas:
+                return {}, despues_de_id
+            
+            ids = [fila[0] for fila in filas]
+            cursor.execute(f"""
+                UPDATE matriculas SET estado = %s
+                WHERE id IN ({self._placeholders(ids)})
+            """, (nuevo_estado.value,) + tuple(ids))
+            
+            # Un ajuste de carga por (estudiante, curso, estado de origen)
+            por_estado: Dict[str, int] = {}
+            grupos: Dict[Tuple[int, int, str], int] = {}
+            for _, estudiante_id, curso_id, estado in filas:
+                por_estado[estado] = por_estado.get(estado, 0) + 1
+                grupos[(estudiante_id, curso_id, estado)] = grupos.get((estudiante_id, curso_id, estado), 0) + 1
+            
+            deltas = [
+                params_delta for params_delta in (
+                    self._load_delta_params(estudiante_id, curso_id, estado, nuevo_estado.value, veces)
+                    for (estudiante_id, curso_id, estado), veces in grupos.items()
+                ) if params_delta
+            ]
+            self._apply_load_deltas(cursor, deltas)
+        
+        return por_estado, ids[-1]
+    
+    def _placeholders(self, valores) -> str:
+        """Genera los marcadores %s para una cláusula IN"""
+        return ', '.join(['%s'] * len(valores))
+    
+    # Filtros por código para _source: se resuelven a ID dentro de cada rama
+    FILTRO_ESTUDIANTE = "m.estudiante_id = (SELECT id FROM estudiantes WHERE codigo = %s)"
+    FILTRO_CURSO = "m.curso_id = (SELECT id FROM cursos WHERE codigo = %s)"
+    
+    def _source(self, incluir_archivo: bool, condicion: str = "", params: tuple = ()) -> Tuple[str, tuple]:
+        """
+        Retorna la fuente de datos para consultas de historial y sus parámetros
+        Con archivo, une la tabla activa y la de archivo con las mismas columnas
+        La condición (sobre el alias m) se aplica dentro de cada rama, de modo
+        que cada tabla usa sus índices y la unión no se materializa completa;
+        sus parámetros se repiten una vez por rama
+        """
+        if not incluir_archivo and not condicion:
+            return "matriculas", ()
+        
+        tablas = ('matriculas', 'matriculas_archivo') if incluir_archivo else ('matriculas',)
+        filtro = f" WHERE {condicion}" if condicion else ""
+        ramas = [
+            f"SELECT m.id, m.estudiante_id, m.curso_id, m.periodo_id, m.fecha_matricula, m.estado "
+            f"FROM {tabla} m{filtro}"
+            for tabla in tablas
+        ]
+        return f"({' UNION ALL '.join(ramas)})", params * len(tablas)
+    
     def _get_estudiante_id(self, codigo: str) -> Optional[int]:
         """Obtiene el ID de un estudiante por su código"""
         query = "SELECT id FROM estudiantes WHERE codigo = %s"
@@ -251,11 +1274,12 @@ class MatriculaDAO(BaseDAO):
         """
         Convierte una fila de la base de datos a objeto Matrícula
         """
-        # row = (id, estudiante_codigo, curso_codigo, fecha_matricula, estado)
+        # row = (id, estudiante_codigo, curso_codigo, fecha_matricula, estado, periodo_id)
         matricula = Matricula(
             estudiante_codigo=row[1],
             curso_codigo=row[2],
-            estado=EstadoMatricula(row[4])
+            estado=EstadoMatricula(row[4]),
+            periodo_id=row[5]
         )
         
         matricula.id = row[0]
@@ -263,18 +1287,114 @@ class MatriculaDAO(BaseDAO):
         
         return matricula
     
-    def cancel_matricula(self, estudiante_codigo: str, curso_codigo: str) -> bool:
+    def cancel_matricula(self, estudiante_codigo: str, curso_codigo: str,
+                         periodo_id: Optional[int] = None,
+                         limite_materias: Optional[int] = None,
+                         promovidos: Optional[List[str]] = None,
+                         dias_limite: Optional[int] = None,
+                         limite_creditos: Optional[int] = None) -> bool:
         """
-        Cancela una matrícula activa
-        Aplicación de reglas de negocio
+        Cancela una matrícula activa en una transacción: bloqueo del curso,
+        UPDATE condicional, ajuste del resumen de carga y promoción de la
+        lista de espera
+        Estado y ventana de días (si se indica dias_limite) forman parte del
+        WHERE del UPDATE: si no se cumple alguna regla no cambia ninguna fila
+        y se retorna False; el motivo se obtiene con find_cancellation_candidate
+        Si se pasa la lista promovidos, se agregan los códigos de los promovidos
         """
-        query = """
+        clausula, params_periodo = self._periodo_clause(periodo_id)
+        params_ventana = ()
+        if dias_limite is not None:
+            # Equivale a "días completos transcurridos <= dias_limite"
+            clausula += " AND m.fecha_matricula > NOW() - INTERVAL %s DAY"
+            params_ventana = (dias_limite + 1,)
+        query = f"""
         UPDATE matriculas m
+        SET m.estado = 'CANCELADA'
+        WHERE m.estudiante_id = %s AND m.curso_id = %s AND m.estado = 'ACTIVA'{clausula}
+        """
+        
+        with self._transaction() as cursor:
+            # Se bloquea primero el curso, en el mismo orden que allocate_seat;
+            # el ID del estudiante se resuelve en la misma lectura
+            cursor.execute("""
+                SELECT c.id, (SELECT e.id FROM estudiantes e WHERE e.codigo = %s)
+                FROM cursos c WHERE c.codigo = %s
+                FOR UPDATE
+            """, (estudiante_codigo, curso_codigo))
+            row = cursor.fetchone()
+            if not row or row[1] is None:
+                return False
+            curso_id, estudiante_id = row
+            
+            cursor.execute(query, (estudiante_id, curso_id) + params_periodo + params_ventana)
+            canceladas = cursor.rowcount
+            if canceladas == 0:
+                return False
+            
+            self._apply_load_delta(cursor, estudiante_id, curso_id, EstadoMatricula.ACTIVA.value,
+                                   EstadoMatricula.CANCELADA.value, veces=canceladas)
+            
+            promovidos_curso = self._promote_waitlist(cursor, curso_id, periodo_id,
+                                                      limite_materias, limite_creditos)
+        
+        if promovidos is not None:
+            promovidos.extend(promovidos_curso)
+        return True
+    
+    def find_cancellation_candidate(self, estudiante_codigo: str, curso_codigo: str,
+                                    periodo_id: Optional[int] = None,
+                                    dias_limite: Optional[int] = None) -> Optional[Tuple[Matricula, bool]]:
+        """
+        Obtiene la matrícula activa de un estudiante en un curso y si sigue
+        dentro de la ventana de cancelación, evaluada con el reloj de la base
+        de datos y la misma expresión que cancel_matricula
+        Se usa solo cuando una cancelación no cambió ninguna fila, para
+        explicar el motivo; retorna None si no hay matrícula activa
+        """
+        clausula, params_periodo = self._periodo_clause(periodo_id)
+        if dias_limite is None:
+            en_plazo, params_plazo = "TRUE", ()
+        else:
+            en_plazo, params_plazo = "m.fecha_matricula > NOW() - INTERVAL %s DAY", (dias_limite + 1,)
+        query = f"""
+        SELECT m.id, e.codigo, c.codigo, m.fecha_matricula, m.estado, m.periodo_id,
+               {en_plazo} as en_plazo
+        FROM matriculas m
         JOIN estudiantes e ON m.estudiante_id = e.id
         JOIN cursos c ON m.curso_id = c.id
-        SET m.estado = 'CANCELADA'
-        WHERE e.codigo = %s AND c.codigo = %s AND m.estado = 'ACTIVA'
+        WHERE e.codigo = %s AND c.codigo = %s AND m.estado = 'ACTIVA'{clausula}
+        ORDER BY m.id
+        LIMIT 1
         """
+        results = self._execute_query(query, params_plazo + (estudiante_codigo, curso_codigo) + params_periodo)
+        if not results:
+            return None
+        return self._row_to_matricula(results[0][:6]), bool(results[0][6])
+    
+    def complete_matricula(self, estudiante_codigo: str, curso_codigo: str,
+                           periodo_id: Optional[int] = None) -> bool:
+        """Marca como completada una matrícula activa y actualiza la carga del estudiante"""
+        clausula, params_periodo = self._periodo_clause(periodo_id)
+        query = f"""
+        SELECT m.id, m.estudiante_id, m.curso_id FROM matriculas m
+        JOIN estudiantes e ON m.estudiante_id = e.id
+        JOIN cursos c ON m.curso_id = c.id
+        WHERE e.codigo = %s AND c.codigo = %s AND m.estado = 'ACTIVA'{clausula}
+        FOR UPDATE
+        """
+        
+        with self._transaction() as cursor:
+            cursor.execute(query, (estudiante_codigo, curso_codigo) + params_periodo)
+            filas = cursor.fetchall()
+            if not filas:
+                return False
+            
+            ids = [fila[0] for fila in filas]
+            cursor.execute(
+                f"UPDATE matriculas SET estado = 'COMPLETADA' WHERE id IN ({self._placeholders(ids)})", tuple(ids)
+            )
+            self._apply_load_delta(cursor, filas[0][1], filas[0][2], EstadoMatricula.ACTIVA.value,
+                                   EstadoMatricula.COMPLETADA.value, veces=len(ids))
         
-        affected_rows = self._execute_update(query, (estudiante_codigo, curso_codigo))
-        return affected_rows > 0
\ No newline at end of file
+        return True
\ No newline at end of file
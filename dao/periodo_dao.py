@@ -0,0 +1,116 @@
+"""
+Autor: Sistema de Matrículas Universitarias
+Módulo: DAO Periodo
+Descripción: Acceso a datos para periodos académicos
+Paradigma: POO con herencia
+"""
+
+from typing import List, Optional
+from dao.base_dao import BaseDAO
+from models.periodo import Periodo
+
+class PeriodoDAO(BaseDAO):
+    """
+    Clase para acceso a datos de periodos académicos
+    Hereda de BaseDAO e implementa métodos específicos
+    """
+    
+    def create(self, periodo: Periodo) -> int:
+        """Crea un nuevo periodo en la base de datos"""
+        query = """
+        INSERT INTO periodos (codigo, nombre, fecha_inicio, fecha_fin, actual)
+        VALUES (%s, %s, %s, %s, %s)
+        """
+        params = (
+            periodo.codigo,
+            periodo.nombre,
+            periodo.fecha_inicio,
+            periodo.fecha_fin,
+            periodo.actual
+        )
+        
+        periodo_id = self._execute_insert_with_id(query, params)
+        periodo.id = periodo_id
+        return periodo_id
+    
+    def read(self, id: int) -> Optional[Periodo]:
+        """Lee un periodo por ID"""
+        query = "SELECT * FROM periodos WHERE id = %s"
+        results = self._execute_query(query, (id,))
+        
+        if results:
+            return self._row_to_periodo(results[0])
+        return None
+    
+    def find_by_codigo(self, codigo: str) -> Optional[Periodo]:
+        """Busca un periodo por código"""
+        query = "SELECT * FROM periodos WHERE codigo = %s"
+        results = self._execute_query(query, (codigo.upper(),))
+        
+        if results:
+            return self._row_to_periodo(results[0])
+        return None
+    
+    def find_actual(self) -> Optional[Periodo]:
+        """Obtiene el periodo marcado como actual"""
+        query = "SELECT * FROM periodos WHERE actual = TRUE ORDER BY fecha_inicio DESC LIMIT 1"
+        results = self._execute_query(query)
+        
+        if results:
+            return self._row_to_periodo(results[0])
+        return None
+    
+    def set_actual(self, codigo: str) -> bool:
+        """
+        Marca un periodo como actual y desmarca los demás
+        Ambas actualizaciones ocurren en una sola sentencia
+        """
+        query = "UPDATE periodos SET actual = (codigo = %s)"
+        self._execute_update(query, (codigo.upper(),))
+        return self.find_actual() is not None
+    
+    def update(self, periodo: Periodo) -> bool:
+        """Actualiza un periodo existente"""
+        query = """
+        UPDATE periodos 
+        SET nombre = %s, fecha_inicio = %s, fecha_fin = %s
+        WHERE codigo = %s
+        """
+        params = (
+            periodo.nombre,
+            periodo.fecha_inicio,
+            periodo.fecha_fin,
+            periodo.codigo
+        )
+        
+        affected_rows = self._execute_update(query, params)
+        return affected_rows > 0
+    
+    def delete(self, id: int) -> bool:
+        """Elimina un periodo por ID"""
+        query = "DELETE FROM periodos WHERE id = %s"
+        affected_rows = self._execute_update(query, (id,))
+        return affected_rows > 0
+    
+    def find_all(self) -> List[Periodo]:
+        """Obtiene todos los periodos, del más reciente al más antiguo"""
+        query = "SELECT * FROM periodos ORDER BY fecha_inicio DESC"
+        results = self._execute_query(query)
+        
+        return list(map(self._row_to_periodo, results))
+    
+    def _row_to_periodo(self, row: tuple) -> Periodo:
+        """
+        Convierte una fila de la base de datos a objeto Periodo
+        """
+        # row = (id, codigo, nombre, fecha_inicio, fecha_fin, actual)
+        periodo = Periodo(
+            codigo=row[1],
+            nombre=row[2],
+            fecha_inicio=row[3],
+            fecha_fin=row[4],
+            actual=bool(row[5])
+        )
+        periodo.id = row[0]
+        
+        return periodo
@@ -0,0 +1,96 @@
+"""
+Autor: Sistema de Matrículas Universitarias
+Módulo: DAO Prerrequisito
+Descripción: Acceso a datos para prerrequisitos entre cursos
+Paradigma: POO con herencia
+"""
+
+from typing import List, Optional
+from dao.base_dao import BaseDAO
+from models.prerrequisito import Prerrequisito
+
+class PrerrequisitoDAO(BaseDAO):
+    """
+    Clase para acceso a datos de prerrequisitos
+    Hereda de BaseDAO e implementa métodos específicos
+    """
+    
+    SELECT_BASE = """
+    SELECT p.id, c.codigo, r.codigo, p.grupo
+    FROM prerrequisitos p
+    JOIN cursos c ON p.curso_id = c.id
+    JOIN cursos r ON p.requisito_id = r.id
+    """
+    
+    def create(self, prerrequisito: Prerrequisito) -> int:
+        """Crea un nuevo prerrequisito entre dos cursos existentes"""
+        query = """
+        INSERT INTO prerrequisitos (curso_id, requisito_id, grupo)
+        SELECT c.id, r.id, %s FROM cursos c, cursos r
+        WHERE c.codigo = %s AND r.codigo = %s
+        """
+        params = (prerrequisito.grupo, prerrequisito.curso_codigo, prerrequisito.requisito_codigo)
+        
+        prerrequisito_id = self._execute_insert_with_id(query, params)
+        prerrequisito.id = prerrequisito_id
+        return prerrequisito_id
+    
+    def read(self, id: int) -> Optional[Prerrequisito]:
+        """Lee un prerrequisito por ID"""
+        query = self.SELECT_BASE + " WHERE p.id = %s"
+        results = self._execute_query(query, (id,))
+        
+        if results:
+            return self._row_to_prerrequisito(results[0])
+        return None
+    
+    def update(self, prerrequisito: Prerrequisito) -> bool:
+        """Actualiza el grupo de un prerrequisito"""
+        query = "UPDATE prerrequisitos SET grupo = %s WHERE id = %s"
+        affected_rows = self._execute_update(query, (prerrequisito.grupo, prerrequisito.id))
+        return affected_rows > 0
+    
+    def delete(self, id: int) -> bool:
+        """Elimina un prerrequisito por ID"""
+        query = "DELETE FROM prerrequisitos WHERE id = %s"
+        affected_rows = self._execute_update(query, (id,))
+        return affected_rows > 0
+    
+    def delete_by_codigos(self, curso_codigo: str, requisito_codigo: str) -> bool:
+        """Elimina el prerrequisito entre dos cursos"""
+        query = """
+        DELETE p FROM prerrequisitos p
+        JOIN cursos c ON p.curso_id = c.id
+        JOIN cursos r ON p.requisito_id = r.id
+        WHERE c.codigo = %s AND r.codigo = %s
+        """
+        affected_rows = self._execute_update(query, (curso_codigo.upper(), requisito_codigo.upper()))
+        return affected_rows > 0
+    
+    def find_all(self) -> List[Prerrequisito]:
+        """Obtiene todos los prerrequisitos"""
+        query = self.SELECT_BASE + " ORDER BY c.codigo, p.grupo, r.codigo"
+        results = self._execute_query(query)
+        
+        return list(map(self._row_to_prerrequisito, results))
+    
+    def find_by_curso(self, curso_codigo: str) -> List[Prerrequisito]:
+        """Obtiene los prerrequisitos directos de un curso"""
+        query = self.SELECT_BASE + " WHERE c.codigo = %s ORDER BY p.grupo, r.codigo"
+        results = self._execute_query(query, (curso_codigo.upper(),))
+        
+        return list(map(self._row_to_prerrequisito, results))
+    
+    def _row_to_prerrequisito(self, row: tuple) -> Prerrequisito:
+        """
+        Convierte una fila de la base de datos a objeto Prerrequisito
+        """
+        # row = (id, curso_codigo, requisito_codigo, grupo)
+        prerrequisito = Prerrequisito(
+            curso_codigo=row[1],
+            requisito_codigo=row[2],
+            grupo=row[3]
+        )
+        prerrequisito.id = row[0]
+        
+        return prerrequisito
@@ -5,7 +5,7 @@ Descripción: Acceso a datos para usuarios
 Paradigma: POO con herencia
 """
 
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from dao.base_dao import BaseDAO
 from models.usuario import Usuario, RolUsuario
 
@@ -51,14 +51,34 @@ class UsuarioDAO(BaseDAO):
             return self._row_to_usuario(results[0])
         return None
     
+    def find_for_login(self, email: str) -> Optional[Tuple[Usuario, bool]]:
+        """
+        Obtiene en una sola consulta el usuario (con su hash) y si existe el
+        estudiante vinculado; busca por el índice único del email en minúsculas
+        Incluye usuarios desactivados para que el login pueda informarlo
+        Retorna (usuario, estudiante_existe) o None si el email no existe
+        """
+        query = """
+        SELECT u.id, u.email, u.password_hash, u.rol, u.nombre, u.apellido,
+               u.codigo_estudiante, u.activo, u.fecha_creacion, e.id IS NOT NULL
+        FROM usuarios u
+        LEFT JOIN estudiantes e ON e.codigo = u.codigo_estudiante
+        WHERE u.email = %s
+        """
+        results = self._execute_query(query, (email.strip().lower(),))
+        
+        if results:
+            return self._row_to_usuario(results[0]), bool(results[0][9])
+        return None
+    
     def authenticate(self, email: str, password: str) -> Optional[Usuario]:
         """
         Autentica un usuario con email y contraseña
         Retorna el usuario si las credenciales son válidas
         """
-        usuario = self.find_by_email(email)
-        if usuario and usuario.verificar_password(password):
-            return usuario
+        encontrado = self.find_for_login(email)
+        if encontrado and encontrado[0].activo and encontrado[0].verificar_password(password):
+            return encontrado[0]
         return None
     
     def update(self, usuario: Usuario) -> bool:
@@ -79,6 +99,15 @@ class UsuarioDAO(BaseDAO):
         affected_rows = self._execute_update(query, params)
         return affected_rows > 0
     
+    def update_password_hash(self, usuario_id: int, hash_anterior: str, hash_nuevo: str) -> bool:
+        """
+        Guarda el hash de contraseña regenerado tras un login exitoso
+        Solo reemplaza el hash si nadie lo cambió desde que se leyó
+        """
+        query = "UPDATE usuarios SET password_hash = %s WHERE id = %s AND password_hash = %s"
+        affected_rows = self._execute_update(query, (hash_nuevo, usuario_id, hash_anterior))
+        return affected_rows > 0
+    
     def delete(self, id: int) -> bool:
         """Desactiva un usuario (soft delete)"""
         query = "UPDATE usuarios SET activo = FALSE WHERE id = %s"
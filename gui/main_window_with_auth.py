@@ -7,7 +7,6 @@ Paradigma: Orientado a Objetos con GUI
 
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
-import hashlib
 import logging
 from typing import Optional, Tuple
 import sys
@@ -17,6 +16,11 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config.database import DatabaseConfig
+from models.horario import validar_horario
+from services.auth_service import AuthService
+from services.matricula_service import MatriculaService
+from utils.contrasenas import hashear_password
+from utils.data_analysis import DataAnalyzer
 
 class LoginWindow:
     """Ventana de login para autenticación de usuarios"""
@@ -72,6 +76,7 @@ class LoginWindow:
         """Configura los servicios necesarios"""
         try:
             self.db_config = DatabaseConfig()
+            self.auth_service = AuthService()
             
             # Crear usuario administrador por defecto si no existe
             self.create_default_admin()
@@ -82,42 +87,11 @@ class LoginWindow:
     def create_default_admin(self):
         """Crea un usuario administrador por defecto"""
         try:
-            if not self.db_config.connect():
-                return
-                
-            connection = self.db_config.get_new_connection()
-            if connection is None:
-                return
-                
-            cursor = connection.cursor()
-            
-            # Verificar si ya existe el admin
-            cursor.execute("SELECT id FROM usuarios WHERE email = %s", ("admin@sistema.com",))
-            if cursor.fetchone():
-                cursor.close()
-                connection.close()
-                return
-            
-            # Crear usuario admin
-            password_hash = hashlib.sha256("admin123".encode()).hexdigest()
-            
-            insert_query = """
-            INSERT INTO usuarios (email, password_hash, rol, nombre, apellido, activo)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            """
-            
-            cursor.execute(insert_query, (
-                "admin@sistema.com",
-                password_hash,
-                "ADMINISTRADOR",
-                "Administrador",
-                "Sistema",
-                True
-            ))
-            
-            connection.commit()
-            cursor.close()
-            connection.close()
+            exito, mensaje = self.auth_service.crear_usuario_admin(
+                "admin@sistema.com", "admin123", "Administrador", "Sistema"
+            )
+            if exito:
+                logging.info(f"Administrador por defecto creado: {mensaje}")
             
         except Exception as e:
             logging.error(f"Error creando admin por defecto: {str(e)}")
@@ -172,47 +146,28 @@ class LoginWindow:
             return
             
         try:
-            # Verificar credenciales
-            if not self.db_config.connect():
-                messagebox.showerror("Error", "No se pudo conectar a la base de datos")
-                return
-                
-            connection = self.db_config.get_new_connection()
-            if connection is None:
-                messagebox.showerror("Error", "No se pudo obtener conexión a la base de datos")
-                return
-                
-            cursor = connection.cursor()
+            # Una sola consulta a la base de datos por intento de login
+            # Se conserva la política de la GUI: credenciales y usuario activo; el
+            # formulario de usuarios crea estudiantes con el email de su registro,
+            # que no tiene por qué ser @utp.edu.pe
+            exito, mensaje, usuario = self.auth_service.login(email, password, validar_estudiante=False)
             
-            password_hash = hashlib.sha256(password.encode()).hexdigest()
-            
-            query = """
-            SELECT id, email, rol, nombre, apellido, activo 
-            FROM usuarios 
-            WHERE email = %s AND password_hash = %s AND activo = TRUE
-            """
-            
-            cursor.execute(query, (email, password_hash))
-            result = cursor.fetchone()
-            
-            if result:
+            if exito:
                 self.usuario_logueado = {
-                    'id': result[0],
-                    'email': result[1],
-                    'rol': result[2],
-                    'nombre': result[3],
-                    'apellido': result[4],
-                    'activo': result[5]
+                    'id': usuario.id,
+                    'email': usuario.email,
+                    'rol': usuario.rol.value,
+                    'nombre': usuario.nombre,
+                    'apellido': usuario.apellido,
+                    'activo': usuario.activo,
+                    'token': self.auth_service.get_token_actual()
                 }
                 
-                messagebox.showinfo("Éxito", f"Bienvenido {result[3]} {result[4]}")
+                messagebox.showinfo("Éxito", f"Bienvenido {usuario.nombre} {usuario.apellido}")
                 self.root.destroy()
                 
             else:
-                messagebox.showerror("Error", "Credenciales inválidas")
-                
-            cursor.close()
-            connection.close()
+                messagebox.showerror("Error", mensaje)
             
         except Exception as e:
             messagebox.showerror("Error", f"Error durante login: {str(e)}")
@@ -247,6 +202,8 @@ class MainWindowWithAuth:
         """Configura los servicios necesarios"""
         try:
             self.db_config = DatabaseConfig()
+            self.matricula_service = MatriculaService()
+            self.data_analyzer = DataAnalyzer()
         except Exception as e:
             messagebox.showerror("Error", f"Error configurando servicios: {str(e)}")
     
@@ -534,7 +491,9 @@ class MainWindowWithAuth:
             cursor = connection.cursor()
             
             # Obtener matrículas del estudiante logueado
-            query = """SELECT m.id, c.codigo, c.nombre, c.creditos, c.profesor, c.horario, m.estado 
+            # (código del estudiante y periodo al final, para cancelar vía el servicio)
+            query = """SELECT m.id, c.codigo, c.nombre, c.creditos, c.profesor, c.horario, m.estado,
+                             e.codigo, m.periodo_id 
                       FROM matriculas m 
                       JOIN cursos c ON m.curso_id = c.id 
                       JOIN estudiantes e ON m.estudiante_id = e.id 
@@ -574,8 +533,10 @@ class MainWindowWithAuth:
                 tree.column('#6', width=180)
                 tree.column('#7', width=100)
                 
+                datos_cancelacion = {}
                 for enrollment in enrollments:
-                    tree.insert('', 'end', values=enrollment)
+                    tree.insert('', 'end', values=enrollment[:7])
+                    datos_cancelacion[enrollment[0]] = (enrollment[7], enrollment[1], enrollment[8])
                 
                 tree.pack(fill=tk.BOTH, expand=True, pady=10)
                 
@@ -591,18 +552,16 @@ class MainWindowWithAuth:
                         curso_nombre = item['values'][2]
                         
                         if messagebox.askyesno("Confirmar", f"¿Está seguro que desea cancelar la matrícula en {curso_nombre}?"):
-                            # Crear nueva conexión para la operación de cancelación
-                            cancel_connection = self.db_config.get_new_connection()
-                            if cancel_connection is None:
-                                messagebox.showerror("Error", "No se pudo conectar a la base de datos")
+                            # El servicio aplica las reglas de cancelación, actualiza el
+                            # resumen de carga y ofrece el cupo a la lista de espera
+                            estudiante_codigo, curso_codigo, periodo_id = datos_cancelacion[matricula_id]
+                            exito, mensaje = self.matricula_service.cancelar_matricula(
+                                estudiante_codigo, curso_codigo, periodo_id
+                            )
+                            if not exito:
+                                messagebox.showwarning("Advertencia", mensaje)
                                 return
                             
-                            cancel_cursor = cancel_connection.cursor()
-                            cancel_cursor.execute("UPDATE matriculas SET estado = 'CANCELADA' WHERE id = %s", (matricula_id,))
-                            cancel_connection.commit()
-                            cancel_cursor.close()
-                            cancel_connection.close()
-                            
                             messagebox.showinfo("Éxito", "Matrícula cancelada correctamente")
                             self.show_my_enrollments()  # Refrescar
                     
@@ -673,6 +632,20 @@ class MainWindowWithAuth:
             cursor.execute(query, (self.usuario_logueado['id'],))
             cursos_disponibles = cursor.fetchall()
             
+            # Código del estudiante logueado, con el que se matricula vía el servicio
+            cursor.execute("""SELECT e.codigo FROM estudiantes e 
+                             JOIN usuarios u ON e.email = u.email 
+                             WHERE u.id = %s""", (self.usuario_logueado['id'],))
+            estudiante_result = cursor.fetchone()
+            
+            if not estudiante_result:
+                messagebox.showerror("Error", "No se encontró el registro de estudiante")
+                cursor.close()
+                connection.close()
+                return
+            
+            estudiante_codigo = estudiante_result[0]
+            
             if not cursos_disponibles:
                 messagebox.showinfo("Información", "No hay cursos disponibles para matrícula")
                 cursor.close()
@@ -722,66 +695,18 @@ class MainWindowWithAuth:
                     # Obtener el curso seleccionado
                     item_index = tree.index(selected[0])
                     curso_seleccionado = cursos_disponibles[item_index]
-                    curso_id = curso_seleccionado[0]
+                    curso_codigo = curso_seleccionado[1]
                     curso_nombre = curso_seleccionado[2]
                     
                     if messagebox.askyesno("Confirmar", f"¿Desea matricularse en {curso_nombre}?"):
-                        # Crear nueva conexión para la matrícula
-                        matricula_connection = self.db_config.get_new_connection()
-                        if matricula_connection is None:
-                            messagebox.showerror("Error", "No se pudo conectar a la base de datos")
-                            return
-                        
-                        matricula_cursor = matricula_connection.cursor()
-                        
-                        # Obtener el estudiante_id
-                        matricula_cursor.execute("""SELECT e.id FROM estudiantes e 
-                                         JOIN usuarios u ON e.email = u.email 
-                                         WHERE u.id = %s""", (self.usuario_logueado['id'],))
-                        estudiante_result = matricula_cursor.fetchone()
-                        
-                        if not estudiante_result:
-                            messagebox.showerror("Error", "No se encontró el registro de estudiante")
-                            matricula_cursor.close()
-                            matricula_connection.close()
+                        # El servicio valida las reglas de matrícula, reserva el cupo bajo
+                        # bloqueo (o agrega a la lista de espera) y actualiza el resumen de
+                        # carga; la matrícula se registra en el periodo actual
+                        exito, mensaje = self.matricula_service.matricular_estudiante(estudiante_codigo, curso_codigo)
+                        if not exito:
+                            messagebox.showwarning("Advertencia", mensaje)
                             return
                         
-                        estudiante_id = estudiante_result[0]
-                        
-                        # Verificar si ya existe una matrícula (activa o cancelada)
-                        matricula_cursor.execute("""SELECT id, estado FROM matriculas 
-                                                   WHERE estudiante_id = %s AND curso_id = %s""", 
-                                               (estudiante_id, curso_id))
-                        matricula_existente = matricula_cursor.fetchone()
-                        
-                        if matricula_existente:
-                            matricula_id, estado_actual = matricula_existente
-                            if estado_actual == 'ACTIVA':
-                                messagebox.showwarning("Advertencia", "Ya estás matriculado en este curso")
-                                matricula_cursor.close()
-                                matricula_connection.close()
-                                return
-                            elif estado_actual == 'CANCELADA':
-                                # Reactivar la matrícula cancelada
-                                matricula_cursor.execute("""UPDATE matriculas 
-                                                           SET estado = 'ACTIVA', fecha_matricula = CURRENT_TIMESTAMP 
-                                                           WHERE id = %s""", (matricula_id,))
-                                matricula_connection.commit()
-                                matricula_cursor.close()
-                                matricula_connection.close()
-                                
-                                messagebox.showinfo("Éxito", f"¡Te has matriculado exitosamente en {curso_nombre}!")
-                                self.current_modal_window = None
-                                enroll_window.destroy()
-                                return
-                        
-                        # Si no existe matrícula previa, crear una nueva
-                        matricula_cursor.execute("INSERT INTO matriculas (estudiante_id, curso_id, estado) VALUES (%s, %s, 'ACTIVA')", 
-                                     (estudiante_id, curso_id))
-                        matricula_connection.commit()
-                        matricula_cursor.close()
-                        matricula_connection.close()
-                        
                         messagebox.showinfo("Éxito", f"¡Te has matriculado exitosamente en {curso_nombre}!")
                         self.current_modal_window = None
                         enroll_window.destroy()
@@ -950,7 +875,7 @@ class MainWindowWithAuth:
             horario_entry.grid(row=4, column=1, padx=10, pady=5)
             
             # Agregar texto de ayuda para el horario
-            help_label = ttk.Label(add_window, text="Ej: Lunes 8:00-10:00, Miércoles 14:00-16:00", 
+            help_label = ttk.Label(add_window, text="Ej: Lunes 8:00-10:00, Miércoles 14:00-16:00 o Lun-Vie 2-4 pm", 
                                  font=("Arial", 8), foreground="gray")
             help_label.grid(row=5, column=1, padx=10, pady=(0, 5), sticky=tk.W)
             
@@ -963,12 +888,18 @@ class MainWindowWithAuth:
                         messagebox.showerror("Error", "Todos los campos son obligatorios")
                         return
                     
+                    try:
+                        horario = validar_horario(horario_var.get())
+                    except ValueError as e:
+                        messagebox.showerror("Error", str(e))
+                        return
+                    
                     cursor = connection.cursor()
                     query = """INSERT INTO cursos (codigo, nombre, creditos, profesor, horario) 
                               VALUES (%s, %s, %s, %s, %s)"""
                     cursor.execute(query, (codigo_var.get(), nombre_var.get(), 
                                          int(creditos_var.get()), profesor_var.get(), 
-                                         horario_var.get()))
+                                         horario))
                     connection.commit()
                     cursor.close()
                     connection.close()
@@ -1174,41 +1105,24 @@ class MainWindowWithAuth:
                         messagebox.showerror("Error", "Seleccione un curso")
                         return
                     
-                    estudiante_id = estudiante_seleccionado[0]
-                    curso_id = curso_seleccionado[0]
-                    
-                    connection = self.db_config.get_new_connection()
-                    cursor = connection.cursor()
-                    
-                    # Verificar si ya está matriculado
-                    cursor.execute("SELECT id FROM matriculas WHERE estudiante_id = %s AND curso_id = %s AND estado = 'ACTIVA'", 
-                                 (estudiante_id, curso_id))
-                    if cursor.fetchone():
-                        messagebox.showwarning("Advertencia", 
-                                             f"El estudiante {estudiante_seleccionado[2]} {estudiante_seleccionado[3]} ya está matriculado en {curso_seleccionado[2]}")
-                        cursor.close()
-                        connection.close()
-                        return
-                    
                     # Confirmar matrícula
                     if messagebox.askyesno("Confirmar Matrícula", 
                                          f"¿Confirma la matrícula de:\n\nEstudiante: {estudiante_seleccionado[1]} - {estudiante_seleccionado[2]} {estudiante_seleccionado[3]}\nCurso: {curso_seleccionado[1]} - {curso_seleccionado[2]}"):
                         
-                        # Insertar matrícula
-                        query = "INSERT INTO matriculas (estudiante_id, curso_id, estado) VALUES (%s, %s, 'ACTIVA')"
-                        cursor.execute(query, (estudiante_id, curso_id))
-                        
-                        connection.commit()
-                        cursor.close()
-                        connection.close()
+                        # El servicio valida las reglas (incluida una matrícula existente
+                        # en el periodo actual), reserva el cupo bajo bloqueo y actualiza
+                        # el resumen de carga; una matrícula cancelada se reactiva
+                        exito, mensaje = self.matricula_service.matricular_estudiante(
+                            estudiante_seleccionado[1], curso_seleccionado[1]
+                        )
+                        if not exito:
+                            messagebox.showwarning("Advertencia", mensaje)
+                            return
                         
                         messagebox.showinfo("Éxito", "✅ Matrícula realizada correctamente")
                         self.current_modal_window = None
                         enroll_window.destroy()
                         self.list_enrollments()  # Refrescar lista
-                    else:
-                        cursor.close()
-                        connection.close()
                     
                 except Exception as e:
                     messagebox.showerror("Error", f"Error al matricular: {str(e)}")
@@ -1428,22 +1342,23 @@ class MainWindowWithAuth:
                     cursor = connection.cursor()
                     
                     # Verificar si el email ya existe
-                    cursor.execute("SELECT id FROM usuarios WHERE email = %s", (email_var.get(),))
+                    email_usuario = email_var.get().strip().lower()
+                    cursor.execute("SELECT id FROM usuarios WHERE email = %s", (email_usuario,))
                     if cursor.fetchone():
                         messagebox.showerror("Error", "Ya existe un usuario con ese email")
                         cursor.close()
                         connection.close()
                         return
                     
-                    # Hash de la contraseña
-                    password_hash = hashlib.sha256(password_var.get().encode()).hexdigest()
+                    # Hash de la contraseña con sal (scrypt/PBKDF2)
+                    password_hash = hashear_password(password_var.get())
                     
                     # Insertar usuario
                     query = """INSERT INTO usuarios (email, password_hash, rol, nombre, apellido, codigo_estudiante, activo) 
                               VALUES (%s, %s, %s, %s, %s, %s, %s)"""
                     
                     cursor.execute(query, (
-                        email_var.get(),
+                        email_usuario,
                         password_hash,
                         rol_var.get(),
                         nombre_var.get(),
@@ -1581,32 +1496,26 @@ class MainWindowWithAuth:
             messagebox.showerror("Error", f"Error al generar reporte: {str(e)}")
     
     def enrollment_report(self):
-        """Reporte de matrículas"""
+        """Reporte de matrículas (incluye el archivo histórico)"""
         try:
-            connection = self.db_config.get_new_connection()
-            if connection is None:
-                messagebox.showerror("Error", "No se pudo conectar a la base de datos")
-                return
-                
-            cursor = connection.cursor()
-            cursor.execute("SELECT COUNT(*) FROM matriculas")
-            total = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT estado, COUNT(*) FROM matriculas GROUP BY estado")
-            by_status = cursor.fetchall()
+            # Columnas tipadas directamente desde el cursor, sin un diccionario por fila
+            columnas = self.matricula_service.obtener_reporte_columnar()
+            df = self.data_analyzer.create_enrollments_dataframe_from_columns(columnas)
+            tendencias = self.data_analyzer.analyze_enrollment_trends(df)
             
             # Limpiar área de contenido
             for widget in self.content_area.winfo_children():
                 widget.destroy()
             
-            ttk.Label(self.content_area, text=f"Total de matrículas: {total}", font=("Arial", 12, "bold")).pack(pady=10)
+            ttk.Label(self.content_area, text=f"Total de matrículas: {len(df)}", font=("Arial", 12, "bold")).pack(pady=10)
             
             ttk.Label(self.content_area, text="Matrículas por estado:", font=("Arial", 10, "bold")).pack(pady=5)
-            for status, count in by_status:
+            for status, count in tendencias.get('distribucion_estados', {}).items():
                 ttk.Label(self.content_area, text=f"• {status}: {count}").pack()
             
-            cursor.close()
-            connection.close()
+            ttk.Label(self.content_area, text="Matrículas por carrera:", font=("Arial", 10, "bold")).pack(pady=5)
+            for career, count in tendencias.get('matriculas_por_carrera', {}).items():
+                ttk.Label(self.content_area, text=f"• {career}: {count}").pack()
             
         except Exception as e:
             messagebox.showerror("Error", f"Error al generar reporte: {str(e)}")
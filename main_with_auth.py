@@ -105,7 +105,7 @@ def run_gui_with_auth():
         # Verificar que tkinter esté disponible
         import tkinter as tk
         
-        # Verificar que la base de datos esté configurada
+        # Verificar que la base de datos esté configurada (incluye la tabla usuarios)
         from config.database import DatabaseConfig
         
         db_config = DatabaseConfig()
@@ -113,37 +113,6 @@ def run_gui_with_auth():
             print(f"{RED}❌ Error configurando base de datos{RESET}")
             return
         
-        # Crear tabla de usuarios
-        try:
-            connection = db_config.get_new_connection()
-            if connection is None:
-                print(f"{RED}❌ No se pudo establecer conexión con la base de datos{RESET}")
-                return
-                
-            cursor = connection.cursor()
-            
-            create_users_table = '''
-            CREATE TABLE IF NOT EXISTS usuarios (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                email VARCHAR(100) UNIQUE NOT NULL,
-                password_hash VARCHAR(64) NOT NULL,
-                rol ENUM("ADMINISTRADOR", "ESTUDIANTE") NOT NULL,
-                nombre VARCHAR(100),
-                apellido VARCHAR(100),
-                codigo_estudiante VARCHAR(10),
-                activo BOOLEAN DEFAULT TRUE,
-                fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            '''
-            
-            cursor.execute(create_users_table)
-            connection.commit()
-            cursor.close()
-            connection.close()
-            
-        except Exception as e:
-            print(f"{RED}❌ Error creando tabla usuarios: {str(e)}{RESET}")
-        
         from gui.main_window_with_auth import MainWindowWithAuth
         
         app = MainWindowWithAuth()
@@ -0,0 +1,288 @@
+"""
+Autor: Sistema de Matrículas Universitarias
+Módulo: Modelo Horario
+Descripción: Horario semanal estructurado representado como conjunto de bits por franja
+Paradigmas: POO, Funcional
+"""
+
+from functools import lru_cache
+from typing import List, Dict, Iterable, Optional, Tuple
+import re
+import unicodedata
+import numpy as np
+
+# La semana se divide en 7 días de 96 franjas de 15 minutos
+MINUTOS_POR_FRANJA = 15
+FRANJAS_POR_DIA = 24 * 60 // MINUTOS_POR_FRANJA
+TOTAL_FRANJAS = 7 * FRANJAS_POR_DIA
+
+# Palabras de 64 bits necesarias para representar la semana
+PALABRAS_POR_HORARIO = (TOTAL_FRANJAS + 63) // 64
+
+NOMBRES_DIAS = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+
+# Nombres y abreviaturas aceptados para cada día (sin tildes)
+DIAS = {
+    'lunes': 0, 'lun': 0, 'lu': 0,
+    'martes': 1, 'mar': 1, 'ma': 1,
+    'miercoles': 2, 'mie': 2, 'mi': 2,
+    'jueves': 3, 'jue': 3, 'ju': 3,
+    'viernes': 4, 'vie': 4, 'vi': 4,
+    'sabado': 5, 'sab': 5, 'sa': 5,
+    'domingo': 6, 'dom': 6, 'do': 6
+}
+
+# Palabras de enlace que pueden aparecer entre días y horas
+CONECTORES = {'y', 'de', 'hrs', 'h'}
+
+# Separadores de un rango de días: "Lun-Vie", "Lunes a Viernes", "Lunes al Viernes"
+SEPARADORES_DIAS = {'-', 'a', 'al', 'hasta'}
+
+# Hora con minutos y sufijo am/pm opcionales ("8", "8:30", "8.30", "2pm", "2 p.m.")
+_HORA = r'(\d{1,2})(?:[:.](\d{2}))?(?:\s*([ap])\.?\s?m\b\.?)?'
+RANGO_HORAS = re.compile(_HORA + r'\s*(?:-|a|hasta)\s*' + _HORA)
+
+# Palabras del texto entre rangos de horas; espacios, comas, punto y coma y
+# barras solo separan, cualquier otro carácter forma parte de un token
+TOKEN = re.compile(r'[a-z]+|[^\sa-z,;/]+')
+
+class BloqueHorario:
+    """
+    Bloque de clase en un día de la semana
+    Los minutos se cuentan desde la medianoche
+    """
+    
+    def __init__(self, dia: int, inicio: int, fin: int):
+        """Constructor del bloque horario"""
+        if not 0 <= dia < 7:
+            raise ValueError("El día debe estar entre 0 (lunes) y 6 (domingo)")
+        if not 0 <= inicio < fin <= 24 * 60:
+            raise ValueError("La hora de fin debe ser posterior a la hora de inicio")
+        self.dia = dia
+        self.inicio = inicio
+        self.fin = fin
+    
+    def franjas(self) -> range:
+        """Franjas de 15 minutos que ocupa el bloque, redondeadas hacia afuera"""
+        primera = self.dia * FRANJAS_POR_DIA + self.inicio // MINUTOS_POR_FRANJA
+        ultima = self.dia * FRANJAS_POR_DIA + -(-self.fin // MINUTOS_POR_FRANJA)
+        return range(primera, ultima)
+    
+    def __str__(self) -> str:
+        """Representación en cadena del bloque"""
+        return (f"{NOMBRES_DIAS[self.dia]} {self.inicio // 60}:{self.inicio % 60:02d}"
+                f"-{self.fin // 60}:{self.fin % 60:02d}")
+
+class Horario:
+    """
+    Horario semanal de un curso o de la carga de un estudiante
+    Se representa como un entero de 672 bits (7 días x 96 franjas):
+    dos horarios se cruzan si el AND de sus máscaras no es cero
+    """
+    
+    def __init__(self, bloques: Iterable[BloqueHorario] = ()):
+        """Constructor del horario"""
+        self._bloques = list(bloques)
+        mascara = 0
+        for bloque in self._bloques:
+            for franja in bloque.franjas():
+                mascara |= 1 << franja
+        self._mascara = mascara
+    
+    @classmethod
+    def desde_texto(cls, texto: str) -> 'Horario':
+        """
+        Construye un horario desde texto libre
+        Ejemplo: "Lunes 8:00-10:00, Miércoles 14:00-16:00" o "Lun y Mie 8-10"
+        Lanza ValueError si el texto no se puede interpretar
+        """
+        return cls(parsear_bloques(texto))
+    
+    @property
+    def bloques(self) -> List[BloqueHorario]:
+        return list(self._bloques)
+    
+    @property
+    def mascara(self) -> int:
+        return self._mascara
+    
+    def esta_vacio(self) -> bool:
+        """Predicado lógico: el horario no ocupa ninguna franja"""
+        return self._mascara == 0
+    
+    def se_cruza_con(self, otro: 'Horario') -> bool:
+        """Predicado lógico: los horarios comparten al menos una franja"""
+        return (self._mascara & otro.mascara) != 0
+    
+    def palabras(self) -> np.ndarray:
+        """Máscara como arreglo de palabras de 64 bits para operaciones vectorizadas"""
+        return mascara_a_palabras(self._mascara)
+    
+    def to_dict(self) -> Dict:
+        """Convierte el objeto a diccionario"""
+        return {
+            'bloques': [
+                {'dia': NOMBRES_DIAS[b.dia], 'inicio': b.inicio, 'fin': b.fin}
+                for b in self._bloques
+            ],
+            'franjas_ocupadas': bin(self._mascara).count('1')
+        }
+    
+    def __str__(self) -> str:
+        """Representación en cadena del horario"""
+        return ', '.join(str(bloque) for bloque in self._bloques)
+
+def _normalizar(texto: str) -> str:
+    """Convierte a minúsculas y elimina tildes"""
+    descompuesto = unicodedata.normalize('NFKD', texto.lower())
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c))
+
+def _minutos(hora: str, minutos: str, sufijo: Optional[str] = None) -> int:
+    """
+    Convierte hora y minutos a minutos desde la medianoche
+    Con sufijo ('a' o 'p') la hora se interpreta en formato de 12 horas
+    """
+    horas = int(hora)
+    if sufijo:
+        if not 1 <= horas <= 12:
+            raise ValueError(f"Hora inválida en formato de 12 horas: {hora}{sufijo}m")
+        horas = horas % 12 + (12 if sufijo == 'p' else 0)
+    valor = horas * 60 + int(minutos or 0)
+    if int(minutos or 0) >= 60 or valor > 24 * 60:
+        raise ValueError(f"Hora inválida: {hora}:{minutos or '00'}")
+    return valor
+
+def _rango_minutos(rango: re.Match) -> Tuple[int, int]:
+    """
+    Inicio y fin de un rango de horas en minutos desde la medianoche
+    Si solo un extremo lleva am/pm, el otro toma el mismo sufijo salvo que
+    el rango quede invertido ("2-4 pm" es 14:00-16:00, "11-1 pm" es 11:00-13:00)
+    """
+    hora_inicio, min_inicio, sufijo_inicio, hora_fin, min_fin, sufijo_fin = rango.groups()
+    if sufijo_fin and not sufijo_inicio:
+        fin = _minutos(hora_fin, min_fin, sufijo_fin)
+        inicio = _minutos(hora_inicio, min_inicio, sufijo_fin)
+        if inicio >= fin:
+            inicio = _minutos(hora_inicio, min_inicio, 'a')
+    elif sufijo_inicio and not sufijo_fin:
+        inicio = _minutos(hora_inicio, min_inicio, sufijo_inicio)
+        fin = _minutos(hora_fin, min_fin, sufijo_inicio)
+        if fin <= inicio:
+            fin = _minutos(hora_fin, min_fin, 'p')
+    else:
+        inicio = _minutos(hora_inicio, min_inicio, sufijo_inicio)
+        fin = _minutos(hora_fin, min_fin, sufijo_fin)
+    return inicio, fin
+
+def _parsear_dias(segmento: str, rango: str) -> List[int]:
+    """
+    Días mencionados antes de un rango de horas, expandiendo rangos de días
+    ("Lun-Vie" o "Lunes a Viernes" son los cinco días hábiles)
+    """
+    dias = []
+    desde = None
+    for palabra in TOKEN.findall(segmento):
+        if palabra in DIAS:
+            dia = DIAS[palabra]
+            if desde is not None:
+                if dia < desde:
+                    raise ValueError(f"Rango de días invertido en el horario: '{segmento.strip()}'")
+                dias.extend(range(desde + 1, dia + 1))
+                desde = None
+            else:
+                dias.append(dia)
+        elif palabra in SEPARADORES_DIAS and dias and desde is None:
+            desde = dias[-1]
+        elif not palabra.isalpha():
+            raise ValueError(f"Texto no reconocido en el horario: '{palabra}'")
+        elif palabra not in CONECTORES:
+            raise ValueError(f"Día no reconocido en el horario: '{palabra}'")
+    
+    if desde is not None:
+        raise ValueError(f"Rango de días incompleto en el horario: '{segmento.strip()}'")
+    if not dias:
+        raise ValueError(f"El rango {rango} no indica el día")
+    return dias
+
+def parsear_bloques(texto: str) -> List[BloqueHorario]:
+    """
+    Interpreta un horario en texto libre como lista de bloques
+    Cada rango de horas aplica a los días mencionados antes de él,
+    que pueden darse como rango ("Lun-Vie 8-10", "Lunes a Viernes 2-4 pm")
+    """
+    if not texto or not texto.strip():
+        raise ValueError("El horario está vacío")
+    
+    normalizado = _normalizar(texto)
+    bloques = []
+    posicion = 0
+    for rango in RANGO_HORAS.finditer(normalizado):
+        dias = _parsear_dias(normalizado[posicion:rango.start()], rango.group(0))
+        inicio, fin = _rango_minutos(rango)
+        bloques.extend(BloqueHorario(dia, inicio, fin) for dia in dias)
+        posicion = rango.end()
+    
+    if not bloques:
+        raise ValueError(f"No se encontraron rangos de horas en '{texto}'")
+    
+    # Después del último rango solo pueden quedar conectores ("8-10 hrs")
+    sobrante = [palabra for palabra in TOKEN.findall(normalizado[posicion:]) if palabra not in CONECTORES]
+    if sobrante:
+        raise ValueError(f"Texto sin rango de horas al final del horario: '{' '.join(sobrante)}'")
+    return bloques
+
+def validar_horario(texto: Optional[str]) -> str:
+    """
+    Validación del horario de un curso antes de guardarlo
+    Un horario vacío se acepta (el curso no tiene horario); cualquier otro
+    texto debe poder interpretarse, porque un horario ilegible no ocupa
+    franjas y nunca generaría cruces
+    Lanza ValueError con el motivo si no se puede interpretar
+    """
+    texto = (texto or '').strip()
+    if texto:
+        try:
+            parsear_bloques(texto)
+        except ValueError as e:
+            raise ValueError(f"Horario no válido: {e}") from None
+    return texto
+
+@lru_cache(maxsize=4096)
+def mascara_horario(texto: str) -> int:
+    """
+    Máscara de franjas del horario de un curso
+    Un horario vacío o que no se puede interpretar no ocupa franjas,
+    por lo que nunca genera cruces
+    """
+    try:
+        return Horario.desde_texto(texto).mascara
+    except (ValueError, TypeError):
+        return 0
+
+def mascara_a_palabras(mascara: int) -> np.ndarray:
+    """Divide una máscara de 672 bits en palabras de 64 bits"""
+    return np.array(
+        [(mascara >> (64 * i)) & 0xFFFFFFFFFFFFFFFF for i in range(PALABRAS_POR_HORARIO)],
+        dtype=np.uint64
+    )
+
+def matriz_de_mascaras(mascaras: Iterable[int]) -> np.ndarray:
+    """Apila varias máscaras en una matriz (n x palabras) de uint64"""
+    filas = [mascara_a_palabras(mascara) for mascara in mascaras]
+    if not filas:
+        return np.zeros((0, PALABRAS_POR_HORARIO), dtype=np.uint64)
+    return np.vstack(filas)
+
+def cruces_vectorizados(matriz: np.ndarray, mascara: int) -> np.ndarray:
+    """
+    Indica, para cada fila de la matriz, si se cruza con la máscara dada
+    Un solo AND vectorizado sobre todas las filas
+    """
+    return np.any(matriz & mascara_a_palabras(mascara), axis=1)
+
+def combinar_mascaras(textos: Iterable[str]) -> int:
+    """Une los horarios de varios cursos en una sola máscara"""
+    mascara = 0
+    for texto in textos:
+        mascara |= mascara_horario(texto)
+    return mascara
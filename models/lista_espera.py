@@ -0,0 +1,78 @@
+"""
+Autor: Sistema de Matrículas Universitarias
+Módulo: Modelo Lista de Espera
+Descripción: Clase para representar la espera de un estudiante por un cupo
+Paradigmas: POO, Funcional
+"""
+
+from datetime import datetime
+from typing import Dict, Optional
+
+class EntradaListaEspera:
+    """
+    Clase para representar un estudiante en la lista de espera de un curso
+    La posición se calcula por orden de llegada dentro del curso y periodo
+    """
+    
+    def __init__(self, estudiante_codigo: str, curso_codigo: str,
+                 periodo_id: Optional[int] = None, posicion: Optional[int] = None):
+        """Constructor de la entrada de lista de espera"""
+        self._id = None  # Se asignará por la base de datos
+        self._estudiante_codigo = self._validar_codigo(estudiante_codigo)
+        self._curso_codigo = self._validar_codigo(curso_codigo)
+        self._periodo_id = periodo_id
+        self._posicion = posicion
+        self._fecha_solicitud = datetime.now()
+    
+    def _validar_codigo(self, codigo: str) -> str:
+        """Validación de códigos"""
+        if not codigo or not codigo.strip():
+            raise ValueError("El código no puede estar vacío")
+        return codigo.strip().upper()
+    
+    @property
+    def id(self) -> Optional[int]:
+        return self._id
+    
+    @id.setter
+    def id(self, value: int):
+        self._id = value
+    
+    @property
+    def estudiante_codigo(self) -> str:
+        return self._estudiante_codigo
+    
+    @property
+    def curso_codigo(self) -> str:
+        return self._curso_codigo
+    
+    @property
+    def periodo_id(self) -> Optional[int]:
+        return self._periodo_id
+    
+    @property
+    def posicion(self) -> Optional[int]:
+        return self._posicion
+    
+    @property
+    def fecha_solicitud(self) -> datetime:
+        return self._fecha_solicitud
+    
+    def to_dict(self) -> Dict:
+        """Convierte el objeto a diccionario"""
+        return {
+            'id': self.id,
+            'estudiante_codigo': self.estudiante_codigo,
+            'curso_codigo': self.curso_codigo,
+            'periodo_id': self.periodo_id,
+            'posicion': self.posicion,
+            'fecha_solicitud': self.fecha_solicitud.isoformat()
+        }
+    
+    def __str__(self) -> str:
+        """Representación en cadena de la entrada"""
+        return f"Espera: {self.estudiante_codigo} -> {self.curso_codigo} (posición {self.posicion})"
+    
+    def __repr__(self) -> str:
+        """Representación técnica del objeto"""
+        return f"EntradaListaEspera(estudiante='{self.estudiante_codigo}', curso='{self.curso_codigo}', posicion={self.posicion})"
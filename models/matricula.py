@@ -18,6 +18,20 @@ class EstadoMatricula(Enum):
     CANCELADA = "CANCELADA"
     COMPLETADA = "COMPLETADA"
 
+# Reglas de transición de estados: estado actual -> estados permitidos
+TRANSICIONES_VALIDAS = {
+    EstadoMatricula.ACTIVA: (EstadoMatricula.CANCELADA, EstadoMatricula.COMPLETADA),
+    EstadoMatricula.CANCELADA: (),  # No se puede cambiar desde cancelada
+    EstadoMatricula.COMPLETADA: ()  # No se puede cambiar desde completada
+}
+
+# Días completos desde la matrícula durante los que se permite cancelarla
+DIAS_LIMITE_CANCELACION = 30
+
+def estados_origen(nuevo_estado: EstadoMatricula) -> List[EstadoMatricula]:
+    """Estados desde los que se puede pasar a nuevo_estado"""
+    return [estado for estado, destinos in TRANSICIONES_VALIDAS.items() if nuevo_estado in destinos]
+
 class Matricula:
     """
     Clase para representar una matrícula
@@ -25,13 +39,15 @@ class Matricula:
     """
     
     def __init__(self, estudiante_codigo: str, curso_codigo: str, 
-                 estado: EstadoMatricula = EstadoMatricula.ACTIVA):
+                 estado: EstadoMatricula = EstadoMatricula.ACTIVA,
+                 periodo_id: Optional[int] = None):
         """Constructor de la clase Matrícula"""
         self._id = None  # Se asignará por la base de datos
         self._estudiante_codigo = self._validar_codigo(estudiante_codigo)
         self._curso_codigo = self._validar_codigo(curso_codigo)
         self._fecha_matricula = datetime.now()
         self._estado = estado
+        self._periodo_id = periodo_id
     
     def _validar_codigo(self, codigo: str) -> str:
         """Validación de códigos"""
@@ -63,19 +79,16 @@ class Matricula:
     def estado(self) -> EstadoMatricula:
         return self._estado
     
+    @property
+    def periodo_id(self) -> Optional[int]:
+        return self._periodo_id
+    
     def cambiar_estado(self, nuevo_estado: EstadoMatricula) -> bool:
         """
         Cambia el estado de la matrícula aplicando reglas de negocio
         Simulación de programación lógica con reglas
         """
-        # Reglas de transición de estados
-        transiciones_validas = {
-            EstadoMatricula.ACTIVA: [EstadoMatricula.CANCELADA, EstadoMatricula.COMPLETADA],
-            EstadoMatricula.CANCELADA: [],  # No se puede cambiar desde cancelada
-            EstadoMatricula.COMPLETADA: []  # No se puede cambiar desde completada
-        }
-        
-        if nuevo_estado in transiciones_validas.get(self._estado, []):
+        if nuevo_estado in TRANSICIONES_VALIDAS.get(self._estado, ()):
             self._estado = nuevo_estado
             return True
         return False
@@ -95,7 +108,8 @@ class Matricula:
             'estudiante_codigo': self.estudiante_codigo,
             'curso_codigo': self.curso_codigo,
             'fecha_matricula': self.fecha_matricula.isoformat(),
-            'estado': self.estado.value
+            'estado': self.estado.value,
+            'periodo_id': self.periodo_id
         }
     
     def __str__(self) -> str:
@@ -188,9 +202,9 @@ def validar_cancelacion_matricula(matricula: Matricula) -> Tuple[bool, str]:
     if not matricula.puede_ser_cancelada():
         return False, "La matrícula no está en estado activo"
     
-    # Regla: No se puede cancelar después de cierto tiempo (ejemplo: 30 días)
+    # Regla: No se puede cancelar después de DIAS_LIMITE_CANCELACION días
     dias_transcurridos = (datetime.now() - matricula.fecha_matricula).days
-    if dias_transcurridos > 30:
-        return False, "No se puede cancelar después de 30 días de la matrícula"
+    if dias_transcurridos > DIAS_LIMITE_CANCELACION:
+        return False, f"No se puede cancelar después de {DIAS_LIMITE_CANCELACION} días de la matrícula"
     
     return True, "La matrícula puede ser cancelada"
\ No newline at end of file
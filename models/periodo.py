@@ -0,0 +1,96 @@
+"""
+Autor: Sistema de Matrículas Universitarias
+Módulo: Modelo Periodo
+Descripción: Clase para representar periodos académicos
+Paradigmas: POO, Funcional
+"""
+
+from datetime import date
+from typing import List, Dict, Optional
+
+class Periodo:
+    """
+    Clase para representar un periodo académico (ciclo)
+    Las matrículas se registran dentro de un periodo
+    """
+    
+    def __init__(self, codigo: str, nombre: str, fecha_inicio: date, fecha_fin: date,
+                 actual: bool = False):
+        """Constructor de la clase Periodo"""
+        self._id = None  # Se asignará por la base de datos
+        self._codigo = self._validar_codigo(codigo)
+        self._nombre = nombre.strip() if nombre else self._codigo
+        self._fecha_inicio, self._fecha_fin = self._validar_fechas(fecha_inicio, fecha_fin)
+        self._actual = actual
+    
+    def _validar_codigo(self, codigo: str) -> str:
+        """Validación del código del periodo (ejemplo: 2024-1)"""
+        if not codigo or not codigo.strip():
+            raise ValueError("El código del periodo no puede estar vacío")
+        return codigo.strip().upper()
+    
+    def _validar_fechas(self, fecha_inicio: date, fecha_fin: date):
+        """Validación del rango de fechas del periodo"""
+        if not fecha_inicio or not fecha_fin:
+            raise ValueError("El periodo debe tener fecha de inicio y fin")
+        if fecha_fin <= fecha_inicio:
+            raise ValueError("La fecha de fin debe ser posterior a la fecha de inicio")
+        return fecha_inicio, fecha_fin
+    
+    @property
+    def id(self) -> Optional[int]:
+        return self._id
+    
+    @id.setter
+    def id(self, value: int):
+        self._id = value
+    
+    @property
+    def codigo(self) -> str:
+        return self._codigo
+    
+    @property
+    def nombre(self) -> str:
+        return self._nombre
+    
+    @property
+    def fecha_inicio(self) -> date:
+        return self._fecha_inicio
+    
+    @property
+    def fecha_fin(self) -> date:
+        return self._fecha_fin
+    
+    @property
+    def actual(self) -> bool:
+        return self._actual
+    
+    def contiene_fecha(self, fecha: date) -> bool:
+        """Predicado: verifica si una fecha pertenece al periodo"""
+        return self._fecha_inicio <= fecha <= self._fecha_fin
+    
+    def to_dict(self) -> Dict:
+        """Convierte el objeto a diccionario"""
+        return {
+            'id': self.id,
+            'codigo': self.codigo,
+            'nombre': self.nombre,
+            'fecha_inicio': self.fecha_inicio.isoformat(),
+            'fecha_fin': self.fecha_fin.isoformat(),
+            'actual': self.actual
+        }
+    
+    def __str__(self) -> str:
+        """Representación en cadena del periodo"""
+        return f"{self.codigo} - {self.nombre} ({self.fecha_inicio} a {self.fecha_fin})"
+    
+    def __repr__(self) -> str:
+        """Representación técnica del objeto"""
+        return f"Periodo(codigo='{self.codigo}', actual={self.actual})"
+
+# Funciones de orden superior para manejo de periodos
+def obtener_periodo_de_fecha(periodos: List[Periodo], fecha: date) -> Optional[Periodo]:
+    """
+    Programación funcional: retorna el periodo que contiene una fecha
+    """
+    return next(filter(lambda p: p.contiene_fecha(fecha), periodos), None)
@@ -0,0 +1,78 @@
+"""
+Autor: Sistema de Matrículas Universitarias
+Módulo: Modelo Prerrequisito
+Descripción: Clase para representar un prerrequisito entre cursos
+Paradigmas: POO, Funcional
+"""
+
+from typing import Dict, Optional
+
+class Prerrequisito:
+    """
+    Clase para representar que un curso requiere haber completado otro
+    Los requisitos de un mismo grupo son alternativos (basta uno);
+    todos los grupos de un curso deben cumplirse
+    """
+    
+    def __init__(self, curso_codigo: str, requisito_codigo: str, grupo: int = 1):
+        """Constructor de la clase Prerrequisito"""
+        self._id = None  # Se asignará por la base de datos
+        self._curso_codigo = self._validar_codigo(curso_codigo)
+        self._requisito_codigo = self._validar_codigo(requisito_codigo)
+        self._grupo = self._validar_grupo(grupo)
+        
+        if self._curso_codigo == self._requisito_codigo:
+            raise ValueError("Un curso no puede ser prerrequisito de sí mismo")
+    
+    def _validar_codigo(self, codigo: str) -> str:
+        """Validación de códigos de curso"""
+        if not codigo or not codigo.strip():
+            raise ValueError("El código del curso no puede estar vacío")
+        return codigo.strip().upper()
+    
+    def _validar_grupo(self, grupo: int) -> int:
+        """Validación del grupo de alternativas"""
+        if not isinstance(grupo, int) or grupo < 1:
+            raise ValueError("El grupo debe ser un entero positivo")
+        return grupo
+    
+    @property
+    def id(self) -> Optional[int]:
+        return self._id
+    
+    @id.setter
+    def id(self, value: int):
+        self._id = value
+    
+    @property
+    def curso_codigo(self) -> str:
+        return self._curso_codigo
+    
+    @property
+    def requisito_codigo(self) -> str:
+        return self._requisito_codigo
+    
+    @property
+    def grupo(self) -> int:
+        return self._grupo
+    
+    @grupo.setter
+    def grupo(self, value: int):
+        self._grupo = self._validar_grupo(value)
+    
+    def to_dict(self) -> Dict:
+        """Convierte el objeto a diccionario"""
+        return {
+            'id': self.id,
+            'curso_codigo': self.curso_codigo,
+            'requisito_codigo': self.requisito_codigo,
+            'grupo': self.grupo
+        }
+    
+    def __str__(self) -> str:
+        """Representación en cadena del prerrequisito"""
+        return f"{self.curso_codigo} requiere {self.requisito_codigo} (grupo {self.grupo})"
+    
+    def __repr__(self) -> str:
+        """Representación técnica del objeto"""
+        return f"Prerrequisito(curso='{self.curso_codigo}', requisito='{self.requisito_codigo}', grupo={self.grupo})"
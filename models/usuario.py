@@ -8,7 +8,7 @@ Paradigmas: POO, Funcional
 from datetime import datetime
 from typing import Dict, Optional
 from enum import Enum
-import hashlib
+from utils.contrasenas import hashear_password, verificar_hash, requiere_rehash
 import re
 
 class RolUsuario(Enum):
@@ -48,15 +48,27 @@ class Usuario:
         return email.lower()
     
     def _hash_password(self, password: str) -> str:
-        """Hash de la contraseña usando SHA-256"""
+        """Hash de la contraseña con sal usando el hasher configurado (scrypt o PBKDF2)"""
         if not password or len(password) < 6:
             raise ValueError("La contraseña debe tener al menos 6 caracteres")
         
-        return hashlib.sha256(password.encode()).hexdigest()
+        return hashear_password(password)
     
     def verificar_password(self, password: str) -> bool:
-        """Verifica si la contraseña es correcta"""
-        return self._password_hash == self._hash_password(password)
+        """Verifica si la contraseña es correcta (acepta hashes SHA-256 heredados)"""
+        return verificar_hash(password, self._password_hash)
+    
+    def necesita_rehash(self) -> bool:
+        """Predicado: el hash guardado es heredado o usa un costo distinto al configurado"""
+        return requiere_rehash(self._password_hash)
+    
+    def rehashear_password(self, password: str) -> str:
+        """
+        Regenera el hash con el hasher configurado
+        Solo debe llamarse tras verificar la contraseña; retorna el hash nuevo
+        """
+        self._password_hash = hashear_password(password)
+        return self._password_hash
     
     def es_administrador(self) -> bool:
         """Predicado: verifica si el usuario es administrador"""
@@ -86,6 +98,10 @@ class Usuario:
     def email(self) -> str:
         return self._email
     
+    @property
+    def password_hash(self) -> str:
+        return self._password_hash
+    
     @property
     def rol(self) -> RolUsuario:
         return self._rol
@@ -0,0 +1,77 @@
+"""
+Autor: Sistema de Matrículas Universitarias
+Módulo: Servicio de Archivo
+Descripción: Archivado por lotes de matrículas finalizadas
+Paradigmas: POO, Imperativo
+"""
+
+from datetime import datetime
+from typing import Dict, Optional
+from dao.matricula_dao import MatriculaDAO
+from dao.periodo_dao import PeriodoDAO
+import logging
+import time
+
+class ArchivoService:
+    """
+    Servicio que traslada el historial de matrículas a la tabla de archivo
+    Trabaja en lotes pequeños con pausas para no competir con la operación diaria
+    """
+    
+    def __init__(self):
+        """Constructor del servicio de archivo"""
+        self.matricula_dao = MatriculaDAO()
+        self.periodo_dao = PeriodoDAO()
+        self.logger = logging.getLogger(__name__)
+    
+    def archivar_periodo(self, periodo_codigo: str, tamano_lote: int = 1000,
+                         pausa: float = 0.5, max_lotes: Optional[int] = None) -> Dict:
+        """
+        Archiva las matrículas finalizadas de un periodo cerrado
+        El periodo actual no se puede archivar
+        """
+        periodo = self.periodo_dao.find_by_codigo(periodo_codigo)
+        if not periodo:
+            raise ValueError(f"Periodo {periodo_codigo} no encontrado")
+        if periodo.actual:
+            raise ValueError("No se puede archivar el periodo actual")
+        
+        return self.archivar_historial(None, tamano_lote, pausa, max_lotes, periodo_id=periodo.id)
+    
+    def archivar_historial(self, hasta: Optional[datetime], tamano_lote: int = 1000,
+                           pausa: float = 0.5, max_lotes: Optional[int] = None,
+                           periodo_id: Optional[int] = None) -> Dict:
+        """
+        Archiva matrículas canceladas o completadas anteriores a 'hasta'
+        y/o pertenecientes a un periodo
+        Cada lote es una transacción corta; entre lotes se espera 'pausa' segundos
+        """
+        if tamano_lote <= 0:
+            raise ValueError("El tamaño de lote debe ser mayor que cero")
+        
+        total_archivadas = 0
+        lotes = 0
+        inicio = time.monotonic()
+        
+        while max_lotes is None or lotes < max_lotes:
+            archivadas = self.matricula_dao.archive_batch(hasta, tamano_lote, periodo_id)
+            if archivadas == 0:
+                break
+            
+            total_archivadas += archivadas
+            lotes += 1
+            
+            # Un lote incompleto indica que no quedan más filas
+            if archivadas < tamano_lote:
+                break
+            
+            time.sleep(pausa)
+        
+        duracion = round(time.monotonic() - inicio, 2)
+        self.logger.info(f"Archivado completado: {total_archivadas} matrículas en {lotes} lotes ({duracion}s)")
+        
+        return {
+            'matriculas_archivadas': total_archivadas,
+            'lotes': lotes,
+            'duracion_segundos': duracion
+        }
@@ -9,84 +9,180 @@ from typing import Optional, Tuple, Dict
 from models.usuario import Usuario, RolUsuario, es_email_utp, validar_estudiante_utp
 from dao.usuario_dao import UsuarioDAO
 from dao.estudiante_dao import EstudianteDAO
+from services.sesiones import AlmacenSesiones, Sesion
+from services.limitador_login import LimitadorLogin
+from utils.contrasenas import VerificadorContrasenas, obtener_verificador, hashear_password, verificar_hash
 import logging
+import math
+import secrets
 
 class AuthService:
     """
     Servicio que maneja la autenticación y autorización
     Implementa reglas de negocio para login y permisos
+    Cada login abre una sesión identificada por un token opaco; las
+    verificaciones de permisos reciben el token o, si no se indica, usan
+    la sesión actual de la aplicación de escritorio
     """
     
-    def __init__(self):
-        """Constructor del servicio de autenticación"""
+    # Segundos de inactividad tras los que vence una sesión
+    TTL_SESION = 30 * 60
+    
+    def __init__(self, ruta_sesiones: Optional[str] = None,
+                 verificador: Optional[VerificadorContrasenas] = None,
+                 limitador: Optional[LimitadorLogin] = None):
+        """
+        Constructor del servicio de autenticación
+        Con ruta_sesiones las sesiones se conservan en SQLite entre reinicios
+        El hash de contraseñas corre en el pool acotado del verificador
+        (por defecto, el compartido por todo el proceso)
+        """
         self.usuario_dao = UsuarioDAO()
         self.estudiante_dao = EstudianteDAO()
         self.logger = logging.getLogger(__name__)
+        self.sesiones = AlmacenSesiones(self.TTL_SESION, ruta_sesiones)
+        self.verificador = verificador or obtener_verificador()
+        self.limitador = limitador or LimitadorLogin()
+        self._hash_senuelo = None
         self._usuario_actual = None
+        self._token_actual = None
     
-    def login(self, email: str, password: str) -> Tuple[bool, str, Optional[Usuario]]:
+    def login(self, email: str, password: str, origen: Optional[str] = None,
+              validar_estudiante: bool = True) -> Tuple[bool, str, Optional[Usuario]]:
         """
-        Autentica un usuario en el sistema
+        Autentica un usuario en el sistema y lo deja como sesión actual
         Retorna (éxito, mensaje, usuario)
         """
+        exito, mensaje, usuario, token = self.iniciar_sesion(email, password, origen, validar_estudiante)
+        if exito:
+            self.sesiones.eliminar(self._token_actual)
+            self._usuario_actual = usuario
+            self._token_actual = token
+        return exito, mensaje, usuario
+    
+    def iniciar_sesion(self, email: str, password: str, origen: Optional[str] = None,
+                       validar_estudiante: bool = True) -> Tuple[bool, str, Optional[Usuario], Optional[str]]:
+        """
+        Autentica un usuario y abre una sesión propia
+        Varios usuarios pueden tener sesiones abiertas en el mismo proceso
+        origen identifica la fuente del intento (p. ej. la IP) para limitarla
+        Con validar_estudiante=False se omiten las reglas propias de los
+        estudiantes (email @utp.edu.pe, código y registro de estudiante)
+        Retorna (éxito, mensaje, usuario, token)
+        """
         try:
             if not email or not password:
-                return False, "Email y contraseña son requeridos", None
+                return False, "Email y contraseña son requeridos", None, None
+            
+            # El limitador rechaza antes de consultar la base de datos o calcular hashes
+            permitido, espera = self.limitador.permitir(email, origen)
+            if not permitido:
+                return False, f"Demasiados intentos, intente nuevamente en {math.ceil(espera)} segundos", None, None
+            
+            # Una sola consulta trae el usuario, su hash y el estudiante vinculado
+            encontrado = self.usuario_dao.find_for_login(email)
+            if not encontrado:
+                # Mismo costo que con un email existente, para no revelar cuáles existen
+                self.verificador.ejecutar(verificar_hash, password, self._obtener_hash_senuelo())
+                self.limitador.registrar_fallo(email, origen)
+                return False, "Credenciales inválidas", None, None
             
-            # Intentar autenticar
-            usuario = self.usuario_dao.authenticate(email, password)
+            usuario, estudiante_existe = encontrado
+            if not self.verificador.ejecutar(usuario.verificar_password, password):
+                self.limitador.registrar_fallo(email, origen)
+                return False, "Credenciales inválidas", None, None
             
-            if not usuario:
-                return False, "Credenciales inválidas", None
+            self.limitador.registrar_exito(email)
+            if usuario.necesita_rehash():
+                self._actualizar_hash(usuario, password)
             
             if not usuario.activo:
-                return False, "Usuario desactivado", None
+                return False, "Usuario desactivado", None, None
             
             # Validaciones específicas para estudiantes
-            if usuario.es_estudiante():
+            if validar_estudiante and usuario.es_estudiante():
                 if not es_email_utp(email):
-                    return False, "Los estudiantes deben usar email @utp.edu.pe", None
+                    return False, "Los estudiantes deben usar email @utp.edu.pe", None, None
                 
                 if not usuario.codigo_estudiante:
-                    return False, "Estudiante sin código asignado", None
+                    return False, "Estudiante sin código asignado", None, None
                 
-                # Verificar que el estudiante existe en la base de datos
-                estudiante = self.estudiante_dao.find_by_codigo(usuario.codigo_estudiante)
-                if not estudiante:
-                    return False, "Estudiante no encontrado en el sistema", None
+                if not estudiante_existe:
+                    return False, "Estudiante no encontrado en el sistema", None, None
             
-            self._usuario_actual = usuario
+            token = self.sesiones.crear(usuario)
             self.logger.info(f"Login exitoso: {usuario.email} ({usuario.rol.value})")
             
-            return True, f"Bienvenido {usuario.nombre or usuario.email}", usuario
+            return True, f"Bienvenido {usuario.nombre or usuario.email}", usuario, token
             
+        except TimeoutError:
+            self.logger.warning("Login rechazado: pool de verificación de contraseñas saturado")
+            return False, "Servidor ocupado, intente nuevamente en unos segundos", None, None
         except Exception as e:
             self.logger.error(f"Error en login: {e}")
-            return False, f"Error interno: {str(e)}", None
+            return False, f"Error interno: {str(e)}", None, None
+    
+    def _actualizar_hash(self, usuario: Usuario, password: str):
+        """
+        Reemplaza un hash SHA-256 heredado (o de un costo anterior) por uno
+        con el hasher configurado; un fallo se registra y no impide el login
+        """
+        try:
+            hash_anterior = usuario.password_hash
+            hash_nuevo = self.verificador.ejecutar(usuario.rehashear_password, password)
+            if self.usuario_dao.update_password_hash(usuario.id, hash_anterior, hash_nuevo):
+                self.logger.info(f"Hash de contraseña actualizado: {usuario.email}")
+        except Exception as e:
+            self.logger.warning(f"No se pudo actualizar el hash de {usuario.email}: {e}")
     
-    def logout(self):
-        """Cierra la sesión del usuario actual"""
-        if self._usuario_actual:
-            self.logger.info(f"Logout: {self._usuario_actual.email}")
+    def _obtener_hash_senuelo(self) -> str:
+        """Hash de una contraseña aleatoria, con el costo configurado"""
+        if self._hash_senuelo is None:
+            self._hash_senuelo = self.verificador.ejecutar(hashear_password, secrets.token_urlsafe(16))
+        return self._hash_senuelo
+    
+    def logout(self, token: Optional[str] = None):
+        """Cierra la sesión indicada o, por defecto, la sesión actual"""
+        if token is None or token == self._token_actual:
+            token = self._token_actual
             self._usuario_actual = None
+            self._token_actual = None
+        
+        sesion = self.sesiones.obtener(token)
+        if sesion:
+            self.logger.info(f"Logout: {sesion.email}")
+            self.sesiones.eliminar(token)
+    
+    def obtener_sesion(self, token: Optional[str] = None) -> Optional[Sesion]:
+        """
+        Retorna la sesión vigente del token (o la sesión actual) y extiende su vencimiento
+        Retorna None si no hay sesión o venció
+        """
+        return self.sesiones.obtener(token if token is not None else self._token_actual)
     
     def get_usuario_actual(self) -> Optional[Usuario]:
-        """Retorna el usuario actualmente logueado"""
+        """Retorna el usuario de la sesión actual, si sigue vigente"""
+        if self.obtener_sesion() is None:
+            return None
         return self._usuario_actual
     
-    def esta_logueado(self) -> bool:
-        """Predicado: verifica si hay un usuario logueado"""
-        return self._usuario_actual is not None
+    def get_token_actual(self) -> Optional[str]:
+        """Retorna el token de la sesión actual"""
+        return self._token_actual
+    
+    def esta_logueado(self, token: Optional[str] = None) -> bool:
+        """Predicado: verifica si hay una sesión vigente"""
+        return self.obtener_sesion(token) is not None
     
-    def es_administrador_actual(self) -> bool:
-        """Predicado: verifica si el usuario actual es administrador"""
-        return (self._usuario_actual is not None and 
-                self._usuario_actual.puede_acceder_admin())
+    def es_administrador_actual(self, token: Optional[str] = None) -> bool:
+        """Predicado: verifica si la sesión pertenece a un administrador"""
+        sesion = self.obtener_sesion(token)
+        return sesion is not None and sesion.es_administrador()
     
-    def es_estudiante_actual(self) -> bool:
-        """Predicado: verifica si el usuario actual es estudiante"""
-        return (self._usuario_actual is not None and 
-                self._usuario_actual.puede_matricularse())
+    def es_estudiante_actual(self, token: Optional[str] = None) -> bool:
+        """Predicado: verifica si la sesión pertenece a un estudiante"""
+        sesion = self.obtener_sesion(token)
+        return sesion is not None and sesion.es_estudiante()
     
     def crear_usuario_admin(self, email: str, password: str, 
                            nombre: str = "", apellido: str = "") -> Tuple[bool, str]:
@@ -135,39 +231,36 @@ class AuthService:
             self.logger.error(f"Error creando estudiante: {e}")
             return False, f"Error: {str(e)}"
     
-    def verificar_permisos_admin(self) -> Tuple[bool, str]:
-        """Verifica si el usuario actual tiene permisos de administrador"""
-        if not self.esta_logueado():
+    def verificar_permisos_admin(self, token: Optional[str] = None) -> Tuple[bool, str]:
+        """Verifica si la sesión tiene permisos de administrador"""
+        sesion = self.obtener_sesion(token)
+        if sesion is None:
             return False, "Debe iniciar sesión"
         
-        if not self.es_administrador_actual():
+        if not sesion.es_administrador():
             return False, "Acceso denegado: se requieren permisos de administrador"
         
         return True, "Permisos verificados"
     
-    def verificar_permisos_estudiante(self) -> Tuple[bool, str]:
-        """Verifica si el usuario actual es un estudiante válido"""
-        if not self.esta_logueado():
+    def verificar_permisos_estudiante(self, token: Optional[str] = None) -> Tuple[bool, str]:
+        """Verifica si la sesión pertenece a un estudiante válido"""
+        sesion = self.obtener_sesion(token)
+        if sesion is None:
             return False, "Debe iniciar sesión"
         
-        if not self.es_estudiante_actual():
+        if not sesion.es_estudiante():
             return False, "Acceso denegado: solo para estudiantes"
         
         return True, "Permisos verificados"
     
-    def get_info_usuario_actual(self) -> Dict:
-        """Retorna información del usuario actual"""
-        if not self._usuario_actual:
+    def metricas_login(self) -> Dict:
+        """Métricas del limitador: intentos permitidos, rechazados y bloqueos"""
+        return self.limitador.metricas()
+    
+    def get_info_usuario_actual(self, token: Optional[str] = None) -> Dict:
+        """Retorna información del usuario de la sesión"""
+        sesion = self.obtener_sesion(token)
+        if sesion is None:
             return {}
         
-        info = {
-            'email': self._usuario_actual.email,
-            'rol': self._usuario_actual.rol.value,
-            'nombre': self._usuario_actual.nombre,
-            'apellido': self._usuario_actual.apellido
-        }
-        
-        if self._usuario_actual.es_estudiante():
-            info['codigo_estudiante'] = self._usuario_actual.codigo_estudiante
-        
-        return info
\ No newline at end of file
+        return sesion.to_dict()
@@ -0,0 +1,168 @@
+"""
+Autor: Sistema de Matrículas Universitarias
+Módulo: Cache del Catálogo
+Descripción: Cache en memoria con TTL, recarga única por clave y servicio de valores obsoletos
+Paradigmas: POO, Concurrente
+"""
+
+from typing import Any, Callable, Dict, Hashable, Optional
+import logging
+import threading
+import time
+
+class _EntradaCache:
+    """Valor cacheado con su momento de carga y su estado de recarga"""
+    
+    def __init__(self):
+        """Constructor de la entrada"""
+        self.valor: Any = None
+        self.tiene_valor = False
+        self.cargado = 0.0
+        self.expira = 0.0
+        self.recargando = False
+        self.listo = threading.Event()
+        self.error: Optional[Exception] = None
+        # Aumenta con cada invalidación; una recarga iniciada antes queda obsoleta
+        self.generacion = 0
+
+class CacheCatalogo:
+    """
+    Cache de lecturas del catálogo de cursos
+    - TTL corto por clave
+    - Una sola recarga concurrente por clave (singleflight): las demás
+      solicitudes esperan su resultado en lugar de repetir la consulta
+    - Stale-while-revalidate: con un valor vencido se responde con él
+      mientras un hilo lo recarga, hasta max_obsoleto segundos
+    - Una recarga que termina después de invalidar() se publica ya vencida:
+      es más nueva que el valor cacheado, pero pudo leer los datos anteriores
+      a la invalidación, así que la siguiente lectura vuelve a recargar
+    """
+    
+    def __init__(self, ttl: float = 5.0, max_obsoleto: float = 30.0):
+        """Constructor del cache"""
+        self.ttl = ttl
+        self.max_obsoleto = max_obsoleto
+        self.logger = logging.getLogger(__name__)
+        self._entradas: Dict[Hashable, _EntradaCache] = {}
+        self._lock = threading.Lock()
+        
+        # Métricas
+        self._aciertos = 0
+        self._fallos = 0
+        self._obsoletos = 0
+        self._recargas = 0
+        self._errores = 0
+        self._recargas_vencidas = 0
+        self._antiguedad_total = 0.0
+        self._antiguedad_maxima = 0.0
+    
+    def obtener(self, clave: Hashable, cargador: Callable[[], Any]) -> Any:
+        """
+        Retorna el valor de la clave, cargándolo con cargador() si hace falta
+        """
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._entradas.setdefault(clave, _EntradaCache())
+            
+            if entrada.tiene_valor and ahora < entrada.expira:
+                self._aciertos += 1
+                return entrada.valor
+            
+            if entrada.tiene_valor and ahora - entrada.expira < self.max_obsoleto:
+                # Valor vencido pero aceptable: se sirve y se recarga en segundo plano
+                antiguedad = ahora - entrada.cargado
+                self._obsoletos += 1
+                self._antiguedad_total += antiguedad
+                self._antiguedad_maxima = max(self._antiguedad_maxima, antiguedad)
+                if not entrada.recargando:
+                    self._iniciar_recarga(entrada)
+                    threading.Thread(target=self._recargar, args=(entrada, cargador, entrada.generacion),
+                                     daemon=True).start()
+                return entrada.valor
+            
+            self._fallos += 1
+            propietario = not entrada.recargando
+            if propietario:
+                self._iniciar_recarga(entrada)
+            evento = entrada.listo
+            generacion = entrada.generacion
+        
+        if propietario:
+            self._recargar(entrada, cargador, generacion)
+        else:
+            evento.wait()
+        
+        with self._lock:
+            if entrada.error is not None:
+                raise entrada.error
+            return entrada.valor
+    
+    def _iniciar_recarga(self, entrada: _EntradaCache):
+        """Marca la entrada en recarga (requiere el lock)"""
+        entrada.recargando = True
+        entrada.error = None
+        entrada.listo = threading.Event()
+    
+    def _recargar(self, entrada: _EntradaCache, cargador: Callable[[], Any], generacion: int):
+        """
+        Ejecuta el cargador y publica el resultado a quienes esperan
+        Si la entrada se invalidó durante la carga (cambió su generación), el
+        resultado igual reemplaza al valor anterior, que es más viejo, pero
+        queda vencido: se sirve como obsoleto mientras otra recarga lo renueva
+        """
+        try:
+            valor = cargador()
+            ahora = time.monotonic()
+            with self._lock:
+                self._recargas += 1
+                entrada.valor = valor
+                entrada.tiene_valor = True
+                entrada.cargado = ahora
+                if entrada.generacion != generacion:
+                    self._recargas_vencidas += 1
+                    entrada.expira = ahora
+                else:
+                    entrada.expira = ahora + self.ttl
+        except Exception as e:
+            self.logger.error(f"Error recargando cache del catálogo: {e}")
+            with self._lock:
+                entrada.error = e
+                self._errores += 1
+        finally:
+            with self._lock:
+                entrada.recargando = False
+                entrada.listo.set()
+    
+    def invalidar(self, clave: Hashable = None):
+        """
+        Marca como vencida una clave (o todas)
+        El valor anterior se sigue sirviendo mientras se recarga
+        """
+        ahora = time.monotonic()
+        with self._lock:
+            entradas = self._entradas.values() if clave is None else filter(None, [self._entradas.get(clave)])
+            for entrada in entradas:
+                entrada.expira = min(entrada.expira, ahora)
+                entrada.generacion += 1
+    
+    def limpiar(self):
+        """Descarta todos los valores cacheados"""
+        with self._lock:
+            self._entradas.clear()
+    
+    def metricas(self) -> Dict:
+        """Métricas de uso del cache"""
+        with self._lock:
+            total = self._aciertos + self._obsoletos + self._fallos
+            return {
+                'aciertos': self._aciertos,
+                'obsoletos_servidos': self._obsoletos,
+                'fallos': self._fallos,
+                'recargas': self._recargas,
+                'errores': self._errores,
+                'recargas_vencidas': self._recargas_vencidas,
+                'tasa_aciertos': round((self._aciertos + self._obsoletos) / total * 100, 2) if total > 0 else 0,
+                'antiguedad_promedio_s': round(self._antiguedad_total / self._obsoletos, 3) if self._obsoletos else 0,
+                'antiguedad_maxima_s': round(self._antiguedad_maxima, 3),
+                'claves': len(self._entradas)
+            }
@@ -0,0 +1,244 @@
+"""
+Autor: Sistema de Matrículas Universitarias
+Módulo: Cola de Admisión
+Descripción: Cola por curso que agrupa las solicitudes de matrícula durante la apertura
+Paradigmas: POO, Concurrente
+"""
+
+from collections import deque
+from typing import Dict, Optional, Set, Tuple
+import logging
+import queue
+import threading
+import time
+
+class SolicitudAdmision:
+    """
+    Solicitud de matrícula en espera dentro de la cola de un curso
+    El solicitante espera el evento hasta que el worker publique el resultado
+    """
+    
+    def __init__(self, estudiante_codigo: str, curso_codigo: str):
+        """Constructor de la solicitud"""
+        self.estudiante_codigo = estudiante_codigo
+        self.curso_codigo = curso_codigo
+        self.encolada = time.monotonic()
+        self.resultado: Optional[Tuple[bool, str]] = None
+        self.evento = threading.Event()
+        self._lock = threading.Lock()
+        self._tomada = False
+        self._expirada = False
+    
+    def tomar(self) -> bool:
+        """El worker toma la solicitud si el solicitante no abandonó la espera"""
+        with self._lock:
+            if self._expirada:
+                return False
+            self._tomada = True
+            return True
+    
+    def expirar(self) -> bool:
+        """El solicitante abandona la espera si el worker aún no la tomó"""
+        with self._lock:
+            if self._tomada:
+                return False
+            self._expirada = True
+            return True
+    
+    def resolver(self, resultado: Tuple[bool, str]):
+        """Publica el resultado y despierta al solicitante"""
+        self.resultado = resultado
+        self.evento.set()
+
+class ColaAdmision:
+    """
+    Capa de admisión en proceso para la apertura de matrículas
+    Cada curso tiene una cola FIFO acotada que un pool fijo de workers vacía
+    en micro-lotes con MatriculaService.matricular_lote
+    - Un curso con solicitudes pendientes se agenda una sola vez, por lo que
+      a lo sumo un worker procesa sus lotes y estos no compiten entre sí por
+      la fila del curso
+    - Tras cada lote el curso vuelve al final de la agenda si le quedan
+      solicitudes; si su cola quedó vacía se descarta
+    """
+    
+    def __init__(self, matricula_service=None, capacidad_cola: int = 500,
+                 tamano_lote: int = 50, timeout: float = 10.0, hilos: int = 4):
+        """Constructor de la cola de admisión"""
+        if matricula_service is None:
+            from services.matricula_service import MatriculaService
+            matricula_service = MatriculaService()
+        
+        self.matricula_service = matricula_service
+        self.capacidad_cola = capacidad_cola
+        self.tamano_lote = tamano_lote
+        self.timeout = timeout
+        self.logger = logging.getLogger(__name__)
+        
+        self._colas: Dict[str, queue.Queue] = {}
+        self._agendados: Set[str] = set()
+        self._listos: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._detenida = threading.Event()
+        
+        # Métricas
+        self._metricas_lock = threading.Lock()
+        self._contadores = {
+            'recibidas': 0,
+            'rechazadas_cola_llena': 0,
+            'expiradas': 0,
+            'procesadas': 0,
+            'exitosas': 0,
+            'lotes': 0
+        }
+        self._esperas = deque(maxlen=1000)
+        
+        self._workers = [
+            threading.Thread(target=self._trabajar, name=f"admision-{i}", daemon=True)
+            for i in range(max(1, hilos))
+        ]
+        for worker in self._workers:
+            worker.start()
+    
+    def solicitar(self, estudiante_codigo: str, curso_codigo: str,
+                  timeout: Optional[float] = None) -> Tuple[bool, str]:
+        """
+        Encola una solicitud de matrícula y espera su resultado
+        Rechaza de inmediato si la cola del curso está llena
+        """
+        if self._detenida.is_set():
+            return False, "La cola de admisión está detenida"
+        
+        curso_codigo = curso_codigo.strip().upper()
+        solicitud = SolicitudAdmision(estudiante_codigo.strip().upper(), curso_codigo)
+        self._incrementar('recibidas')
+        
+        with self._lock:
+            if self._detenida.is_set():
+                return False, "La cola de admisión está detenida"
+            cola = self._colas.get(curso_codigo)
+            if cola is None:
+                cola = self._colas[curso_codigo] = queue.Queue(maxsize=self.capacidad_cola)
+            try:
+                cola.put_nowait(solicitud)
+            except queue.Full:
+                self._incrementar('rechazadas_cola_llena')
+                return False, f"Hay demasiadas solicitudes para el curso {curso_codigo}, intente nuevamente"
+            if curso_codigo not in self._agendados:
+                self._agendados.add(curso_codigo)
+                self._listos.put(curso_codigo)
+        
+        if solicitud.evento.wait(self.timeout if timeout is None else timeout):
+            return solicitud.resultado
+        
+        if solicitud.expirar():
+            self._incrementar('expiradas')
+            return False, "Tiempo de espera agotado, la solicitud no fue procesada"
+        
+        # El worker ya la está procesando: esperar el resultado del lote en curso
+        solicitud.evento.wait()
+        return solicitud.resultado
+    
+    def metricas(self) -> Dict:
+        """Retorna contadores, colas pendientes y tiempos de espera observados"""
+        with self._metricas_lock:
+            metricas = dict(self._contadores)
+            esperas = sorted(self._esperas)
+        
+        with self._lock:
+            metricas['pendientes_por_curso'] = {
+                codigo: cola.qsize() for codigo, cola in self._colas.items()
+            }
+        metricas['workers'] = len(self._workers)
+        
+        if esperas:
+            metricas['espera_promedio_ms'] = round(sum(esperas) / len(esperas) * 1000, 2)
+            metricas['espera_p95_ms'] = round(esperas[min(len(esperas) - 1, int(len(esperas) * 0.95))] * 1000, 2)
+        else:
+            metricas['espera_promedio_ms'] = 0
+            metricas['espera_p95_ms'] = 0
+        
+        return metricas
+    
+    def detener(self):
+        """Detiene los workers; las solicitudes pendientes reciben un rechazo"""
+        self._detenida.set()
+        for _ in self._workers:
+            self._listos.put(None)
+        for worker in self._workers:
+            worker.join(timeout=self.timeout)
+        
+        # Rechazar lo que quedó en cola al detener
+        with self._lock:
+            colas = list(self._colas.values())
+            self._colas.clear()
+            self._agendados.clear()
+        for cola in colas:
+            while True:
+                try:
+                    solicitud = cola.get_nowait()
+                except queue.Empty:
+                    break
+                if solicitud.tomar():
+                    solicitud.resolver((False, "La cola de admisión está detenida"))
+    
+    def _trabajar(self):
+        """Worker del pool: atiende un lote del próximo curso agendado"""
+        while True:
+            curso_codigo = self._listos.get()
+            if curso_codigo is None or self._detenida.is_set():
+                break
+            
+            with self._lock:
+                cola = self._colas.get(curso_codigo)
+            if cola is not None:
+                self._procesar_lote(curso_codigo, cola)
+            
+            with self._lock:
+                if self._detenida.is_set():
+                    break
+                if cola is not None and not cola.empty():
+                    self._listos.put(curso_codigo)
+                else:
+                    self._agendados.discard(curso_codigo)
+                    self._colas.pop(curso_codigo, None)
+    
+    def _procesar_lote(self, curso_codigo: str, cola: queue.Queue):
+        """
+        Toma hasta 'tamano_lote' solicitudes del curso en orden de llegada
+        y las matricula con una sola llamada a matricular_lote
+        """
+        lote = []
+        while len(lote) < self.tamano_lote:
+            try:
+                lote.append(cola.get_nowait())
+            except queue.Empty:
+                break
+        
+        # Descartar solicitudes cuyo solicitante ya dejó de esperar
+        lote = [solicitud for solicitud in lote if solicitud.tomar()]
+        if not lote:
+            return
+        
+        ahora = time.monotonic()
+        try:
+            resultados = self.matricula_service.matricular_lote(
+                [(s.estudiante_codigo, s.curso_codigo) for s in lote]
+            )
+        except Exception as e:
+            self.logger.error(f"Error procesando lote de {curso_codigo}: {e}")
+            resultados = [(False, f"Error interno: {str(e)}")] * len(lote)
+        
+        for solicitud, resultado in zip(lote, resultados):
+            solicitud.resolver(resultado)
+        
+        with self._metricas_lock:
+            self._contadores['lotes'] += 1
+            self._contadores['procesadas'] += len(lote)
+            self._contadores['exitosas'] += sum(1 for exito, _ in resultados if exito)
+            self._esperas.extend(ahora - s.encolada for s in lote)
+    
+    def _incrementar(self, contador: str):
+        """Incrementa un contador de métricas"""
+        with self._metricas_lock:
+            self._contadores[contador] += 1
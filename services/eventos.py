@@ -0,0 +1,144 @@
+"""
+Autor: Sistema de Matrículas Universitarias
+Módulo: Eventos de Dominio
+Descripción: Bus de eventos en proceso para cambios de matrícula
+Paradigmas: POO, Concurrente
+"""
+
+from datetime import datetime
+from enum import Enum
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+import queue
+import threading
+
+class TipoEvento(Enum):
+    """Enumeración de los eventos publicados por el servicio de matrículas"""
+    MATRICULA_CREADA = "MATRICULA_CREADA"
+    MATRICULA_CANCELADA = "MATRICULA_CANCELADA"
+    MATRICULA_COMPLETADA = "MATRICULA_COMPLETADA"
+    CUPOS_ACTUALIZADOS = "CUPOS_ACTUALIZADOS"
+    TRANSICION_MASIVA = "TRANSICION_MASIVA"
+
+class Evento:
+    """
+    Evento de dominio publicado después de confirmar la transacción
+    Los datos identifican al estudiante, al curso y al periodo afectados
+    """
+    
+    def __init__(self, tipo: TipoEvento, curso_codigo: str, estudiante_codigo: Optional[str] = None,
+                 periodo_id: Optional[int] = None, **datos):
+        """Constructor del evento"""
+        self.tipo = tipo
+        self.curso_codigo = curso_codigo
+        self.estudiante_codigo = estudiante_codigo
+        self.periodo_id = periodo_id
+        self.datos = datos
+        self.fecha = datetime.now()
+    
+    def to_dict(self) -> Dict:
+        """Convierte el evento a diccionario"""
+        return {
+            'tipo': self.tipo.value,
+            'curso_codigo': self.curso_codigo,
+            'estudiante_codigo': self.estudiante_codigo,
+            'periodo_id': self.periodo_id,
+            'datos': self.datos,
+            'fecha': self.fecha.isoformat()
+        }
+    
+    def __repr__(self) -> str:
+        """Representación técnica del objeto"""
+        return f"Evento({self.tipo.value}, curso='{self.curso_codigo}', estudiante='{self.estudiante_codigo}')"
+
+Manejador = Callable[[Evento], None]
+
+class BusEventos:
+    """
+    Bus de eventos en proceso
+    Los suscriptores síncronos se ejecutan en el hilo que publica; los
+    asíncronos en un hilo de trabajo propio, en orden de publicación
+    Un error en un suscriptor se registra y no afecta a los demás
+    """
+    
+    def __init__(self):
+        """Constructor del bus de eventos"""
+        self.logger = logging.getLogger(__name__)
+        self._suscripciones: List[Tuple[int, Optional[TipoEvento], Manejador, bool]] = []
+        self._siguiente_id = 0
+        self._lock = threading.Lock()
+        self._cola: "queue.Queue[Optional[Tuple[Manejador, Evento]]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+    
+    def suscribir(self, manejador: Manejador, tipo: Optional[TipoEvento] = None,
+                  asincrono: bool = False) -> int:
+        """
+        Registra un manejador para un tipo de evento (o para todos si tipo es None)
+        Retorna el identificador de la suscripción
+        """
+        with self._lock:
+            self._siguiente_id += 1
+            self._suscripciones.append((self._siguiente_id, tipo, manejador, asincrono))
+            if asincrono:
+                self._iniciar_worker()
+            return self._siguiente_id
+    
+    def desuscribir(self, suscripcion_id: int) -> bool:
+        """Elimina una suscripción"""
+        with self._lock:
+            antes = len(self._suscripciones)
+            self._suscripciones = [s for s in self._suscripciones if s[0] != suscripcion_id]
+            return len(self._suscripciones) < antes
+    
+    def publicar(self, evento: Evento):
+        """Entrega el evento a todos los suscriptores interesados"""
+        with self._lock:
+            destinatarios = [
+                (manejador, asincrono) for _, tipo, manejador, asincrono in self._suscripciones
+                if tipo is None or tipo == evento.tipo
+            ]
+        
+        for manejador, asincrono in destinatarios:
+            if asincrono:
+                self._cola.put((manejador, evento))
+            else:
+                self._despachar(manejador, evento)
+    
+    def _despachar(self, manejador: Manejador, evento: Evento):
+        """Ejecuta un manejador aislando sus errores"""
+        try:
+            manejador(evento)
+        except Exception as e:
+            self.logger.error(f"Error en suscriptor de {evento.tipo.value}: {e}")
+    
+    def _iniciar_worker(self):
+        """Inicia el hilo de despacho asíncrono (requiere el lock)"""
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._procesar, name="bus-eventos", daemon=True)
+            self._worker.start()
+    
+    def _procesar(self):
+        """Bucle del hilo de despacho asíncrono"""
+        while True:
+            elemento = self._cola.get()
+            if elemento is None:
+                break
+            self._despachar(*elemento)
+    
+    def esperar_pendientes(self):
+        """Bloquea hasta que la cola asíncrona quede vacía"""
+        worker = self._worker
+        if worker is None or not worker.is_alive():
+            return
+        pendientes = threading.Event()
+        self._cola.put((lambda _: pendientes.set(), None))
+        pendientes.wait()
+    
+    def detener(self):
+        """Detiene el hilo de despacho asíncrono tras vaciar la cola"""
+        with self._lock:
+            worker = self._worker
+            self._worker = None
+        if worker is not None and worker.is_alive():
+            self._cola.put(None)
+            worker.join()
@@ -0,0 +1,200 @@
+"""
+Autor: Sistema de Matrículas Universitarias
+Módulo: Limitador de Intentos de Login
+Descripción: Cubetas de tokens por email y por origen con bloqueo exponencial tras fallos repetidos
+Paradigmas: POO, Concurrente
+"""
+
+from typing import Dict, Optional, Tuple
+import logging
+import threading
+import time
+
+class _Cubeta:
+    """Cubeta de tokens de una clave (email u origen) con su racha de fallos"""
+    
+    __slots__ = ('tokens', 'actualizado', 'fallos', 'bloqueado_hasta')
+    
+    def __init__(self, capacidad: float, ahora: float):
+        """Constructor de la cubeta, llena"""
+        self.tokens = capacidad
+        self.actualizado = ahora
+        self.fallos = 0
+        self.bloqueado_hasta = 0.0
+    
+    def recargar(self, capacidad: float, tasa: float, ahora: float):
+        """Suma los tokens acumulados desde la última actualización"""
+        self.tokens = min(capacidad, self.tokens + (ahora - self.actualizado) * tasa)
+        self.actualizado = ahora
+    
+    def espera(self, ahora: float, tasa: float) -> float:
+        """Segundos hasta el próximo intento permitido (0 si se permite ya)"""
+        if self.bloqueado_hasta > ahora:
+            return self.bloqueado_hasta - ahora
+        if self.tokens < 1:
+            return (1 - self.tokens) / tasa
+        return 0.0
+
+class _Limite:
+    """Parámetros de limitación de un tipo de clave"""
+    
+    def __init__(self, capacidad: float, tasa: float, umbral_fallos: int):
+        """Constructor del límite"""
+        self.capacidad = capacidad
+        self.tasa = tasa
+        self.umbral_fallos = umbral_fallos
+        self.cubetas: Dict[str, _Cubeta] = {}
+
+class LimitadorLogin:
+    """
+    Limitador de intentos de login en memoria
+    - Cada intento consume un token de la cubeta de su email y, si se
+      conoce, de la de su origen; las cubetas se recargan a una tasa fija
+    - A partir de umbral_fallos fallos consecutivos la clave queda bloqueada
+      BLOQUEO_BASE segundos, duplicándose con cada fallo adicional hasta
+      BLOQUEO_MAXIMO; un login exitoso reinicia la racha del email
+    - La decisión se toma antes de cualquier consulta o cálculo de hash
+    """
+    
+    # Por email: ráfaga de 5 intentos, luego 1 cada 30 segundos
+    CAPACIDAD_EMAIL = 5
+    TASA_EMAIL = 1 / 30
+    UMBRAL_FALLOS_EMAIL = 5
+    
+    # Por origen: ráfaga de 20 intentos, luego 1 cada 3 segundos
+    CAPACIDAD_ORIGEN = 20
+    TASA_ORIGEN = 1 / 3
+    UMBRAL_FALLOS_ORIGEN = 20
+    
+    # Bloqueo exponencial tras superar el umbral de fallos
+    BLOQUEO_BASE = 30.0
+    BLOQUEO_MAXIMO = 3600.0
+    
+    # Usos entre purgas de claves inactivas
+    OPERACIONES_POR_PURGA = 1000
+    
+    def __init__(self):
+        """Constructor del limitador"""
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._email = _Limite(self.CAPACIDAD_EMAIL, self.TASA_EMAIL, self.UMBRAL_FALLOS_EMAIL)
+        self._origen = _Limite(self.CAPACIDAD_ORIGEN, self.TASA_ORIGEN, self.UMBRAL_FALLOS_ORIGEN)
+        self._operaciones = 0
+        
+        # Métricas
+        self._permitidos = 0
+        self._bloqueados_email = 0
+        self._bloqueados_origen = 0
+        self._fallos = 0
+        self._bloqueos = 0
+    
+    def _cubeta(self, limite: _Limite, clave: str, ahora: float) -> _Cubeta:
+        """Cubeta de la clave, recargada al instante actual (requiere el lock)"""
+        cubeta = limite.cubetas.get(clave)
+        if cubeta is None:
+            cubeta = limite.cubetas[clave] = _Cubeta(limite.capacidad, ahora)
+        else:
+            # Una racha sin intentos durante BLOQUEO_MAXIMO se olvida
+            if ahora - cubeta.actualizado > self.BLOQUEO_MAXIMO:
+                cubeta.fallos = 0
+            cubeta.recargar(limite.capacidad, limite.tasa, ahora)
+        return cubeta
+    
+    def _claves(self, email: str, origen: Optional[str]):
+        """Pares (límite, clave) que aplican a un intento"""
+        pares = [(self._email, email.strip().lower())]
+        if origen:
+            pares.append((self._origen, origen))
+        return pares
+    
+    def permitir(self, email: str, origen: Optional[str] = None) -> Tuple[bool, float]:
+        """
+        Decide si se atiende un intento de login y consume sus tokens
+        Retorna (permitido, segundos de espera si se rechaza)
+        Solo se consumen tokens si todas las claves lo permiten
+        """
+        ahora = time.monotonic()
+        with self._lock:
+            self._contar_operacion(ahora)
+            cubetas = [(limite, self._cubeta(limite, clave, ahora)) for limite, clave in self._claves(email, origen)]
+            
+            for limite, cubeta in cubetas:
+                espera = cubeta.espera(ahora, limite.tasa)
+                if espera > 0:
+                    if limite is self._email:
+                        self._bloqueados_email += 1
+                    else:
+                        self._bloqueados_origen += 1
+                    return False, espera
+            
+            for _, cubeta in cubetas:
+                cubeta.tokens -= 1
+            self._permitidos += 1
+            return True, 0.0
+    
+    def registrar_fallo(self, email: str, origen: Optional[str] = None):
+        """Suma un fallo a la racha de cada clave y aplica el bloqueo exponencial"""
+        ahora = time.monotonic()
+        with self._lock:
+            self._fallos += 1
+            for limite, clave in self._claves(email, origen):
+                cubeta = self._cubeta(limite, clave, ahora)
+                cubeta.fallos += 1
+                exceso = cubeta.fallos - limite.umbral_fallos
+                if exceso >= 0:
+                    duracion = min(self.BLOQUEO_BASE * 2 ** min(exceso, 16), self.BLOQUEO_MAXIMO)
+                    cubeta.bloqueado_hasta = ahora + duracion
+                    self._bloqueos += 1
+                    self.logger.warning(f"Login bloqueado {duracion:.0f}s para '{clave}' "
+                                        f"tras {cubeta.fallos} fallos")
+    
+    def registrar_exito(self, email: str):
+        """Reinicia la racha de fallos del email (la del origen se conserva)"""
+        with self._lock:
+            cubeta = self._email.cubetas.get(email.strip().lower())
+            if cubeta is not None:
+                cubeta.fallos = 0
+                cubeta.bloqueado_hasta = 0.0
+    
+    def _contar_operacion(self, ahora: float):
+        """Purga las claves inactivas cada OPERACIONES_POR_PURGA usos (requiere el lock)"""
+        self._operaciones += 1
+        if self._operaciones >= self.OPERACIONES_POR_PURGA:
+            self._operaciones = 0
+            self._purgar(ahora)
+    
+    def _purgar(self, ahora: float) -> int:
+        """
+        Elimina las cubetas que volverían a crearse igual: ya recargadas
+        por completo, sin bloqueo vigente y sin racha de fallos vigente
+        """
+        eliminadas = 0
+        for limite in (self._email, self._origen):
+            inactivas = [
+                clave for clave, cubeta in limite.cubetas.items()
+                if cubeta.bloqueado_hasta <= ahora
+                and (cubeta.fallos == 0 or ahora - cubeta.actualizado > self.BLOQUEO_MAXIMO)
+                and cubeta.tokens + (ahora - cubeta.actualizado) * limite.tasa >= limite.capacidad
+            ]
+            for clave in inactivas:
+                del limite.cubetas[clave]
+            eliminadas += len(inactivas)
+        return eliminadas
+    
+    def metricas(self) -> Dict:
+        """Métricas de intentos permitidos y rechazados"""
+        with self._lock:
+            bloqueados = self._bloqueados_email + self._bloqueados_origen
+            total = self._permitidos + bloqueados
+            return {
+                'permitidos': self._permitidos,
+                'bloqueados': bloqueados,
+                'bloqueados_por_email': self._bloqueados_email,
+                'bloqueados_por_origen': self._bloqueados_origen,
+                'fallos_registrados': self._fallos,
+                'bloqueos_aplicados': self._bloqueos,
+                'tasa_permitidos': round(self._permitidos / total * 100, 2) if total > 0 else 0,
+                'tasa_bloqueados': round(bloqueados / total * 100, 2) if total > 0 else 0,
+                'claves_email': len(self._email.cubetas),
+                'claves_origen': len(self._origen.cubetas)
+            }
@@ -5,14 +5,31 @@ Descripción: Lógica de negocio para matrículas
 Paradigmas: POO, Funcional, Lógico
 """
 
-from typing import List, Tuple, Dict, Optional
+from typing import List, Tuple, Dict, Optional, Iterator, Callable
 from models.estudiante import Estudiante
 from models.curso import Curso
-from models.matricula import Matricula, EstadoMatricula
+from models.matricula import EstadoMatricula, DIAS_LIMITE_CANCELACION
 from dao.estudiante_dao import EstudianteDAO
 from dao.curso_dao import CursoDAO
 from dao.matricula_dao import MatriculaDAO
+from dao.periodo_dao import PeriodoDAO
+from dao.lista_espera_dao import ListaEsperaDAO
+from dao.prerrequisito_dao import PrerrequisitoDAO
+from dao.idempotencia_dao import IdempotenciaDAO
+from models.prerrequisito import Prerrequisito
+from services.prerrequisitos import GrafoPrerrequisitos
+from services.cache_catalogo import CacheCatalogo
+from services.eventos import BusEventos, Evento, TipoEvento
+from models.horario import mascara_horario, combinar_mascaras, matriz_de_mascaras, cruces_vectorizados
+import numpy as np
+import hashlib
 import logging
+import time
+
+# Prefijos de cursos que cada carrera no puede tomar
+RESTRICCIONES_CARRERA = {
+    'MEDICINA': ('ING',)  # Estudiantes de medicina no pueden tomar cursos de ingeniería
+}
 
 class MatriculaService:
     """
@@ -20,204 +37,578 @@ class MatriculaService:
     Implementa reglas de negocio y validaciones complejas
     """
     
+    # Segundos que se conserva en memoria el periodo actual
+    TTL_PERIODO_ACTUAL = 60
+    
+    # Segundos de vigencia del catálogo cacheado y máximo servido como obsoleto
+    TTL_CATALOGO = 5
+    MAX_OBSOLETO_CATALOGO = 30
+    
+    # Máximo de materias activas por estudiante
+    LIMITE_MATERIAS_ACTIVAS = 6
+    
+    # Máximo de créditos activos por estudiante (None = sin límite)
+    LIMITE_CREDITOS_ACTIVOS = None
+    
+    # Segundos que se conserva el resultado de una solicitud idempotente y
+    # segundos que una solicitud en curso retiene su clave
+    TTL_IDEMPOTENCIA = 24 * 3600
+    TTL_RESERVA_IDEMPOTENCIA = 60
+    
+    # Transiciones masivas: tamaño de lote inicial, sus límites y segundos
+    # máximos que cada lote mantiene bloqueadas sus filas
+    LOTE_TRANSICION = 1000
+    LOTE_TRANSICION_MINIMO = 50
+    LOTE_TRANSICION_MAXIMO = 10000
+    PRESUPUESTO_BLOQUEO = 0.2
+    
     def __init__(self):
         """Constructor del servicio de matrículas"""
         self.estudiante_dao = EstudianteDAO()
         self.curso_dao = CursoDAO()
         self.matricula_dao = MatriculaDAO()
+        self.periodo_dao = PeriodoDAO()
+        self.lista_espera_dao = ListaEsperaDAO()
+        self.prerrequisito_dao = PrerrequisitoDAO()
+        self.idempotencia_dao = IdempotenciaDAO()
+        self.prerrequisitos = GrafoPrerrequisitos(self.prerrequisito_dao)
+        self.cache_catalogo = CacheCatalogo(self.TTL_CATALOGO, self.MAX_OBSOLETO_CATALOGO)
         self.logger = logging.getLogger(__name__)
+        
+        # Eventos de dominio: se publican después de confirmar cada cambio
+        # El cache del catálogo se invalida con cualquier cambio de matrícula
+        self.eventos = BusEventos()
+        self.eventos.suscribir(lambda evento: self.cache_catalogo.invalidar())
+        
+        # Cache del periodo actual para no consultarlo en cada operación
+        self._periodo_actual_id = None
+        self._periodo_actual_expira = 0.0
     
-    def matricular_estudiante(self, estudiante_codigo: str, curso_codigo: str) -> Tuple[bool, str]:
+    def _resolver_periodo(self, periodo_id: Optional[int]) -> Optional[int]:
+        """
+        Retorna el periodo indicado o, por defecto, el periodo actual
+        Sin periodo actual configurado se trabaja sobre todo el historial
+        """
+        if periodo_id is not None:
+            return periodo_id
+        
+        ahora = time.monotonic()
+        if ahora >= self._periodo_actual_expira:
+            periodo = self.periodo_dao.find_actual()
+            self._periodo_actual_id = periodo.id if periodo else None
+            self._periodo_actual_expira = ahora + self.TTL_PERIODO_ACTUAL
+        
+        return self._periodo_actual_id
+    
+    def matricular_estudiante(self, estudiante_codigo: str, curso_codigo: str,
+                              periodo_id: Optional[int] = None,
+                              lista_espera: bool = True,
+                              clave_idempotencia: Optional[str] = None) -> Tuple[bool, str]:
         """
         Matricula un estudiante en un curso aplicando todas las reglas de negocio
         Simulación de programación lógica con múltiples predicados
+        Por defecto la matrícula se registra en el periodo actual
+        Si el curso está lleno y el estudiante cumple las demás reglas,
+        queda en la lista de espera del curso
+        Con clave_idempotencia, un reintento retorna el resultado del primer intento
         """
         try:
-            # Predicado 1: Verificar que el estudiante existe
-            estudiante = self.estudiante_dao.find_by_codigo(estudiante_codigo)
-            if not estudiante:
-                return False, f"Estudiante con código {estudiante_codigo} no encontrado"
-            
-            # Predicado 2: Verificar que el curso existe
-            curso = self.curso_dao.find_by_codigo(curso_codigo)
-            if not curso:
-                return False, f"Curso con código {curso_codigo} no encontrado"
-            
-            # Predicado 3: Verificar que el curso tiene cupos disponibles
-            if not curso.tiene_cupos_disponibles():
-                return False, f"El curso {curso.nombre} no tiene cupos disponibles"
-            
-            # Predicado 4: Verificar que el estudiante no esté ya matriculado en el curso
-            if self.matricula_dao.exists_matricula(estudiante_codigo, curso_codigo, EstadoMatricula.ACTIVA):
-                return False, f"El estudiante ya está matriculado en el curso {curso.nombre}"
-            
-            # Predicado 5: Verificar límite de materias por estudiante (máximo 6)
-            matriculas_activas = self.matricula_dao.count_active_matriculas_by_student(estudiante_codigo)
-            if matriculas_activas >= 6:
-                return False, "El estudiante ha alcanzado el límite máximo de 6 materias activas"
-            
-            # Predicado 6: Verificar prerrequisitos (simulación)
-            if not self._verificar_prerrequisitos(estudiante, curso):
-                return False, f"El estudiante no cumple los prerrequisitos para {curso.nombre}"
-            
-            # Si todas las validaciones pasan, crear la matrícula
-            matricula = Matricula(estudiante_codigo, curso_codigo)
-            matricula_id = self.matricula_dao.create(matricula)
-            
-            self.logger.info(f"Matrícula creada exitosamente: ID {matricula_id}")
-            return True, f"Estudiante {estudiante.nombre} {estudiante.apellido} matriculado exitosamente en {curso.nombre}"
+            periodo_id = self._resolver_periodo(periodo_id)
+            if clave_idempotencia:
+                return self._con_idempotencia(
+                    clave_idempotencia, 'MATRICULA', (estudiante_codigo, curso_codigo, periodo_id),
+                    lambda: self._matricular(estudiante_codigo, curso_codigo, periodo_id, lista_espera)
+                )
+            return self._matricular(estudiante_codigo, curso_codigo, periodo_id, lista_espera)
             
         except Exception as e:
             self.logger.error(f"Error en matrícula: {e}")
             return False, f"Error interno: {str(e)}"
     
-    def cancelar_matricula(self, estudiante_codigo: str, curso_codigo: str) -> Tuple[bool, str]:
+    def _matricular(self, estudiante_codigo: str, curso_codigo: str,
+                    periodo_id: Optional[int], lista_espera: bool) -> Tuple[bool, str]:
+        """Flujo de matrícula; los errores internos se propagan al llamador"""
+        # Una sola consulta trae los datos de todos los predicados
+        datos = self.matricula_dao.get_enrollment_eligibility(estudiante_codigo, curso_codigo, periodo_id)
+        self._cargar_listas_elegibilidad(datos, estudiante_codigo, curso_codigo, periodo_id)
+        
+        error = self._evaluar_reglas_matricula(datos, estudiante_codigo, curso_codigo,
+                                               verificar_cupos=not lista_espera)
+        if error:
+            return False, error
+        
+        curso_nombre = datos['curso_nombre']
+        
+        if datos['cupos_ocupados'] >= datos['cupos_totales'] and not lista_espera:
+            return False, f"El curso {curso_nombre} no tiene cupos disponibles"
+        
+        # Si todas las validaciones pasan, reservar el cupo y crear la matrícula
+        # Cupos y límites de carga se verifican de nuevo bajo bloqueo; si el
+        # curso está lleno, el ingreso a la lista de espera ocurre bajo el mismo
+        # bloqueo para no perder un cupo liberado entre ambos pasos
+        try:
+            matricula_id, posicion = self.matricula_dao.allocate_seat_or_enqueue(
+                datos['estudiante_id'], datos['curso_id'], periodo_id,
+                self.LIMITE_MATERIAS_ACTIVAS, self.LIMITE_CREDITOS_ACTIVOS, lista_espera
+            )
+        except ValueError as e:
+            return False, str(e)
+        
+        if matricula_id is None:
+            if posicion is None:
+                return False, f"El curso {curso_nombre} no tiene cupos disponibles"
+            return False, (f"El curso {curso_nombre} no tiene cupos disponibles. "
+                           f"Estudiante agregado a la lista de espera en la posición {posicion}")
+        
+        self.eventos.publicar(Evento(TipoEvento.MATRICULA_CREADA, curso_codigo.upper(),
+                                     estudiante_codigo.upper(), periodo_id, matricula_id=matricula_id))
+        self.logger.info(f"Matrícula creada exitosamente: ID {matricula_id}")
+        return True, f"Estudiante {datos['estudiante_nombre']} {datos['estudiante_apellido']} matriculado exitosamente en {curso_nombre}"
+    
+    def _cargar_listas_elegibilidad(self, datos: Dict, estudiante_codigo: str,
+                                    curso_codigo: str, periodo_id: Optional[int]):
+        """
+        Completa los datos de elegibilidad con el historial y los horarios del
+        estudiante, cada uno con una consulta pequeña y solo si su predicado
+        lo necesita: cursos completados si el curso tiene prerrequisitos y
+        horarios activos si el curso tiene horario
+        """
+        datos['cursos_completados'] = set()
+        datos['horarios_activos'] = []
+        if not (datos['estudiante_existe'] and datos['curso_existe']):
+            return
+        
+        if self.prerrequisitos.tiene_requisitos(curso_codigo.upper()):
+            datos['cursos_completados'] = self.matricula_dao.get_completed_courses(estudiante_codigo)
+        if mascara_horario(datos['horario']):
+            datos['horarios_activos'] = self.matricula_dao.get_active_schedules(datos['estudiante_id'], periodo_id)
+    
+    def _con_idempotencia(self, clave: str, operacion: str, parametros: tuple,
+                          ejecutar: Callable[[], Tuple[bool, str]]) -> Tuple[bool, str]:
+        """
+        Ejecuta una operación una sola vez por clave de solicitud
+        La clave guardada es un hash de la operación, la clave del cliente y
+        los parámetros: reutilizar una clave con otros datos no retorna un
+        resultado ajeno. Si la operación falla con una excepción la reserva
+        se libera para que el reintento vuelva a ejecutarla
+        """
+        huella = hashlib.sha256(
+            '\x1f'.join(map(str, (operacion, clave) + parametros)).upper().encode()
+        ).hexdigest()
+        
+        guardado = self.idempotencia_dao.reserve(huella, self.TTL_RESERVA_IDEMPOTENCIA)
+        if guardado is not None:
+            exito, mensaje = guardado
+            if exito is None:
+                return False, "Una solicitud con la misma clave aún está en proceso"
+            return exito, mensaje
+        
+        try:
+            exito, mensaje = ejecutar()
+        except Exception:
+            self.idempotencia_dao.release(huella)
+            raise
+        
+        self.idempotencia_dao.complete(huella, exito, mensaje, self.TTL_IDEMPOTENCIA)
+        return exito, mensaje
+    
+    def purgar_claves_idempotencia(self, tamano_lote: int = 1000) -> int:
+        """Elimina las claves de idempotencia vencidas; retorna cuántas se eliminaron"""
+        total = 0
+        while True:
+            eliminadas = self.idempotencia_dao.purge_expired(tamano_lote)
+            total += eliminadas
+            if eliminadas < tamano_lote:
+                return total
+    
+    def _evaluar_reglas_matricula(self, datos: Dict, estudiante_codigo: str,
+                                  curso_codigo: str, verificar_cupos: bool = True) -> Optional[str]:
+        """
+        Evalúa los predicados de matrícula sobre datos ya cargados
+        Retorna el mensaje de la primera regla incumplida o None si todas se cumplen
+        Sin verificar_cupos se omite el predicado de cupos (lista de espera)
+        """
+        # Predicado 1: Verificar que el estudiante existe
+        if not datos['estudiante_existe']:
+            return f"Estudiante con código {estudiante_codigo} no encontrado"
+        
+        # Predicado 2: Verificar que el curso existe
+        if not datos['curso_existe']:
+            return f"Curso con código {curso_codigo} no encontrado"
+        
+        curso_nombre = datos['curso_nombre']
+        
+        # Predicado 3: Verificar que el curso tiene cupos disponibles
+        if verificar_cupos and datos['cupos_ocupados'] >= datos['cupos_totales']:
+            return f"El curso {curso_nombre} no tiene cupos disponibles"
+        
+        # Predicado 4: Verificar que el estudiante no esté ya matriculado en el curso
+        # ni lo haya completado en el mismo periodo
+        if datos['ya_matriculado']:
+            return f"El estudiante ya está matriculado en el curso {curso_nombre}"
+        if datos.get('completado_en_periodo'):
+            return f"El estudiante ya completó el curso {curso_nombre} en este periodo"
+        
+        # Predicado 5: Verificar límite de materias por estudiante (máximo 6)
+        if datos['matriculas_activas'] >= self.LIMITE_MATERIAS_ACTIVAS:
+            return f"El estudiante ha alcanzado el límite máximo de {self.LIMITE_MATERIAS_ACTIVAS} materias activas"
+        
+        # Predicado 5b: Verificar límite de créditos activos, si está configurado
+        if (self.LIMITE_CREDITOS_ACTIVOS is not None and
+                datos.get('creditos_activos', 0) + datos.get('creditos', 0) > self.LIMITE_CREDITOS_ACTIVOS):
+            return f"El estudiante superaría el límite de {self.LIMITE_CREDITOS_ACTIVOS} créditos activos"
+        
+        # Predicado 6: Verificar prerrequisitos
+        if not self._cumple_prerrequisitos(datos['carrera'], curso_codigo.upper(),
+                                           datos['cursos_completados']):
+            return f"El estudiante no cumple los prerrequisitos para {curso_nombre}"
+        
+        # Predicado 7: Verificar que el horario no se cruce con los cursos activos
+        if mascara_horario(datos.get('horario', '')) & combinar_mascaras(datos.get('horarios_activos', ())):
+            return f"El horario de {curso_nombre} se cruza con otro curso matriculado"
+        
+        return None
+    
+    def matricular_lote(self, pares: List[Tuple[str, str]],
+                        periodo_id: Optional[int] = None) -> List[Tuple[bool, str]]:
+        """
+        Matricula un lote de pares (estudiante_codigo, curso_codigo)
+        Valida todos los pares en memoria contra un estado precargado y
+        asigna los cupos de todos los cursos en una sola transacción
+        Retorna un resultado (éxito, mensaje) por cada par, en el mismo orden
+        """
+        if not pares:
+            return []
+        
+        try:
+            periodo_id = self._resolver_periodo(periodo_id)
+            pares = [(e.strip().upper(), c.strip().upper()) for e, c in pares]
+            
+            estado = self.matricula_dao.get_batch_enrollment_state(
+                {e for e, _ in pares}, {c for _, c in pares}, periodo_id
+            )
+            estudiantes, cursos = estado['estudiantes'], estado['cursos']
+            activas, completados = estado['activas'], estado['completados']
+            horarios, en_periodo = estado['horarios'], estado['en_periodo']
+            
+            # Programación lógica en memoria: cada par aceptado actualiza el estado
+            # para que los siguientes pares del lote vean sus efectos
+            resultados = [None] * len(pares)
+            solicitudes = []
+            for indice, (estudiante_codigo, curso_codigo) in enumerate(pares):
+                estudiante = estudiantes.get(estudiante_codigo)
+                curso = cursos.get(curso_codigo)
+                cursos_activos = activas.setdefault(estudiante_codigo, set())
+                previa = en_periodo.get((estudiante_codigo, curso_codigo))
+                
+                # Carga según el resumen del estudiante, igual que en _matricular
+                datos = {
+                    'estudiante_existe': estudiante is not None,
+                    'curso_existe': curso is not None,
+                    'curso_nombre': curso['nombre'] if curso else None,
+                    'cupos_totales': curso['cupos_totales'] if curso else 0,
+                    'cupos_ocupados': curso['cupos_ocupados'] if curso else 0,
+                    'ya_matriculado': curso_codigo in cursos_activos or previa == EstadoMatricula.ACTIVA.value,
+                    'completado_en_periodo': previa == EstadoMatricula.COMPLETADA.value,
+                    'matriculas_activas': estudiante['cursos_activos'] if estudiante else 0,
+                    'creditos': curso['creditos'] if curso else 0,
+                    'creditos_activos': estudiante['creditos_activos'] if estudiante else 0,
+                    'carrera': estudiante['carrera'] if estudiante else None,
+                    'cursos_completados': completados.get(estudiante_codigo, set()),
+                    'horario': horarios.get(curso_codigo, ''),
+                    'horarios_activos': [horarios.get(codigo, '') for codigo in cursos_activos]
+                }
+                
+                error = self._evaluar_reglas_matricula(datos, estudiante_codigo, curso_codigo)
+                if error:
+                    resultados[indice] = (False, error)
+                    continue
+                
+                cursos_activos.add(curso_codigo)
+                en_periodo[(estudiante_codigo, curso_codigo)] = EstadoMatricula.ACTIVA.value
+                curso['cupos_ocupados'] += 1
+                estudiante['cursos_activos'] += 1
+                estudiante['creditos_activos'] += curso['creditos']
+                solicitudes.append((indice, estudiante['id'], curso['id']))
+            
+            # Asignación de cupos bajo bloqueo: cupos, límites de carga y matrícula
+            # previa se verifican de nuevo con los datos reales de la base de datos
+            asignadas = self.matricula_dao.allocate_seats_batch(
+                [(estudiante_id, curso_id) for _, estudiante_id, curso_id in solicitudes], periodo_id,
+                self.LIMITE_MATERIAS_ACTIVAS, self.LIMITE_CREDITOS_ACTIVOS
+            )
+            
+            for (indice, _, _), (asignada, motivo) in zip(solicitudes, asignadas):
+                estudiante_codigo, curso_codigo = pares[indice]
+                curso_nombre = cursos[curso_codigo]['nombre']
+                if asignada:
+                    self.eventos.publicar(Evento(TipoEvento.MATRICULA_CREADA, curso_codigo,
+                                                 estudiante_codigo, periodo_id))
+                    estudiante = estudiantes[estudiante_codigo]
+                    resultados[indice] = (True, f"Estudiante {estudiante['nombre']} {estudiante['apellido']} matriculado exitosamente en {curso_nombre}")
+                else:
+                    resultados[indice] = (False, motivo or f"El curso {curso_nombre} no tiene cupos disponibles")
+            
+            exitosas = sum(1 for exito, _ in resultados if exito)
+            self.logger.info(f"Matrícula por lote: {exitosas} de {len(pares)} pares matriculados")
+            return resultados
+            
+        except Exception as e:
+            self.logger.error(f"Error en matrícula por lote: {e}")
+            return [(False, f"Error interno: {str(e)}")] * len(pares)
+    
+    def cancelar_matricula(self, estudiante_codigo: str, curso_codigo: str,
+                           periodo_id: Optional[int] = None,
+                           clave_idempotencia: Optional[str] = None) -> Tuple[bool, str]:
         """
         Cancela una matrícula aplicando reglas de negocio
+        Por defecto se cancela la matrícula del periodo actual
+        Estado y ventana de cancelación se verifican en el mismo UPDATE;
+        solo si no se canceló nada se consulta el motivo
+        Con clave_idempotencia, un reintento retorna el resultado del primer intento
+        """
+        try:
+            periodo_id = self._resolver_periodo(periodo_id)
+            if clave_idempotencia:
+                return self._con_idempotencia(
+                    clave_idempotencia, 'CANCELACION', (estudiante_codigo, curso_codigo, periodo_id),
+                    lambda: self._cancelar(estudiante_codigo, curso_codigo, periodo_id)
+                )
+            return self._cancelar(estudiante_codigo, curso_codigo, periodo_id)
+            
+        except Exception as e:
+            self.logger.error(f"Error cancelando matrícula: {e}")
+            return False, f"Error interno: {str(e)}"
+    
+    def _cancelar(self, estudiante_codigo: str, curso_codigo: str,
+                  periodo_id: Optional[int]) -> Tuple[bool, str]:
+        """Flujo de cancelación; los errores internos se propagan al llamador"""
+        # El cupo liberado pasa al siguiente estudiante de la lista de espera
+        promovidos = []
+        if self.matricula_dao.cancel_matricula(estudiante_codigo, curso_codigo, periodo_id,
+                                               self.LIMITE_MATERIAS_ACTIVAS, promovidos,
+                                               DIAS_LIMITE_CANCELACION, self.LIMITE_CREDITOS_ACTIVOS):
+            self.eventos.publicar(Evento(TipoEvento.MATRICULA_CANCELADA, curso_codigo.upper(),
+                                         estudiante_codigo.upper(), periodo_id))
+            self._publicar_promovidos(curso_codigo.upper(), promovidos, periodo_id)
+            return True, "Matrícula cancelada exitosamente"
+        
+        # Ninguna fila cambió: determinar qué regla no se cumplió
+        # La ventana se evalúa con el reloj de la base de datos, igual que en el UPDATE
+        candidata = self.matricula_dao.find_cancellation_candidate(estudiante_codigo, curso_codigo,
+                                                                   periodo_id, DIAS_LIMITE_CANCELACION)
+        if candidata is None:
+            return False, "No existe una matrícula activa para cancelar"
+        
+        _, en_plazo = candidata
+        if not en_plazo:
+            return False, f"No se puede cancelar después de {DIAS_LIMITE_CANCELACION} días de la matrícula"
+        return False, "Error al cancelar la matrícula"
+    
+    def actualizar_cupos_curso(self, curso_codigo: str, cupos: int,
+                               periodo_id: Optional[int] = None) -> Tuple[bool, str]:
+        """
+        Actualiza los cupos de un curso
+        Si la ampliación libera cupos, se promueve la lista de espera en la misma transacción
         """
         try:
-            # Verificar que existe la matrícula activa
-            if not self.matricula_dao.exists_matricula(estudiante_codigo, curso_codigo, EstadoMatricula.ACTIVA):
-                return False, "No existe una matrícula activa para cancelar"
+            if cupos <= 0:
+                return False, "Los cupos deben ser mayor a 0"
             
-            # Aplicar reglas de cancelación (ejemplo: no después de 30 días)
-            matriculas = self.matricula_dao.find_by_estudiante(estudiante_codigo)
-            matricula_activa = None
+            periodo_id = self._resolver_periodo(periodo_id)
             
-            # Programación funcional: filtrar matrícula específica
-            matriculas_curso = list(filter(
-                lambda m: m.curso_codigo == curso_codigo and m.esta_activa(), 
-                matriculas
-            ))
+            curso_id = self.matricula_dao._get_curso_id(curso_codigo.upper())
+            if curso_id is None:
+                return False, f"Curso con código {curso_codigo} no encontrado"
             
-            if not matriculas_curso:
-                return False, "No se encontró la matrícula activa"
+            promovidos = self.matricula_dao.update_course_capacity(curso_id, cupos, periodo_id,
+                                                                   self.LIMITE_MATERIAS_ACTIVAS,
+                                                                   self.LIMITE_CREDITOS_ACTIVOS)
+            self.eventos.publicar(Evento(TipoEvento.CUPOS_ACTUALIZADOS, curso_codigo.upper(),
+                                         periodo_id=periodo_id, cupos=cupos))
+            self._publicar_promovidos(curso_codigo.upper(), promovidos, periodo_id)
+            return True, f"Cupos actualizados. Estudiantes promovidos desde la lista de espera: {len(promovidos)}"
             
-            matricula_activa = matriculas_curso[0]
+        except Exception as e:
+            self.logger.error(f"Error actualizando cupos: {e}")
+            return False, f"Error interno: {str(e)}"
+    
+    def completar_matricula(self, estudiante_codigo: str, curso_codigo: str,
+                            periodo_id: Optional[int] = None) -> Tuple[bool, str]:
+        """Marca como completada la matrícula activa de un estudiante en un curso"""
+        try:
+            periodo_id = self._resolver_periodo(periodo_id)
             
-            # Verificar reglas de cancelación
-            from models.matricula import validar_cancelacion_matricula
-            puede_cancelar, mensaje = validar_cancelacion_matricula(matricula_activa)
+            if not self.matricula_dao.complete_matricula(estudiante_codigo, curso_codigo, periodo_id):
+                return False, "No existe una matrícula activa para completar"
             
-            if not puede_cancelar:
-                return False, mensaje
+            self.eventos.publicar(Evento(TipoEvento.MATRICULA_COMPLETADA, curso_codigo.upper(),
+                                         estudiante_codigo.upper(), periodo_id))
+            return True, "Matrícula completada exitosamente"
             
-            # Proceder con la cancelación
-            if self.matricula_dao.cancel_matricula(estudiante_codigo, curso_codigo):
-                return True, "Matrícula cancelada exitosamente"
-            else:
-                return False, "Error al cancelar la matrícula"
-                
         except Exception as e:
-            self.logger.error(f"Error cancelando matrícula: {e}")
+            self.logger.error(f"Error completando matrícula: {e}")
             return False, f"Error interno: {str(e)}"
     
+    def transicionar_matriculas(self, nuevo_estado: EstadoMatricula, curso_codigo: Optional[str] = None,
+                                carrera: Optional[str] = None, periodo_id: Optional[int] = None,
+                                presupuesto_bloqueo: Optional[float] = None) -> Dict:
+        """
+        Cambia de estado todas las matrículas de un curso, una carrera y/o un
+        periodo que admitan la transición (mismas reglas que cambiar_estado)
+        Trabaja en lotes con UPDATE por conjunto; el tamaño del lote se ajusta
+        para que cada transacción dure menos que el presupuesto de bloqueo
+        Si se interrumpe, volver a ejecutarla continúa con las pendientes
+        """
+        if curso_codigo is None and carrera is None and periodo_id is None:
+            raise ValueError("Debe indicar un curso, una carrera o un periodo")
+        
+        presupuesto = presupuesto_bloqueo or self.PRESUPUESTO_BLOQUEO
+        curso_codigo = curso_codigo.upper() if curso_codigo else None
+        tamano = self.LOTE_TRANSICION
+        ultimo_id = 0
+        por_estado: Dict[str, int] = {}
+        lotes = 0
+        bloqueo_maximo = 0.0
+        inicio = time.monotonic()
+        
+        while True:
+            inicio_lote = time.monotonic()
+            cambiadas, ultimo_id = self.matricula_dao.transition_batch(
+                nuevo_estado, curso_codigo, carrera, periodo_id, tamano, ultimo_id
+            )
+            duracion_lote = time.monotonic() - inicio_lote
+            if not cambiadas:
+                break
+            
+            lotes += 1
+            bloqueo_maximo = max(bloqueo_maximo, duracion_lote)
+            for estado, cantidad in cambiadas.items():
+                por_estado[estado] = por_estado.get(estado, 0) + cantidad
+            
+            # Un lote incompleto indica que no quedan más filas
+            if sum(cambiadas.values()) < tamano:
+                break
+            
+            # Ajustar el lote siguiente al presupuesto de bloqueo
+            if duracion_lote > presupuesto:
+                tamano = max(self.LOTE_TRANSICION_MINIMO, int(tamano * presupuesto / duracion_lote))
+            elif duracion_lote < presupuesto / 2:
+                tamano = min(self.LOTE_TRANSICION_MAXIMO, tamano * 2)
+        
+        total = sum(por_estado.values())
+        duracion = round(time.monotonic() - inicio, 2)
+        self.logger.info(f"Transición masiva a {nuevo_estado.value}: {total} matrículas en {lotes} lotes ({duracion}s)")
+        
+        if total:
+            self.eventos.publicar(Evento(TipoEvento.TRANSICION_MASIVA, curso_codigo, periodo_id=periodo_id,
+                                         nuevo_estado=nuevo_estado.value, carrera=carrera, total=total))
+        
+        return {
+            'nuevo_estado': nuevo_estado.value,
+            'por_estado': por_estado,
+            'total': total,
+            'lotes': lotes,
+            'bloqueo_maximo_segundos': round(bloqueo_maximo, 3),
+            'duracion_segundos': duracion
+        }
+    
+    def cerrar_periodo(self, periodo_id: Optional[int] = None,
+                       presupuesto_bloqueo: Optional[float] = None) -> Dict:
+        """
+        Cierre de periodo: completa todas las matrículas activas del periodo
+        Por defecto se cierra el periodo actual
+        """
+        periodo_id = self._resolver_periodo(periodo_id)
+        if periodo_id is None:
+            raise ValueError("No hay un periodo actual configurado")
+        return self.transicionar_matriculas(EstadoMatricula.COMPLETADA, periodo_id=periodo_id,
+                                            presupuesto_bloqueo=presupuesto_bloqueo)
+    
+    def _publicar_promovidos(self, curso_codigo: str, promovidos: List[str], periodo_id: Optional[int]):
+        """Publica una matrícula creada por cada estudiante promovido desde la lista de espera"""
+        for estudiante_codigo in promovidos:
+            self.eventos.publicar(Evento(TipoEvento.MATRICULA_CREADA, curso_codigo, estudiante_codigo,
+                                         periodo_id, desde_lista_espera=True))
+    
+    def obtener_posicion_lista_espera(self, estudiante_codigo: str, curso_codigo: str,
+                                      periodo_id: Optional[int] = None) -> Optional[int]:
+        """
+        Retorna la posición del estudiante en la lista de espera del curso
+        None si el estudiante no está en espera
+        """
+        periodo_id = self._resolver_periodo(periodo_id)
+        return self.lista_espera_dao.get_position(estudiante_codigo, curso_codigo, periodo_id)
+    
+    def retirar_de_lista_espera(self, estudiante_codigo: str, curso_codigo: str,
+                                periodo_id: Optional[int] = None) -> Tuple[bool, str]:
+        """Retira a un estudiante de la lista de espera de un curso"""
+        periodo_id = self._resolver_periodo(periodo_id)
+        if self.lista_espera_dao.remove(estudiante_codigo, curso_codigo, periodo_id):
+            return True, "Estudiante retirado de la lista de espera"
+        return False, "El estudiante no está en la lista de espera del curso"
+    
     def obtener_matriculas_estudiante(self, estudiante_codigo: str) -> List[Dict]:
         """
         Obtiene todas las matrículas de un estudiante con información detallada
+        Los datos del curso llegan en la misma consulta (un solo viaje a la base)
         """
         try:
-            matriculas = self.matricula_dao.find_by_estudiante(estudiante_codigo)
-            resultado = []
-            
-            for matricula in matriculas:
-                curso = self.curso_dao.find_by_codigo(matricula.curso_codigo)
-                if curso:
-                    resultado.append({
-                        'matricula_id': matricula.id,
-                        'curso_codigo': curso.codigo,
-                        'curso_nombre': curso.nombre,
-                        'creditos': curso.creditos,
-                        'profesor': curso.profesor,
-                        'horario': curso.horario,
-                        'fecha_matricula': matricula.fecha_matricula,
-                        'estado': matricula.estado.value
-                    })
-            
-            return resultado
+            return self.matricula_dao.get_student_enrollments_view(estudiante_codigo)
             
         except Exception as e:
             self.logger.error(f"Error obteniendo matrículas del estudiante: {e}")
             return []
     
-    def obtener_estudiantes_curso(self, curso_codigo: str) -> List[Dict]:
+    def obtener_estudiantes_curso(self, curso_codigo: str, periodo_id: Optional[int] = None) -> List[Dict]:
         """
         Obtiene todos los estudiantes matriculados en un curso
+        Una sola consulta sin importar el tamaño del curso
         """
         try:
-            matriculas = self.matricula_dao.find_by_curso(curso_codigo)
-            resultado = []
-            
-            # Filtrar solo matrículas activas
-            matriculas_activas = list(filter(lambda m: m.esta_activa(), matriculas))
-            
-            for matricula in matriculas_activas:
-                estudiante = self.estudiante_dao.find_by_codigo(matricula.estudiante_codigo)
-                if estudiante:
-                    resultado.append({
-                        'estudiante_codigo': estudiante.codigo,
-                        'estudiante_nombre': f"{estudiante.nombre} {estudiante.apellido}",
-                        'carrera': estudiante.carrera,
-                        'email': estudiante.email,
-                        'fecha_matricula': matricula.fecha_matricula
-                    })
-            
-            return resultado
+            return self.matricula_dao.get_course_roster(curso_codigo, periodo_id)
             
         except Exception as e:
             self.logger.error(f"Error obteniendo estudiantes del curso: {e}")
             return []
     
+    def iterar_estudiantes_curso(self, curso_codigo: str, periodo_id: Optional[int] = None,
+                                 tamano_lote: int = 500) -> Iterator[Dict]:
+        """
+        Recorre los estudiantes matriculados en un curso en streaming
+        Pensado para exportaciones de listas grandes
+        """
+        return self.matricula_dao.iter_course_roster(curso_codigo, periodo_id, tamano_lote)
+    
     def generar_reporte_matriculas(self) -> Dict:
         """
         Genera un reporte completo de matrículas
-        Uso de programación funcional para análisis de datos
+        Los conteos se calculan con agregados GROUP BY en la base de datos
         """
         try:
-            # Obtener todas las matrículas
-            matriculas = self.matricula_dao.find_all()
+            agregados = self.matricula_dao.get_report_aggregates()
+            por_estado = agregados['por_estado']
             
             # Estadísticas básicas
-            total_matriculas = len(matriculas)
-            matriculas_activas = list(filter(lambda m: m.esta_activa(), matriculas))
-            matriculas_canceladas = list(filter(lambda m: m.estado == EstadoMatricula.CANCELADA, matriculas))
-            matriculas_completadas = list(filter(lambda m: m.estado == EstadoMatricula.COMPLETADA, matriculas))
-            
-            # Análisis por carrera
-            estudiantes_matriculados = set()
-            carreras_stats = {}
-            
-            for matricula in matriculas_activas:
-                estudiante = self.estudiante_dao.find_by_codigo(matricula.estudiante_codigo)
-                if estudiante:
-                    estudiantes_matriculados.add(estudiante.codigo)
-                    carrera = estudiante.carrera
-                    if carrera not in carreras_stats:
-                        carreras_stats[carrera] = 0
-                    carreras_stats[carrera] += 1
-            
-            # Análisis por curso
-            cursos_stats = {}
-            for matricula in matriculas_activas:
-                curso_codigo = matricula.curso_codigo
-                if curso_codigo not in cursos_stats:
-                    cursos_stats[curso_codigo] = 0
-                cursos_stats[curso_codigo] += 1
+            total_matriculas = sum(por_estado.values())
+            matriculas_activas = por_estado.get(EstadoMatricula.ACTIVA.value, 0)
+            matriculas_canceladas = por_estado.get(EstadoMatricula.CANCELADA.value, 0)
+            matriculas_completadas = por_estado.get(EstadoMatricula.COMPLETADA.value, 0)
             
             return {
                 'resumen': {
                     'total_matriculas': total_matriculas,
-                    'matriculas_activas': len(matriculas_activas),
-                    'matriculas_canceladas': len(matriculas_canceladas),
-                    'matriculas_completadas': len(matriculas_completadas),
-                    'estudiantes_con_matriculas': len(estudiantes_matriculados)
+                    'matriculas_activas': matriculas_activas,
+                    'matriculas_canceladas': matriculas_canceladas,
+                    'matriculas_completadas': matriculas_completadas,
+                    'estudiantes_con_matriculas': agregados['estudiantes_activos']
                 },
-                'por_carrera': carreras_stats,
-                'por_curso': cursos_stats,
+                'por_carrera': agregados['por_carrera'],
+                'por_curso': agregados['por_curso'],
                 'porcentajes': {
-                    'activas': round((len(matriculas_activas) / total_matriculas * 100), 2) if total_matriculas > 0 else 0,
-                    'canceladas': round((len(matriculas_canceladas) / total_matriculas * 100), 2) if total_matriculas > 0 else 0,
-                    'completadas': round((len(matriculas_completadas) / total_matriculas * 100), 2) if total_matriculas > 0 else 0
+                    'activas': round((matriculas_activas / total_matriculas * 100), 2) if total_matriculas > 0 else 0,
+                    'canceladas': round((matriculas_canceladas / total_matriculas * 100), 2) if total_matriculas > 0 else 0,
+                    'completadas': round((matriculas_completadas / total_matriculas * 100), 2) if total_matriculas > 0 else 0
                 }
             }
             
@@ -225,77 +616,185 @@ class MatriculaService:
             self.logger.error(f"Error generando reporte: {e}")
             return {}
     
+    def obtener_reporte_columnar(self, incluir_archivo: bool = True) -> Dict[str, list]:
+        """
+        Obtiene el detalle de matrículas en formato columnar (una lista por
+        columna), listo para construir un DataFrame con tipos compactos
+        """
+        return self.matricula_dao.get_enrollment_report_columns(incluir_archivo)
+    
+    def _vista_catalogo(self, periodo_id: Optional[int]) -> Dict:
+        """
+        Catálogo con su ocupación en columnas y en arreglos listos para
+        los filtros vectorizados, servido desde el cache del catálogo
+        """
+        def cargar() -> Dict:
+            catalogo = self.curso_dao.get_catalog_columns(periodo_id)
+            return {
+                'columnas': catalogo,
+                'codigos': np.array(catalogo['codigo'], dtype=str),
+                'cupos_libres': np.array(catalogo['cupos_totales'], dtype=int)
+                                - np.array(catalogo['cupos_ocupados'], dtype=int),
+                'horario_por_curso': dict(zip(catalogo['codigo'], catalogo['horario'])),
+                'matriz_horarios': matriz_de_mascaras(mascara_horario(h) for h in catalogo['horario'])
+            }
+        
+        return self.cache_catalogo.obtener(('vista', periodo_id), cargar)
+    
+    def obtener_cursos(self, periodo_id: Optional[int] = None) -> List[Curso]:
+        """Obtiene todos los cursos con su ocupación, desde el cache del catálogo"""
+        periodo_id = self._resolver_periodo(periodo_id)
+        return self.cache_catalogo.obtener(('todos', periodo_id),
+                                           lambda: self.curso_dao.find_all(periodo_id))
+    
+    def obtener_cursos_con_cupos(self, periodo_id: Optional[int] = None) -> List[Curso]:
+        """Obtiene los cursos con cupos disponibles, desde el cache del catálogo"""
+        periodo_id = self._resolver_periodo(periodo_id)
+        return self.cache_catalogo.obtener(('con_cupos', periodo_id),
+                                           lambda: self.curso_dao.find_with_available_spots(periodo_id))
+    
+    def metricas_cache_catalogo(self) -> Dict:
+        """Tasa de aciertos y antigüedad de los valores servidos por el cache del catálogo"""
+        return self.cache_catalogo.metricas()
+    
+    def verificar_cruces_cohorte(self, estudiante_codigos: List[str], curso_codigo: str,
+                                 periodo_id: Optional[int] = None) -> Dict[str, bool]:
+        """
+        Indica, para cada estudiante de una cohorte, si el horario del curso
+        se cruza con sus cursos activos
+        Los horarios de la cohorte se apilan en una matriz y se comparan con
+        un solo AND vectorizado
+        """
+        periodo_id = self._resolver_periodo(periodo_id)
+        codigos = [codigo.strip().upper() for codigo in estudiante_codigos]
+        curso_codigo = curso_codigo.strip().upper()
+        
+        estado = self.matricula_dao.get_batch_enrollment_state(set(codigos), {curso_codigo}, periodo_id)
+        horarios, activas = estado['horarios'], estado['activas']
+        
+        matriz = matriz_de_mascaras(
+            combinar_mascaras(horarios.get(c, '') for c in activas.get(codigo, ()) if c != curso_codigo)
+            for codigo in codigos
+        )
+        cruces = cruces_vectorizados(matriz, mascara_horario(horarios.get(curso_codigo, '')))
+        
+        return dict(zip(codigos, (bool(cruce) for cruce in cruces)))
+    
     def _verificar_prerrequisitos(self, estudiante: Estudiante, curso: Curso) -> bool:
         """
-        Verifica prerrequisitos para un curso (simulación)
+        Verifica prerrequisitos para un curso
         Predicado lógico complejo
         """
-        # Simulación de verificación de prerrequisitos
-        # En un sistema real, esto consultaría una tabla de prerrequisitos
+        cursos_completados = set()
+        if self.prerrequisitos.tiene_requisitos(curso.codigo):
+            # Solo los cursos con requisitos necesitan el historial del estudiante
+            cursos_completados = self.matricula_dao.get_completed_courses(estudiante.codigo)
         
-        # Reglas simuladas:
-        # 1. Cursos avanzados requieren cursos básicos
-        cursos_avanzados = ['MAT301', 'FIS301', 'QUI301']
-        cursos_basicos_requeridos = ['MAT101', 'FIS101', 'QUI101']
+        return self._cumple_prerrequisitos(estudiante.carrera, curso.codigo, cursos_completados)
+    
+    def _cumple_prerrequisitos(self, carrera: str, curso_codigo: str, cursos_completados: set) -> bool:
+        """
+        Evalúa las reglas de prerrequisitos sobre datos ya cargados
+        Predicado lógico sin acceso a base de datos
+        """
+        # 1. Prerrequisitos de la tabla, evaluados sobre el grafo en memoria
+        if not self.prerrequisitos.cumple(curso_codigo, cursos_completados):
+            return False
         
-        if curso.codigo in cursos_avanzados:
-            # Verificar si el estudiante ha completado cursos básicos
-            matriculas_estudiante = self.matricula_dao.find_by_estudiante(estudiante.codigo)
-            cursos_completados = [
-                m.curso_codigo for m in matriculas_estudiante 
-                if m.estado == EstadoMatricula.COMPLETADA
-            ]
+        # 2. Límite por carrera
+        return self._permitido_para_carrera(carrera, curso_codigo)
+    
+    def _permitido_para_carrera(self, carrera: str, curso_codigo: str) -> bool:
+        """Restricciones de cursos por carrera (simulación)"""
+        return not curso_codigo.startswith(RESTRICCIONES_CARRERA.get(carrera, ()))
+    
+    def _mascara_carrera(self, carrera: str, codigos: np.ndarray) -> np.ndarray:
+        """Versión vectorizada de _permitido_para_carrera sobre un arreglo de códigos"""
+        permitidos = np.ones(len(codigos), dtype=bool)
+        for prefijo in RESTRICCIONES_CARRERA.get(carrera, ()):
+            permitidos &= ~np.char.startswith(codigos, prefijo)
+        return permitidos
+    
+    def agregar_prerrequisito(self, curso_codigo: str, requisito_codigo: str,
+                              grupo: int = 1) -> Tuple[bool, str]:
+        """
+        Registra un prerrequisito entre dos cursos
+        Rechaza las aristas que formarían un ciclo en el grafo
+        """
+        try:
+            prerrequisito = Prerrequisito(curso_codigo, requisito_codigo, grupo)
+            self.prerrequisitos.validar_arista(prerrequisito.curso_codigo, prerrequisito.requisito_codigo)
             
-            # Verificar si tiene al menos un curso básico completado
-            tiene_basico = any(curso_basico in cursos_completados for curso_basico in cursos_basicos_requeridos)
-            if not tiene_basico:
-                return False
-        
-        # 2. Límite por carrera (simulación)
-        if estudiante.carrera == 'MEDICINA' and curso.codigo.startswith('ING'):
-            return False  # Estudiantes de medicina no pueden tomar cursos de ingeniería
-        
-        return True
+            if not self.prerrequisito_dao.create(prerrequisito):
+                return False, "Alguno de los cursos no existe"
+            
+            self.prerrequisitos.invalidar()
+            return True, f"Prerrequisito registrado: {prerrequisito}"
+            
+        except ValueError as e:
+            return False, str(e)
+        except Exception as e:
+            self.logger.error(f"Error registrando prerrequisito: {e}")
+            return False, f"Error interno: {str(e)}"
     
-    def obtener_cursos_disponibles_para_estudiante(self, estudiante_codigo: str) -> List[Dict]:
+    def eliminar_prerrequisito(self, curso_codigo: str, requisito_codigo: str) -> Tuple[bool, str]:
+        """Elimina un prerrequisito entre dos cursos"""
+        try:
+            if not self.prerrequisito_dao.delete_by_codigos(curso_codigo, requisito_codigo):
+                return False, "El prerrequisito no existe"
+            
+            self.prerrequisitos.invalidar()
+            return True, "Prerrequisito eliminado"
+            
+        except Exception as e:
+            self.logger.error(f"Error eliminando prerrequisito: {e}")
+            return False, f"Error interno: {str(e)}"
+    
+    def obtener_cursos_disponibles_para_estudiante(self, estudiante_codigo: str,
+                                                   periodo_id: Optional[int] = None) -> List[Dict]:
         """
         Obtiene cursos disponibles para un estudiante específico
         Aplicación de múltiples filtros y reglas de negocio
+        El catálogo se representa como arreglos y los filtros se combinan
+        con operaciones booleanas vectorizadas
         """
         try:
-            # Obtener estudiante
-            estudiante = self.estudiante_dao.find_by_codigo(estudiante_codigo)
-            if not estudiante:
-                return []
+            periodo_id = self._resolver_periodo(periodo_id)
             
-            # Obtener todos los cursos con cupos
-            cursos_con_cupos = self.curso_dao.find_with_available_spots()
+            # Estado del estudiante: carrera, cursos activos y completados
+            estado = self.matricula_dao.get_student_course_state(estudiante_codigo, periodo_id)
+            if estado is None:
+                return []
             
-            # Obtener cursos ya matriculados por el estudiante
-            matriculas_activas = self.matricula_dao.find_by_estudiante(estudiante_codigo)
-            cursos_matriculados = [m.curso_codigo for m in matriculas_activas if m.esta_activa()]
+            # Catálogo completo con su ocupación, en columnas y arreglos (cacheado)
+            vista = self._vista_catalogo(periodo_id)
+            catalogo, codigos, cupos_libres = vista['columnas'], vista['codigos'], vista['cupos_libres']
+            if not catalogo['codigo']:
+                return []
             
-            # Filtrar cursos disponibles
-            cursos_disponibles = []
-            for curso in cursos_con_cupos:
-                # No debe estar ya matriculado
-                if curso.codigo in cursos_matriculados:
-                    continue
-                
-                # Verificar prerrequisitos
-                if not self._verificar_prerrequisitos(estudiante, curso):
-                    continue
-                
-                cursos_disponibles.append({
-                    'codigo': curso.codigo,
-                    'nombre': curso.nombre,
-                    'creditos': curso.creditos,
-                    'profesor': curso.profesor,
-                    'horario': curso.horario,
-                    'cupos_disponibles': curso.cupos_disponibles
-                })
-            
-            return cursos_disponibles
+            bloqueados = self.prerrequisitos.cursos_bloqueados(estado['completados'])
+            
+            # Horario comprometido del estudiante frente al de cada curso del catálogo
+            horario_por_curso = vista['horario_por_curso']
+            mascara_estudiante = combinar_mascaras(horario_por_curso.get(c, '') for c in estado['activos'])
+            matriz_horarios = vista['matriz_horarios']
+            
+            con_cupos = cupos_libres > 0
+            matriculado = np.isin(codigos, np.array(sorted(estado['activos']), dtype=str))
+            cumple_requisitos = ~np.isin(codigos, np.array(sorted(bloqueados), dtype=str))
+            permitido = self._mascara_carrera(estado['carrera'], codigos)
+            sin_cruce = ~cruces_vectorizados(matriz_horarios, mascara_estudiante)
+            
+            elegibles = np.flatnonzero(con_cupos & ~matriculado & cumple_requisitos & permitido & sin_cruce)
+            
+            return [{
+                'codigo': catalogo['codigo'][i],
+                'nombre': catalogo['nombre'][i],
+                'creditos': catalogo['creditos'][i],
+                'profesor': catalogo['profesor'][i],
+                'horario': catalogo['horario'][i],
+                'cupos_disponibles': int(cupos_libres[i])
+            } for i in elegibles]
             
         except Exception as e:
             self.logger.error(f"Error obteniendo cursos disponibles: {e}")
@@ -0,0 +1,167 @@
+"""
+Autor: Sistema de Matrículas Universitarias
+Módulo: Grafo de Prerrequisitos
+Descripción: Grafo acíclico de prerrequisitos en memoria con cierre transitivo precalculado
+Paradigmas: POO, Funcional, Lógico
+"""
+
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+import logging
+import threading
+import time
+
+class GrafoPrerrequisitos:
+    """
+    Vista en memoria de la tabla prerrequisitos
+    Se carga una vez, precalcula el cierre transitivo y se recarga cuando
+    se invalida (tras modificar la tabla) o al vencer su TTL
+    Las verificaciones trabajan sobre el conjunto de cursos completados del
+    estudiante, sin acceso a base de datos
+    """
+    
+    # Segundos que se conserva el grafo antes de recargarlo
+    TTL_GRAFO = 300
+    
+    def __init__(self, prerrequisito_dao=None):
+        """Constructor del grafo de prerrequisitos"""
+        if prerrequisito_dao is None:
+            from dao.prerrequisito_dao import PrerrequisitoDAO
+            prerrequisito_dao = PrerrequisitoDAO()
+        
+        self.prerrequisito_dao = prerrequisito_dao
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._expira = 0.0
+        
+        # curso -> grupos de requisitos alternativos
+        self._grupos: Dict[str, Tuple[FrozenSet[str], ...]] = {}
+        # curso -> todos los requisitos directos e indirectos
+        self._ancestros: Dict[str, FrozenSet[str]] = {}
+        # curso -> requisitos obligatorios implícitos al completarlo
+        self._implicitos: Dict[str, FrozenSet[str]] = {}
+    
+    def invalidar(self):
+        """Fuerza la recarga del grafo en la próxima consulta"""
+        with self._lock:
+            self._expira = 0.0
+    
+    def _asegurar_cargado(self):
+        """Recarga el grafo si fue invalidado o venció su TTL"""
+        if time.monotonic() < self._expira:
+            return
+        with self._lock:
+            if time.monotonic() < self._expira:
+                return
+            aristas = [(p.curso_codigo, p.requisito_codigo, p.grupo)
+                       for p in self.prerrequisito_dao.find_all()]
+            self._construir(aristas)
+            self._expira = time.monotonic() + self.TTL_GRAFO
+    
+    def _construir(self, aristas: Iterable[Tuple[str, str, int]]):
+        """
+        Construye los grupos y el cierre transitivo a partir de las aristas
+        (curso, requisito, grupo), recorriendo el grafo en orden topológico
+        """
+        por_grupo: Dict[str, Dict[int, set]] = {}
+        for curso, requisito, grupo in aristas:
+            por_grupo.setdefault(curso, {}).setdefault(grupo, set()).add(requisito)
+        
+        grupos = {
+            curso: tuple(frozenset(requisitos) for _, requisitos in sorted(por_curso.items()))
+            for curso, por_curso in por_grupo.items()
+        }
+        
+        ancestros: Dict[str, FrozenSet[str]] = {}
+        implicitos: Dict[str, FrozenSet[str]] = {}
+        for curso in self._orden_topologico(grupos):
+            todos = set()
+            obligatorios = set()
+            for alternativas in grupos.get(curso, ()):
+                for requisito in alternativas:
+                    todos |= {requisito} | ancestros.get(requisito, frozenset())
+                # Un grupo con una sola alternativa es obligatorio: quien
+                # completó el curso también cumplió ese requisito
+                if len(alternativas) == 1:
+                    requisito = next(iter(alternativas))
+                    obligatorios |= {requisito} | implicitos.get(requisito, frozenset())
+            ancestros[curso] = frozenset(todos)
+            implicitos[curso] = frozenset(obligatorios)
+        
+        self._grupos = grupos
+        self._ancestros = ancestros
+        self._implicitos = implicitos
+        self.logger.info(f"Grafo de prerrequisitos cargado: {len(grupos)} cursos con requisitos")
+    
+    def _orden_topologico(self, grupos: Dict[str, Tuple[FrozenSet[str], ...]]) -> List[str]:
+        """
+        Ordena los cursos de modo que cada requisito aparezca antes que el curso
+        Algoritmo de Kahn; un ciclo en la tabla es un error de datos
+        """
+        requisitos = {curso: set().union(*alternativas) for curso, alternativas in grupos.items()}
+        nodos = set(requisitos).union(*requisitos.values()) if requisitos else set()
+        pendientes = {nodo: len(requisitos.get(nodo, ())) for nodo in nodos}
+        dependientes: Dict[str, List[str]] = {}
+        for curso, directos in requisitos.items():
+            for requisito in directos:
+                dependientes.setdefault(requisito, []).append(curso)
+        
+        listos = [nodo for nodo, grado in pendientes.items() if grado == 0]
+        orden = []
+        while listos:
+            nodo = listos.pop()
+            orden.append(nodo)
+            for curso in dependientes.get(nodo, ()):
+                pendientes[curso] -= 1
+                if pendientes[curso] == 0:
+                    listos.append(curso)
+        
+        if len(orden) != len(nodos):
+            ciclo = sorted(nodo for nodo, grado in pendientes.items() if grado > 0)
+            raise ValueError(f"La tabla de prerrequisitos contiene un ciclo entre: {', '.join(ciclo)}")
+        return orden
+    
+    def tiene_requisitos(self, curso_codigo: str) -> bool:
+        """Indica si un curso tiene prerrequisitos"""
+        self._asegurar_cargado()
+        return curso_codigo in self._grupos
+    
+    def requisitos_transitivos(self, curso_codigo: str) -> FrozenSet[str]:
+        """Retorna todos los cursos de los que depende un curso, directa o indirectamente"""
+        self._asegurar_cargado()
+        return self._ancestros.get(curso_codigo, frozenset())
+    
+    def _efectivos(self, cursos_completados: Iterable[str]) -> set:
+        """Completa el historial con los requisitos obligatorios implícitos"""
+        efectivos = set(cursos_completados)
+        for curso in list(efectivos):
+            efectivos |= self._implicitos.get(curso, frozenset())
+        return efectivos
+    
+    def _cumple_grupos(self, curso_codigo: str, efectivos: set) -> bool:
+        """Cada grupo debe tener al menos un requisito cumplido"""
+        return all(alternativas & efectivos for alternativas in self._grupos.get(curso_codigo, ()))
+    
+    def cumple(self, curso_codigo: str, cursos_completados: Iterable[str]) -> bool:
+        """Verifica si el historial de un estudiante cumple los prerrequisitos de un curso"""
+        self._asegurar_cargado()
+        if curso_codigo not in self._grupos:
+            return True
+        return self._cumple_grupos(curso_codigo, self._efectivos(cursos_completados))
+    
+    def cursos_bloqueados(self, cursos_completados: Iterable[str]) -> FrozenSet[str]:
+        """
+        Retorna los cursos cuyos prerrequisitos no cumple el estudiante
+        Los cursos habilitados del catálogo son su diferencia con este conjunto
+        """
+        self._asegurar_cargado()
+        efectivos = self._efectivos(cursos_completados)
+        return frozenset(curso for curso in self._grupos if not self._cumple_grupos(curso, efectivos))
+    
+    def validar_arista(self, curso_codigo: str, requisito_codigo: str):
+        """
+        Verifica que agregar la arista curso -> requisito no cree un ciclo
+        Lanza ValueError si el curso ya es requisito (transitivo) del requisito
+        """
+        self._asegurar_cargado()
+        if curso_codigo == requisito_codigo or curso_codigo in self._ancestros.get(requisito_codigo, frozenset()):
+            raise ValueError(f"{requisito_codigo} ya depende de {curso_codigo}: se formaría un ciclo")
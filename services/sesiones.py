@@ -0,0 +1,223 @@
+"""
+Autor: Sistema de Matrículas Universitarias
+Módulo: Almacén de Sesiones
+Descripción: Sesiones de usuario por token con expiración deslizante y persistencia opcional en SQLite
+Paradigmas: POO, Concurrente
+"""
+
+from typing import Dict, Optional
+from models.usuario import Usuario, RolUsuario
+import hashlib
+import logging
+import secrets
+import sqlite3
+import threading
+import time
+
+class Sesion:
+    """
+    Sesión de un usuario autenticado
+    Guarda los datos que necesitan las verificaciones de permisos, de modo
+    que no se consulte la base de datos en cada operación
+    """
+    
+    def __init__(self, usuario_id: Optional[int], email: str, rol: RolUsuario, nombre: str = "",
+                 apellido: str = "", codigo_estudiante: str = "", expira: float = 0.0):
+        """Constructor de la sesión"""
+        self.usuario_id = usuario_id
+        self.email = email
+        self.rol = rol
+        self.nombre = nombre
+        self.apellido = apellido
+        self.codigo_estudiante = codigo_estudiante
+        self.expira = expira
+        # Vencimiento guardado en SQLite (se actualiza de forma espaciada)
+        self.expira_persistido = expira
+    
+    @classmethod
+    def desde_usuario(cls, usuario: Usuario, expira: float) -> 'Sesion':
+        """Crea la sesión a partir de un usuario autenticado"""
+        return cls(usuario.id, usuario.email, usuario.rol, usuario.nombre,
+                   usuario.apellido, usuario.codigo_estudiante, expira)
+    
+    def es_administrador(self) -> bool:
+        """Predicado: la sesión pertenece a un administrador"""
+        return self.rol == RolUsuario.ADMINISTRADOR
+    
+    def es_estudiante(self) -> bool:
+        """Predicado: la sesión pertenece a un estudiante con código asignado"""
+        return self.rol == RolUsuario.ESTUDIANTE and bool(self.codigo_estudiante)
+    
+    def to_dict(self) -> Dict:
+        """Convierte la sesión a diccionario"""
+        info = {
+            'email': self.email,
+            'rol': self.rol.value,
+            'nombre': self.nombre,
+            'apellido': self.apellido
+        }
+        if self.rol == RolUsuario.ESTUDIANTE:
+            info['codigo_estudiante'] = self.codigo_estudiante
+        return info
+    
+    def __repr__(self) -> str:
+        """Representación técnica del objeto"""
+        return f"Sesion(email='{self.email}', rol='{self.rol.value}')"
+
+class AlmacenSesiones:
+    """
+    Almacén de sesiones indexado por token opaco
+    - Búsqueda O(1) en un diccionario en memoria
+    - Expiración deslizante: cada uso válido extiende la sesión ttl segundos
+    - Persistencia opcional en SQLite para conservar sesiones entre reinicios;
+      solo se guarda el hash del token, nunca el token
+    """
+    
+    # Usos entre purgas de sesiones vencidas
+    OPERACIONES_POR_PURGA = 1000
+    
+    def __init__(self, ttl: float = 1800.0, ruta_sqlite: Optional[str] = None):
+        """Constructor del almacén de sesiones"""
+        self.ttl = ttl
+        self.logger = logging.getLogger(__name__)
+        self._sesiones: Dict[str, Sesion] = {}
+        self._lock = threading.Lock()
+        self._operaciones = 0
+        self._conexion: Optional[sqlite3.Connection] = None
+        
+        if ruta_sqlite:
+            self._conexion = sqlite3.connect(ruta_sqlite, check_same_thread=False)
+            # WAL con sincronización normal: cada escritura no espera un fsync
+            self._conexion.execute("PRAGMA journal_mode=WAL")
+            self._conexion.execute("PRAGMA synchronous=NORMAL")
+            self._conexion.execute("""
+                CREATE TABLE IF NOT EXISTS sesiones (
+                    token_hash TEXT PRIMARY KEY,
+                    usuario_id INTEGER,
+                    email TEXT NOT NULL,
+                    rol TEXT NOT NULL,
+                    nombre TEXT,
+                    apellido TEXT,
+                    codigo_estudiante TEXT,
+                    expira REAL NOT NULL
+                )
+            """)
+            self._conexion.commit()
+            self._cargar()
+    
+    def _clave(self, token: str) -> str:
+        """Clave interna de un token"""
+        return hashlib.sha256(token.encode()).hexdigest()
+    
+    def _cargar(self):
+        """Carga desde SQLite las sesiones vigentes"""
+        ahora = time.time()
+        self._conexion.execute("DELETE FROM sesiones WHERE expira <= ?", (ahora,))
+        filas = self._conexion.execute("""
+            SELECT token_hash, usuario_id, email, rol, nombre, apellido, codigo_estudiante, expira
+            FROM sesiones
+        """).fetchall()
+        self._conexion.commit()
+        
+        for clave, usuario_id, email, rol, nombre, apellido, codigo, expira in filas:
+            self._sesiones[clave] = Sesion(usuario_id, email, RolUsuario(rol), nombre or "",
+                                           apellido or "", codigo or "", expira)
+        self.logger.info(f"Sesiones restauradas: {len(filas)}")
+    
+    def crear(self, usuario: Usuario) -> str:
+        """Abre una sesión para el usuario y retorna su token"""
+        token = secrets.token_urlsafe(32)
+        clave = self._clave(token)
+        sesion = Sesion.desde_usuario(usuario, time.time() + self.ttl)
+        
+        with self._lock:
+            self._sesiones[clave] = sesion
+            if self._conexion is not None:
+                self._conexion.execute(
+                    "INSERT OR REPLACE INTO sesiones VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (clave, sesion.usuario_id, sesion.email, sesion.rol.value, sesion.nombre,
+                     sesion.apellido, sesion.codigo_estudiante, sesion.expira)
+                )
+                self._conexion.commit()
+            self._contar_operacion()
+        
+        return token
+    
+    def obtener(self, token: Optional[str]) -> Optional[Sesion]:
+        """
+        Retorna la sesión vigente del token y extiende su vencimiento
+        Retorna None si el token no existe o la sesión venció
+        """
+        if not token:
+            return None
+        
+        clave = self._clave(token)
+        ahora = time.time()
+        with self._lock:
+            sesion = self._sesiones.get(clave)
+            if sesion is None:
+                return None
+            
+            if sesion.expira <= ahora:
+                self._eliminar(clave)
+                return None
+            
+            sesion.expira = ahora + self.ttl
+            # En SQLite el vencimiento se actualiza como máximo una vez por
+            # cada cuarto del TTL, para no escribir en cada uso
+            if self._conexion is not None and sesion.expira - sesion.expira_persistido > self.ttl / 4:
+                self._conexion.execute("UPDATE sesiones SET expira = ? WHERE token_hash = ?",
+                                       (sesion.expira, clave))
+                self._conexion.commit()
+                sesion.expira_persistido = sesion.expira
+            self._contar_operacion()
+            return sesion
+    
+    def eliminar(self, token: Optional[str]) -> bool:
+        """Cierra una sesión"""
+        if not token:
+            return False
+        with self._lock:
+            return self._eliminar(self._clave(token))
+    
+    def _eliminar(self, clave: str) -> bool:
+        """Elimina una sesión por su clave interna (requiere el lock)"""
+        sesion = self._sesiones.pop(clave, None)
+        if self._conexion is not None:
+            self._conexion.execute("DELETE FROM sesiones WHERE token_hash = ?", (clave,))
+            self._conexion.commit()
+        return sesion is not None
+    
+    def _contar_operacion(self):
+        """Purga las sesiones vencidas cada OPERACIONES_POR_PURGA usos (requiere el lock)"""
+        self._operaciones += 1
+        if self._operaciones >= self.OPERACIONES_POR_PURGA:
+            self._operaciones = 0
+            self._purgar()
+    
+    def purgar(self) -> int:
+        """Elimina las sesiones vencidas; retorna cuántas se eliminaron"""
+        with self._lock:
+            return self._purgar()
+    
+    def _purgar(self) -> int:
+        """Elimina las sesiones vencidas (requiere el lock)"""
+        ahora = time.time()
+        vencidas = [clave for clave, sesion in self._sesiones.items() if sesion.expira <= ahora]
+        for clave in vencidas:
+            del self._sesiones[clave]
+        if self._conexion is not None:
+            self._conexion.execute("DELETE FROM sesiones WHERE expira <= ?", (ahora,))
+            self._conexion.commit()
+        return len(vencidas)
+    
+    def __len__(self) -> int:
+        """Número de sesiones en memoria"""
+        return len(self._sesiones)
+    
+    def cerrar(self):
+        """Cierra la conexión SQLite, si existe"""
+        with self._lock:
+            if self._conexion is not None:
+                self._conexion.close()
+                self._conexion = None
@@ -0,0 +1,237 @@
+"""
+Autor: Sistema de Matrículas Universitarias
+Módulo: Hash de Contraseñas
+Descripción: Derivación de claves con sal (PBKDF2 / scrypt) de costo configurable y verificación en un pool acotado
+Paradigmas: POO, Funcional, Concurrente
+"""
+
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, TypeVar
+import base64
+import hashlib
+import hmac
+import os
+import re
+import secrets
+import threading
+
+T = TypeVar('T')
+
+# Hash heredado: SHA-256 sin sal en hexadecimal
+PATRON_SHA256_HEREDADO = re.compile(r'^[0-9a-f]{64}$')
+
+def _b64(datos: bytes) -> str:
+    """Base64 sin relleno, apta para guardarse entre separadores '$'"""
+    return base64.b64encode(datos).decode().rstrip('=')
+
+def _desde_b64(texto: str) -> bytes:
+    """Inverso de _b64"""
+    return base64.b64decode(texto + '=' * (-len(texto) % 4))
+
+class HasherContrasena(ABC):
+    """
+    Algoritmo de derivación de claves con sal aleatoria
+    El hash codificado incluye el algoritmo y sus parámetros, de modo que
+    se puede verificar aunque después cambie el costo configurado
+    """
+    
+    algoritmo = ''
+    LONGITUD_SAL = 16
+    LONGITUD_CLAVE = 32
+    
+    def hashear(self, password: str) -> str:
+        """Deriva la clave con una sal nueva y retorna el hash codificado"""
+        sal = secrets.token_bytes(self.LONGITUD_SAL)
+        return self._codificar(sal, self._derivar(password, sal, *self._parametros()))
+    
+    def verificar(self, password: str, codificado: str) -> bool:
+        """Verifica la contraseña contra un hash codificado por este algoritmo"""
+        try:
+            parametros, sal, clave = self._decodificar(codificado)
+        except (ValueError, TypeError):
+            return False
+        return hmac.compare_digest(self._derivar(password, sal, *parametros), clave)
+    
+    def es_actual(self, codificado: str) -> bool:
+        """Predicado: el hash usa este algoritmo con los parámetros configurados"""
+        try:
+            parametros, _, _ = self._decodificar(codificado)
+        except (ValueError, TypeError):
+            return False
+        return parametros == self._parametros()
+    
+    @abstractmethod
+    def _parametros(self) -> tuple:
+        """Parámetros de costo configurados, en el orden en que se codifican"""
+        pass
+    
+    @abstractmethod
+    def _derivar(self, password: str, sal: bytes, *parametros) -> bytes:
+        """Deriva la clave de la contraseña con la sal y los parámetros dados"""
+        pass
+    
+    def _codificar(self, sal: bytes, clave: bytes) -> str:
+        partes = [self.algoritmo, *map(str, self._parametros()), _b64(sal), _b64(clave)]
+        return '$'.join(partes)
+    
+    def _decodificar(self, codificado: str):
+        """Retorna (parámetros, sal, clave); lanza ValueError si el formato no coincide"""
+        partes = codificado.split('$')
+        if partes[0] != self.algoritmo or len(partes) != len(self._parametros()) + 3:
+            raise ValueError("Formato de hash no reconocido")
+        parametros = tuple(int(p) for p in partes[1:-2])
+        return parametros, _desde_b64(partes[-2]), _desde_b64(partes[-1])
+
+class HasherPBKDF2(HasherContrasena):
+    """PBKDF2-HMAC-SHA256: pbkdf2_sha256$iteraciones$sal$clave"""
+    
+    algoritmo = 'pbkdf2_sha256'
+    
+    def __init__(self, iteraciones: int = 600_000):
+        """Constructor del hasher PBKDF2"""
+        if iteraciones < 1000:
+            raise ValueError("PBKDF2 requiere al menos 1000 iteraciones")
+        self.iteraciones = iteraciones
+    
+    def _parametros(self) -> tuple:
+        return (self.iteraciones,)
+    
+    def _derivar(self, password: str, sal: bytes, iteraciones: int) -> bytes:
+        return hashlib.pbkdf2_hmac('sha256', password.encode(), sal, iteraciones, self.LONGITUD_CLAVE)
+    
+    def __repr__(self) -> str:
+        """Representación técnica del objeto"""
+        return f"HasherPBKDF2(iteraciones={self.iteraciones})"
+
+class HasherScrypt(HasherContrasena):
+    """scrypt (memoria y CPU): scrypt$n$r$p$sal$clave"""
+    
+    algoritmo = 'scrypt'
+    
+    def __init__(self, n: int = 2 ** 15, r: int = 8, p: int = 1):
+        """Constructor del hasher scrypt; n debe ser potencia de 2"""
+        if n < 2 or n & (n - 1):
+            raise ValueError("El parámetro n de scrypt debe ser una potencia de 2")
+        self.n = n
+        self.r = r
+        self.p = p
+    
+    def _parametros(self) -> tuple:
+        return (self.n, self.r, self.p)
+    
+    def _derivar(self, password: str, sal: bytes, n: int, r: int, p: int) -> bytes:
+        # Memoria necesaria: 128 * n * r * p bytes, con holgura
+        return hashlib.scrypt(password.encode(), salt=sal, n=n, r=r, p=p,
+                              maxmem=256 * n * r * p + 1024 * 1024, dklen=self.LONGITUD_CLAVE)
+    
+    def __repr__(self) -> str:
+        """Representación técnica del objeto"""
+        return f"HasherScrypt(n={self.n}, r={self.r}, p={self.p})"
+
+# Niveles de costo disponibles (ver benchmarks/hash_contrasenas.py)
+COSTOS: Dict[str, Callable[[], HasherContrasena]] = {
+    'pbkdf2-bajo': lambda: HasherPBKDF2(100_000),
+    'pbkdf2-medio': lambda: HasherPBKDF2(300_000),
+    'pbkdf2-alto': lambda: HasherPBKDF2(600_000),
+    'scrypt-bajo': lambda: HasherScrypt(2 ** 14),
+    'scrypt-medio': lambda: HasherScrypt(2 ** 15),
+    'scrypt-alto': lambda: HasherScrypt(2 ** 16),
+}
+
+# El costo se puede elegir por entorno sin tocar el código
+COSTO_POR_DEFECTO = os.environ.get('COSTO_CONTRASENAS', 'scrypt-medio')
+
+_HASHERS = {hasher.algoritmo: hasher for hasher in (HasherPBKDF2(), HasherScrypt())}
+_hasher_actual: HasherContrasena = COSTOS.get(COSTO_POR_DEFECTO, COSTOS['scrypt-medio'])()
+
+def configurar_hasher(hasher: HasherContrasena):
+    """Cambia el algoritmo o el costo con que se generan los hashes nuevos"""
+    global _hasher_actual
+    _hasher_actual = hasher
+
+def hasher_actual() -> HasherContrasena:
+    """Hasher con que se generan los hashes nuevos"""
+    return _hasher_actual
+
+def hashear_password(password: str) -> str:
+    """Genera el hash codificado de una contraseña con el hasher configurado"""
+    return _hasher_actual.hashear(password)
+
+def verificar_hash(password: str, codificado: str) -> bool:
+    """
+    Verifica una contraseña contra un hash codificado de cualquier algoritmo
+    soportado, incluido el SHA-256 sin sal de versiones anteriores
+    """
+    if not password or not codificado:
+        return False
+    
+    if PATRON_SHA256_HEREDADO.match(codificado):
+        return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), codificado)
+    
+    algoritmo = codificado.split('$', 1)[0]
+    if algoritmo == _hasher_actual.algoritmo:
+        return _hasher_actual.verificar(password, codificado)
+    hasher = _HASHERS.get(algoritmo)
+    return hasher is not None and hasher.verificar(password, codificado)
+
+def requiere_rehash(codificado: str) -> bool:
+    """Predicado: el hash es heredado o no usa el algoritmo y costo configurados"""
+    return not _hasher_actual.es_actual(codificado)
+
+class VerificadorContrasenas:
+    """
+    Pool acotado para el trabajo de hash de contraseñas
+    - Un número fijo de hilos: hashlib libera el GIL durante PBKDF2 y scrypt,
+      por lo que corren en paralelo sin ocupar el hilo que atiende el login
+    - Un límite de trabajos en espera: si el pool está saturado, la solicitud
+      espera como máximo espera_maxima segundos y luego se rechaza, en lugar
+      de acumular trabajo que deja sin CPU al resto del sistema
+    """
+    
+    def __init__(self, hilos: Optional[int] = None, max_pendientes: Optional[int] = None,
+                 espera_maxima: float = 5.0):
+        """Constructor del verificador"""
+        self.hilos = hilos or max(1, min(4, (os.cpu_count() or 2) - 1))
+        self.espera_maxima = espera_maxima
+        self._pool = ThreadPoolExecutor(max_workers=self.hilos, thread_name_prefix='hash-contrasenas')
+        self._cupos = threading.BoundedSemaphore(max_pendientes or self.hilos * 4)
+    
+    def ejecutar(self, funcion: Callable[..., T], *args) -> T:
+        """
+        Ejecuta funcion(*args) en el pool y espera su resultado
+        Lanza TimeoutError si no hay lugar en el pool dentro de espera_maxima
+        """
+        if not self._cupos.acquire(timeout=self.espera_maxima):
+            raise TimeoutError("Demasiadas verificaciones de contraseña en curso")
+        try:
+            futuro = self._pool.submit(funcion, *args)
+        except Exception:
+            self._cupos.release()
+            raise
+        futuro.add_done_callback(lambda _: self._cupos.release())
+        return futuro.result()
+    
+    def verificar(self, password: str, codificado: str) -> bool:
+        """Verifica una contraseña en el pool"""
+        return self.ejecutar(verificar_hash, password, codificado)
+    
+    def hashear(self, password: str) -> str:
+        """Genera un hash en el pool"""
+        return self.ejecutar(hashear_password, password)
+    
+    def cerrar(self):
+        """Detiene los hilos del pool tras terminar el trabajo pendiente"""
+        self._pool.shutdown(wait=True)
+
+_verificador: Optional[VerificadorContrasenas] = None
+_verificador_lock = threading.Lock()
+
+def obtener_verificador() -> VerificadorContrasenas:
+    """Pool de verificación compartido por todo el proceso, creado al primer uso"""
+    global _verificador
+    if _verificador is None:
+        with _verificador_lock:
+            if _verificador is None:
+                _verificador = VerificadorContrasenas()
+    return _verificador
@@ -92,6 +92,37 @@ class DataAnalyzer:
             self.logger.error(f"Error creando DataFrame de matrículas: {e}")
             return pd.DataFrame()
     
+    def create_enrollments_dataframe_from_columns(self, columnas: Dict[str, list]) -> pd.DataFrame:
+        """
+        Crea el DataFrame de matrículas a partir del reporte columnar
+        Asigna tipos compactos: categorías, datetime64 y enteros pequeños
+        """
+        try:
+            if not columnas or not columnas.get('estado'):
+                return pd.DataFrame()
+            
+            df = pd.DataFrame({
+                'estudiante_codigo': pd.array(columnas['estudiante_codigo'], dtype='string'),
+                'estudiante_nombre': pd.array(columnas['estudiante_nombre'], dtype='string'),
+                'carrera': pd.Categorical(columnas['carrera']),
+                'curso_codigo': pd.Categorical(columnas['curso_codigo']),
+                'curso_nombre': pd.array(columnas['curso_nombre'], dtype='string'),
+                'creditos': np.asarray(columnas['creditos'], dtype=np.int8),
+                'fecha_matricula': pd.to_datetime(np.asarray(columnas['fecha_matricula'], dtype='datetime64[us]')),
+                'estado': pd.Categorical(columnas['estado'], categories=['ACTIVA', 'CANCELADA', 'COMPLETADA'])
+            })
+            
+            # Mismas columnas derivadas que create_enrollments_dataframe
+            df['mes_matricula'] = df['fecha_matricula'].dt.month.astype(np.int8)
+            df['año_matricula'] = df['fecha_matricula'].dt.year.astype(np.int16)
+            df['dia_semana'] = pd.Categorical(df['fecha_matricula'].dt.day_name())
+            
+            return df
+            
+        except Exception as e:
+            self.logger.error(f"Error creando DataFrame columnar de matrículas: {e}")
+            return pd.DataFrame()
+    
     def analyze_enrollment_trends(self, df_matriculas: pd.DataFrame) -> Dict[str, Any]:
         """
         Analiza tendencias de matrícula usando pandas